@@ -22,8 +22,8 @@ compute_breakdown() {
    
    for i in $(seq 1 $node_count); do
        location=$(get_location $i ${CASSANDRA_DIR}/../latencies.csv 2>/dev/null)
-       if [ -n "$location" ] && docker inspect "${location}1" >/dev/null 2>&1; then
-           CONTAINER_ID="${location}1"
+       if [ -n "$location" ] && docker inspect "${PREFIX}${location}1" >/dev/null 2>&1; then
+           CONTAINER_ID="${PREFIX}${location}1"
        else
            CONTAINER_ID="$(config "node_name")$i"
        fi
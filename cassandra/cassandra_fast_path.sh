@@ -1,7 +1,12 @@
 #!/bin/bash
 set -e
 
-CONTAINER_ID="${1:?Usage: $0 <container_id_or_name>}"
+CONTAINER_ID="${1:?Usage: $0 <container_id_or_name> [--baseline]}"
+MODE="${2:-}"
+# The coordinator counters cannot be reset through JMX: --baseline records
+# their current values in the container, and the ratios are then computed
+# on the increments since that baseline.
+BASELINE_FILE="/tmp/fast_path_baseline"
 JMX_HOST="localhost:9010"
 JMXTERM_JAR="/tmp/jmxterm-1.0.4-uber.jar"
 JMXTERM_URL="https://github.com/jiaqi/jmxterm/releases/download/v1.0.4/jmxterm-1.0.4-uber.jar"
@@ -22,18 +27,41 @@ java -jar $JMXTERM_JAR -l $JMX_HOST -i /tmp/jmx_cmds.txt -n
 " 2>/dev/null | grep "^$attribute" | grep -oP '\d+'
 }
 
+BASELINE=""
+BASELINE_TMP=""
+if [ "$MODE" = "--baseline" ]; then
+  BASELINE_TMP=$(mktemp)
+else
+  BASELINE=$(docker exec "$CONTAINER_ID" cat "$BASELINE_FILE" 2>/dev/null || true)
+fi
+
+# Increment of the counter <name> of <scope> since the baseline
+jmx_count() {
+  local name="$1"
+  local scope="$2"
+  local value
+  value=$(jmx_get "org.apache.cassandra.metrics:name=$name,scope=$scope,type=AccordCoordinator" Count || true)
+  value=${value:-0}
+  if [ "$MODE" = "--baseline" ]; then
+    echo "$scope $name $value" >> "$BASELINE_TMP"
+  fi
+  local base
+  base=$(echo "$BASELINE" | awk -v s="$scope" -v n="$name" '$1==s && $2==n {print $3}')
+  echo $(( value - ${base:-0} ))
+}
+
 for scope in rw ro; do
-  FAST=$(jmx_get "org.apache.cassandra.metrics:name=FastPaths,scope=$scope,type=AccordCoordinator" Count)
-  MEDIUM=$(jmx_get "org.apache.cassandra.metrics:name=MediumPaths,scope=$scope,type=AccordCoordinator" Count)
-  SLOW=$(jmx_get "org.apache.cassandra.metrics:name=SlowPaths,scope=$scope,type=AccordCoordinator" Count)
+  FAST=$(jmx_count FastPaths $scope)
+  MEDIUM=$(jmx_count MediumPaths $scope)
+  SLOW=$(jmx_count SlowPaths $scope)
 
-  FAST=${FAST:-0}
-  MEDIUM=${MEDIUM:-0}
-  SLOW=${SLOW:-0}
+  if [ "$MODE" = "--baseline" ]; then
+    [ "$scope" = "ro" ] && jmx_count Ephemeral $scope > /dev/null
+    continue
+  fi
 
   if [ "$scope" = "ro" ]; then
-    EPHEMERAL=$(jmx_get "org.apache.cassandra.metrics:name=Ephemeral,scope=$scope,type=AccordCoordinator" Count)
-    EPHEMERAL=${EPHEMERAL:-0}
+    EPHEMERAL=$(jmx_count Ephemeral $scope)
     SCOPE_TOTAL=$((FAST + MEDIUM + SLOW + EPHEMERAL))
     if [ "$SCOPE_TOTAL" -gt 0 ]; then
 	echo "Ephemeral ratio: $(awk "BEGIN {printf \"%.4f\", $EPHEMERAL/$SCOPE_TOTAL}")"
@@ -47,3 +75,8 @@ for scope in rw ro; do
     fi
   fi
 done
+
+if [ "$MODE" = "--baseline" ]; then
+  docker exec -i "$CONTAINER_ID" sh -c "cat > $BASELINE_FILE" < "$BASELINE_TMP"
+  rm -f "$BASELINE_TMP"
+fi
@@ -20,8 +20,8 @@ cassandra_start_cluster() {
     for i in $(seq 1 $num_dcs); do
         local city=$(get_location $i ${DIR}/latencies.csv)
         for k in $(seq 1 $nodes_per_dc); do
-            local container_name="${city}${k}"
-            local log_file=${LOGDIR}/${protocol}_node${global_node_id}.log
+            local container_name="${PREFIX}${city}${k}"
+            local log_file=${LOGDIR}/${PREFIX}${protocol}_node${global_node_id}.log
             docker logs -f $container_name > ${log_file} 2>&1 &
             global_node_id=$((global_node_id + 1))
         done
@@ -39,11 +39,7 @@ cassandra_add_node() {
 
 cassandra_cleanup_cluster() {
     log "Cleaning up Cassandra cluster..."
-    python3 ${CASSANDRA_DIR}/cleanup_cassandra_cluster.py
-    if [ $? -ne 0 ]; then
-        error "Failed to clean up Cassandra cluster."
-        exit 1
-    fi
+    teardown_cluster
 }
 
 cassandra_get_hosts() {
@@ -53,7 +49,7 @@ cassandra_get_hosts() {
     for i in $(seq 1 $num_dcs); do
         local city=$(get_location $i ${DIR}/latencies.csv)
         for k in $(seq 1 $nodes_per_dc); do
-            local container_name="${city}${k}"
+            local container_name="${PREFIX}${city}${k}"
             local ip=$(get_container_ip "$container_name")
             if [ -n "$ip" ]; then
                 ips="$ips,$ip"
@@ -65,16 +61,7 @@ cassandra_get_hosts() {
 }
 
 cassandra_get_node_count() {
-    local num_dcs=0
-    for i in $(seq 1 15); do
-        local city=$(get_location $i ${DIR}/latencies.csv 2>/dev/null)
-        [ -z "$city" ] && continue
-        local ip=$(get_container_ip "${city}1")
-        if [ -n "$ip" ]; then
-            num_dcs=$((num_dcs + 1))
-        fi
-    done
-    echo $num_dcs
+    get_dc_count
 }
 
 cassandra_get_port() {
@@ -90,5 +77,5 @@ cassandra_get_dc() {
 
 cassandra_get_leaders() {
     local first_city=$(get_location 1 ${DIR}/latencies.csv)
-    echo "${first_city}1"
+    echo "${PREFIX}${first_city}1"
 }
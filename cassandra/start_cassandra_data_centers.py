@@ -1,6 +1,15 @@
 import docker, sys, time, math, re, csv, os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from exp_config import load_config
+from gc_analysis import jvm_options, node_volume, CONTAINER_LOG_DIR
+from placement import assign
+from snapshot import ring_tokens
+from teardown import labels
+from wait_ready import wait_ready, READY, TIMEOUT
+
 def debug(msg):
     if config.get("debug", 1):
         timestamp = datetime.now().strftime("%s:%f")
@@ -15,15 +24,14 @@ def read_locations(file_path):
     return locations
         
 def wait_for_log(container, log_pattern, timeout=300):
-    log_stream = container.logs(stream=True)
-    start_time = time.time()
-    for log in log_stream:
-        if re.search(log_pattern, log.decode('utf-8')):
-            debug(f"Log pattern '{log_pattern}' found in container '{container.name}'.")
-            return True
-        if time.time() - start_time > timeout:
-            debug(f"Timeout waiting for log pattern '{log_pattern}' in container '{container.name}'.")
-            return False
+    status = wait_ready(container, log_pattern, timeout)
+    if status == READY:
+        debug(f"Log pattern '{log_pattern}' found in container '{container.name}'.")
+        return True
+    if status == TIMEOUT:
+        debug(f"Timeout waiting for log pattern '{log_pattern}' in container '{container.name}'.")
+    else:
+        debug(f"Container '{container.name}' exited before log pattern '{log_pattern}' appeared.")
     return False
 
 def wait_for_nodetool_status(containers, expected_count, timeout=120):
@@ -45,7 +53,7 @@ def wait_for_nodetool_status(containers, expected_count, timeout=120):
     debug(f"Timeout waiting for all {expected_count} nodes to become UN.")
     return False
 
-def create_cassandra_cluster(num_dcs, nodes_per_dc, cassandra_image):
+def create_cassandra_cluster(num_dcs, nodes_per_dc, cassandra_image, tcm=False):
     client = docker.from_env()
     network_name = config["network_name"]
 
@@ -54,6 +62,7 @@ def create_cassandra_cluster(num_dcs, nodes_per_dc, cassandra_image):
     cassandra_xmx = "4g"
     machine = config.get("machine", "")
     ephemeral_read_enabled = config.get("accord.ephemeral_read_enabled", "true")
+    cpu_pinning = str(config.get("cpu_pinning", "false")).lower() == "true"
     if machine:
         try:
             with open(os.path.join(os.path.dirname(__file__), '..', 'gcp.csv'), 'r') as gcp_file:
@@ -74,62 +83,135 @@ def create_cassandra_cluster(num_dcs, nodes_per_dc, cassandra_image):
     if 'cassandra_xms' not in locals():
         cassandra_xms = "2g"
         cassandra_xmx = "4g"
-    
-    containers = []
+
+    jvm_opts = " -Xms"+cassandra_xms+" -Xmx"+cassandra_xmx+(" -XX:ActiveProcessorCount="+gcp_row['vcpus'] if machine and 'gcp_row' in locals() else "")
+    parallel_bootstrap = str(config.get("cassandra.parallel_bootstrap", 1)).lower() not in ("0", "false")
+    if parallel_bootstrap and not tcm:
+        # Without transactional cluster metadata, a node refuses to join while
+        # another one is joining unless this check is relaxed.  The tokens of
+        # a joining node are chosen by the allocation algorithm
+        # (allocate_tokens_for_local_replication_factor, set by default since
+        # Cassandra 4.0) from the ring of its own DC, so the nodes joining at
+        # once are never in the same DC (see below); the cluster is empty, so
+        # no data is streamed from a stale replica.
+        jvm_opts += " -Dcassandra.consistent.rangemovement=false"
+
+    gc_logging = str(config.get("gc.logging", "false")).lower() == "true"
+    # The tokens of the snapshotted deployments, whose nodes only import their
+    # own data (see snapshot.py)
+    ring = {}
+    if str(config.get("load_snapshot", "false")).lower() == "true":
+        ring = ring_tokens(client, cassandra_image, num_dcs, nodes_per_dc)
+
     log_pattern = r"Startup complete"
-    seeds_str = ",".join([f"{locations[idx][2]}1" for idx in range(num_dcs)])
+    prefix = config.get("container_prefix", "")
+    seeds_str = ",".join([f"{prefix}{locations[idx][2]}1" for idx in range(num_dcs)])
 
-    port_offset = 0
+    racks_per_dc = int(config.get("racksperdc", 0) or nodes_per_dc)
+    nodes = []
     for i in range(1, num_dcs + 1):
         _, _, dc_name = locations[i-1]
         for k in range(1, nodes_per_dc + 1):
-            container_name = f"{dc_name}{k}"
-            is_first_node = (i == 1 and k == 1)
-            port_offset += 1
-            try:
-                run_kwargs = dict(
-                    image=cassandra_image,
-                    name=container_name,
-                    network=network_name,
-                    auto_remove=True,
-                    security_opt=[
-                        "seccomp=unconfined",
-                        "apparmor=unconfined",
-                        "label=disable",
-                    ],
-                    log_config=docker.types.LogConfig(
-                        type="json-file",
-                        config={
-                            "max-size": "10m",
-                            "max-file": "3"
-                        }),
-                    tmpfs={"/tmp/tmpfs": "rw,nosuid,nodev,mode=1777"},
-                    ulimits=[docker.types.Ulimit(name="memlock", soft=-1, hard=-1)],
-                    environment={
-                        "JVM_EXTRA_OPTS" : " -Xms"+cassandra_xms+" -Xmx"+cassandra_xmx+(" -XX:ActiveProcessorCount="+gcp_row['vcpus'] if machine and 'gcp_row' in locals() else ""),
-                        "JVM_OPTS" : " -Xms"+cassandra_xms+" -Xmx"+cassandra_xmx+(" -XX:ActiveProcessorCount="+gcp_row['vcpus'] if machine and 'gcp_row' in locals() else ""),
-                        "CASSANDRA_ENDPOINT_SNITCH": "GossipingPropertyFileSnitch",
-                        "CASSANDRA_SEEDS": "" if is_first_node else seeds_str,
-                        "CASSANDRA_CLUSTER_NAME": "TestCluster",
-                        "CASSANDRA_DC": dc_name,
-                        "CASSANDRA_RACK": f"RAC{k}",
-                        "CASSANDRA_EPHEMERAL_READ_ENABLED": ephemeral_read_enabled
-                    },
-                    cap_add=["NET_ADMIN"],
-                    detach=True
-                )
-                if nano_cpus is not None:
-                    run_kwargs['nano_cpus'] = nano_cpus
-                if mem_limit is not None:
-                    run_kwargs['mem_limit'] = mem_limit
-                container = client.containers.run(**run_kwargs)
-                containers.append(container)            
-                debug(f"Starting container '{container_name}' in DC '{dc_name}', rack 'RAC{k}'.")
-                if not wait_for_log(container, log_pattern):
-                    debug(f"Failed to start container '{container_name}' within timeout.")
-                    exit(-1)
-            except docker.errors.APIError as e:
-                debug(f"Error starting container '{container_name}': {e}")
+            nodes.append((i, k, dc_name))
+
+    def start_node(i, k, dc_name):
+        """Start the k-th node of DC *dc_name* and wait until it is up; returns its container or None."""
+        container_name = f"{prefix}{dc_name}{k}"
+        rack = f"RAC{(k - 1) % racks_per_dc + 1}"
+        is_first_node = (i == 1 and k == 1)
+        node_jvm_opts = jvm_opts
+        if gc_logging:
+            # %t: one log per start of the node (see gc_analysis.py)
+            node_jvm_opts += " " + jvm_options(f"{CONTAINER_LOG_DIR}/{container_name}.%t.gc.log")
+        if ring.get(container_name):
+            node_jvm_opts += f" -Dcassandra.initial_token={','.join(ring[container_name])}"
+        try:
+            run_kwargs = dict(
+                image=cassandra_image,
+                name=container_name,
+                network=network_name,
+                auto_remove=True,
+                security_opt=[
+                    "seccomp=unconfined",
+                    "apparmor=unconfined",
+                    "label=disable",
+                ],
+                log_config=docker.types.LogConfig(
+                    type="json-file",
+                    config={
+                        "max-size": "10m",
+                        "max-file": "3"
+                    }),
+                tmpfs={"/tmp/tmpfs": "rw,nosuid,nodev,mode=1777"},
+                ulimits=[docker.types.Ulimit(name="memlock", soft=-1, hard=-1)],
+                environment={
+                    "JVM_EXTRA_OPTS" : node_jvm_opts,
+                    "JVM_OPTS" : node_jvm_opts,
+                    "CASSANDRA_ENDPOINT_SNITCH": "GossipingPropertyFileSnitch",
+                    "CASSANDRA_SEEDS": "" if is_first_node else seeds_str,
+                    "CASSANDRA_CLUSTER_NAME": "TestCluster",
+                    "CASSANDRA_DC": dc_name,
+                    "CASSANDRA_RACK": rack,
+                    "CASSANDRA_EPHEMERAL_READ_ENABLED": ephemeral_read_enabled
+                },
+                cap_add=["NET_ADMIN"],
+                labels=labels(prefix, "node", i),
+                detach=True
+            )
+            assignment = None
+            if nano_cpus is not None and cpu_pinning:
+                assignment = assign(container_name, nano_cpus // 10**9)
+            if assignment:
+                run_kwargs['cpuset_cpus'] = assignment['cpus']
+                run_kwargs['cpuset_mems'] = assignment['mems']
+            elif nano_cpus is not None:
+                run_kwargs['nano_cpus'] = nano_cpus
+            if mem_limit is not None:
+                run_kwargs['mem_limit'] = mem_limit
+            if gc_logging:
+                run_kwargs['volumes'] = [node_volume()]
+            container = client.containers.run(**run_kwargs)
+            debug(f"Starting container '{container_name}' in DC '{dc_name}', rack '{rack}'.")
+            if not wait_for_log(container, log_pattern):
+                debug(f"Failed to start container '{container_name}' within timeout.")
+                return None
+            return container
+        except docker.errors.APIError as e:
+            debug(f"Error starting container '{container_name}': {e}")
+            return None
+
+    if parallel_bootstrap and tcm:
+        # The cluster metadata service sequences the joins: the first node
+        # founds the cluster, the seeds of the other DCs join it, then all the
+        # remaining nodes join at once.
+        phases = [nodes[:1],
+                  [n for n in nodes[1:] if n[1] == 1],
+                  [n for n in nodes[1:] if n[1] != 1]]
+    elif parallel_bootstrap:
+        # The first node founds the cluster, then the k-th nodes of all the
+        # DCs join at once, a single node per DC at a time.
+        phases = [nodes[:1]] + [[n for n in nodes[1:] if n[1] == k] for k in range(1, nodes_per_dc + 1)]
+    else:
+        phases = [[n] for n in nodes]
+
+    containers = []
+    for phase in phases:
+        if not phase:
+            continue
+        if len(phase) > 1:
+            debug(f"Starting {len(phase)} Cassandra nodes concurrently.")
+        failed = []
+        with ThreadPoolExecutor(max_workers=len(phase)) as executor:
+            futures = {executor.submit(start_node, *node): node for node in phase}
+            for future in as_completed(futures):
+                container = future.result()
+                if container is not None:
+                    containers.append(container)
+                else:
+                    failed.append(f"{prefix}{futures[future][2]}{futures[future][1]}")
+        if failed:
+            debug(f"Failed to start the Cassandra node(s) {' '.join(sorted(failed))}.")
+            sys.exit(1)
 
     debug(f"Started {len(containers)} Cassandra nodes across {num_dcs} DCs ({nodes_per_dc} nodes/DC).")
     if containers:
@@ -152,24 +234,7 @@ if __name__ == "__main__":
         latencies_file = os.path.join(os.path.dirname(__file__), '..', 'latencies.csv')
         locations = read_locations(latencies_file)
         
-        config = {}
-        config_path = os.path.join(os.path.dirname(__file__), '..', 'exp.config')
-        with open(config_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    value = value.strip()
-                    try:
-                        value = int(value)
-                    except ValueError:
-                        try:
-                            value = float(value)
-                        except ValueError:
-                            pass
-                    config[key.strip()] = value
+        config = load_config()
 
         nodes_per_dc = int(sys.argv[3]) if len(sys.argv) > 3 else int(config.get("nodesperdc", 1))
         cassandra_image = config["accord_cassandra_image"] if protocol == "accord" else config["normal_cassandra_image"]
@@ -177,4 +242,5 @@ if __name__ == "__main__":
         print(f"Invalid parameters: {e}")
         sys.exit(1)
 
-    create_cassandra_cluster(num_dcs, nodes_per_dc, cassandra_image)
+    # The Accord build has transactional cluster metadata (TCM)
+    create_cassandra_cluster(num_dcs, nodes_per_dc, cassandra_image, tcm=(protocol == "accord"))
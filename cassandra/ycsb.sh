@@ -10,7 +10,7 @@ cassandra_create_keyspace() {
     nodes_per_dc=${nodes_per_dc:-1}
 
     local first_city=$(get_location 1 ${DIR}/latencies.csv)
-    local container="${first_city}1"
+    local container="${PREFIX}${first_city}1"
 
     # Build NetworkTopologyStrategy dict string with nodes_per_dc replicas per DC
     local dc_map="'class': 'NetworkTopologyStrategy'"
@@ -45,7 +45,7 @@ cassandra_create_usertable() {
     local num_dcs=$3
     local workload_type=$4
     local first_city=$(get_location 1 ${DIR}/latencies.csv)
-    local container="${first_city}1"
+    local container="${PREFIX}${first_city}1"
 
     local create_table_command=""
     if [ "$workload_type" == "site.ycsb.workloads.ClosedEconomyWorkload" ]; then
@@ -69,3 +69,11 @@ cassandra_create_usertable() {
         exit 1
     fi
 }
+
+cassandra_count_rows() {
+    local first_city=$(get_location 1 ${DIR}/latencies.csv)
+    local container="${PREFIX}${first_city}1"
+    # At ALL, so that a row missing from the replica of the first node is counted
+    docker exec -i ${container} cqlsh --request-timeout=3600 -e "CONSISTENCY ALL; SELECT count(*) FROM ycsb.usertable;" 2>/dev/null \
+        | grep -E '^[[:space:]]*[0-9]+[[:space:]]*$' | head -1 | tr -d '[:space:]'
+}
@@ -8,13 +8,16 @@ source ${DIR}/utils.sh
 source ${DIR}/run_benchmarks.sh
 
 usage() {
-    echo "Usage: $0 [--dry-run] [--test] [--protocols=LIST]"
+    echo "Usage: $0 [--dry-run] [--fresh] [--test] [--protocols=LIST] [--set=KEY=VALUE...]"
     echo "  --dry-run        Skip the experiment run; only draw plots using existing data."
+    echo "  --fresh          Discard the completed runs instead of resuming the sweep."
     echo "  --test           Use a 60s run time and right-size containers to fit this machine."
     echo "  --protocols=LIST Override the list of protocols to run (comma-separated)."
+    echo "  --set=KEY=VALUE  Override a setting of exp.config for this run (repeatable)."
 }
 
 dry_run=0
+fresh=0
 test_run=0
 protocols_override=""
 for arg in "$@"; do
@@ -22,12 +25,18 @@ for arg in "$@"; do
         --dry-run)
             dry_run=1
             ;;
+        --fresh)
+            fresh=1
+            ;;
         --test)
             test_run=1
             ;;
         --protocols=*)
             protocols_override=$(echo "${arg#*=}" | tr ',' ' ')
             ;;
+        --set=*)
+            config_set_arg "$arg"
+            ;;
         *)
             echo "Unknown parameter: $arg"
             usage
@@ -56,29 +65,24 @@ records=$(config records)
 threads=$(config threads)
 ops_per_thread=0
 
-warmexecutiontime=30
+# The runs start once the system is steady (see steady_state.py)
+warmup_opts=(-warmup auto)
 if [ "$test_run" -eq 1 ]; then
     records=1000
-    warmexecutiontime=0
-    original_machine=$(config machine)
-    original_maxexecutiontime=$(config maxexecutiontime)
-    restore_test_settings() {
-        sed -i "s/^machine=.*/machine=${original_machine}/" "${CONFIG_FILE}"
-        sed -i "s/^maxexecutiontime=.*/maxexecutiontime=${original_maxexecutiontime}/" "${CONFIG_FILE}"
-    }
-    trap restore_test_settings EXIT
+    warmup_opts=(-p warmupexecutiontime=0)
     compute_test_machine "${nodes}"
-    sed -i "s/^maxexecutiontime=.*/maxexecutiontime=10/" "${CONFIG_FILE}"
+    config_set maxexecutiontime 10
 fi
 maxexecutiontime=$(config maxexecutiontime)
 
 if [ "$dry_run" -eq 0 ]; then
     pull_images
+    init_ledger ${LOGDIR}/cdf ${fresh}
     do_clean_up=0
     for p in ${protocols}
     do
-        # clean prior logs
-        rm -f ${LOGDIR}/cdf/*${p}*
+        # clean the logs of incomplete runs
+        prune_logs ${LOGDIR}/cdf "${p}_*"
         
         do_create_and_load=1
         total=$(( $(echo ${workloads} | wc -w) * $(echo ${threads} | wc -w) ))
@@ -93,11 +97,17 @@ if [ "$dry_run" -eq 0 ]; then
 	    for c in ${threads}
 	    do
 	        do_clean_up=$(( count == total-1 ? 1 : 0 ))
+	        count=$((count+1))
+	        point="${p} nodes=${nodes} workload=${w} threads=${c} records=${records}"
+	        if point_output "${point}" >/dev/null; then
+	            log "Skipping completed run: ${point}"
+	            continue
+	        fi
 	        ts=$(date +%Y%m%d%H%M%S%N)
 	        output_file="${LOGDIR}/cdf/${p}_${nodes}_${w}_${ts}.dat"
-	        run_benchmark ${p} ${c} ${nodes} ${replication_factor} ${workload_type} ${w} ${records} $((threads * ops_per_thread)) ${output_file} ${do_create_and_load} ${do_clean_up} -p db.tracing=${tracing} -p maxexecutiontime=${maxexecutiontime} -p warmupexecutiontime=${warmexecutiontime}
+	        run_benchmark ${p} ${c} ${nodes} ${replication_factor} ${workload_type} ${w} ${records} $((threads * ops_per_thread)) ${output_file} ${do_create_and_load} ${do_clean_up} -p db.tracing=${tracing} -p maxexecutiontime=${maxexecutiontime} "${warmup_opts[@]}"
+	        record_point "${point}" "${output_file}"
 	        do_create_and_load=0
-	        count=$((count+1))
 	    done
         done
     done
@@ -10,14 +10,17 @@ source ${DIR}/run_benchmarks.sh
 source ${DIR}/cassandra/cassandra_breakdown.sh
 
 usage() {
-    echo "Usage: $0 [--dry-run] [--test] [--protocols=LIST] [--nodesperdc=N]"
+    echo "Usage: $0 [--dry-run] [--fresh] [--test] [--protocols=LIST] [--nodesperdc=N] [--set=KEY=VALUE...]"
     echo "  --dry-run        Skip the experiment run; only draw plots using existing data."
+    echo "  --fresh          Discard the completed runs instead of resuming the sweep."
     echo "  --test           Use a 60s run time and right-size containers to fit this machine."
     echo "  --protocols=LIST Override the list of protocols to run (comma-separated)."
     echo "  --nodesperdc=N   Override number of nodes per DC (default from exp.config)."
+    echo "  --set=KEY=VALUE  Override a setting of exp.config for this run (repeatable)."
 }
 
 dry_run=0
+fresh=0
 test_run=0
 protocols_override=""
 nodesperdc_override=""
@@ -26,6 +29,9 @@ for arg in "$@"; do
         --dry-run)
             dry_run=1
             ;;
+        --fresh)
+            fresh=1
+            ;;
         --test)
             test_run=1
             ;;
@@ -38,6 +44,9 @@ for arg in "$@"; do
         --nodes-per-dc=*)
             nodesperdc_override="${arg#*=}"
             ;;
+        --set=*)
+            config_set_arg "$arg"
+            ;;
         *)
             echo "Unknown parameter: $arg"
             usage
@@ -62,21 +71,8 @@ threads=50
 single_client_threads=1
 ops_per_thread=0
 
-original_machine=$(config machine)
-original_maxexecutiontime=$(config maxexecutiontime)
-original_fix_lh=$(config "cockroachdb.fix_lease_holder")
-original_nodesperdc=$(config "nodesperdc")
-
-restore_settings() {
-    sed -i "s/^machine=.*/machine=${original_machine}/" "${CONFIG_FILE}"
-    sed -i "s/^maxexecutiontime=.*/maxexecutiontime=${original_maxexecutiontime}/" "${CONFIG_FILE}"
-    sed -i "s/^cockroachdb\.fix_lease_holder=.*/cockroachdb.fix_lease_holder=${original_fix_lh}/" "${CONFIG_FILE}"
-    sed -i "s/^nodesperdc=.*/nodesperdc=${original_nodesperdc}/" "${CONFIG_FILE}"
-}
-trap restore_settings EXIT
-
 if [ -n "$nodesperdc_override" ]; then
-    sed -i "s/^nodesperdc=.*/nodesperdc=${nodesperdc_override}/" "${CONFIG_FILE}"
+    config_set nodesperdc "${nodesperdc_override}"
 fi
 
 if [ "$test_run" -eq 1 ]; then
@@ -84,32 +80,37 @@ if [ "$test_run" -eq 1 ]; then
     nodes=3
     records=1000
     compute_test_machine "${nodes}"
-    sed -i "s/^maxexecutiontime=.*/maxexecutiontime=10/" "${CONFIG_FILE}"
+    config_set maxexecutiontime 10
 fi
 
 maxexecutiontime=$(config maxexecutiontime)
 
 if [ "$dry_run" -eq 0 ]; then
     pull_images
-    echo "protocol,nodes,dc,fast_commit,slow_commit,commit,ordering,execution" > ${RESULTSDIR}/closed_economy/breakdown.csv
+    init_ledger ${LOGDIR}/closed_economy ${fresh}
 
     for p in ${protocols}
     do
         if [[ "$p" == "cockroachdb-opt" ]]; then
-            sed -i "s/^cockroachdb\.fix_lease_holder=.*/cockroachdb.fix_lease_holder=true/" "${CONFIG_FILE}"
+            config_set cockroachdb.fix_lease_holder true
         elif [[ "$p" == "cockroachdb-bad" ]]; then
-            sed -i "s/^cockroachdb\.fix_lease_holder=.*/cockroachdb.fix_lease_holder=bad/" "${CONFIG_FILE}"
+            config_set cockroachdb.fix_lease_holder bad
         else
-            sed -i "s/^cockroachdb\.fix_lease_holder=.*/cockroachdb.fix_lease_holder=false/" "${CONFIG_FILE}"
+            config_set cockroachdb.fix_lease_holder false
         fi
 
-        rm -f ${LOGDIR}/closed_economy/*${p}*
+        prune_logs ${LOGDIR}/closed_economy "${p}_*"
         
         for nodes in ${dc_counts}
         do
 	    if [ "$test_run" -eq 1 ]; then
 	        compute_test_machine "${nodes}"
 	    fi
+	    point="${p} nodes=${nodes} workload=${workload} threads=${single_client_threads} records=${records}"
+	    if point_output "${point}" >/dev/null; then
+	        log "Skipping completed run: ${point}"
+	        continue
+	    fi
 	    ts=$(date +%Y%m%d%H%M%S%N)
 	    output_file="${LOGDIR}/closed_economy/${p}_${nodes}_${workload}_${ts}.dat"
 
@@ -129,36 +130,50 @@ if [ "$dry_run" -eq 0 ]; then
 	    if [[ "$p" == cockroachdb* ]]; then
 	        python3 ${DIR}/cockroachdb/cockroachdb_breakdown.py \
 	            ${p} ${LOGDIR}/closed_economy ${workload} ${nodes} ${dcs_list} | \
-	            awk -F',' -v n="${nodes}" -v proto="${p}" '{print proto "," n "," $0}' >> ${RESULTSDIR}/closed_economy/breakdown.csv
+	            awk -F',' -v n="${nodes}" -v proto="${p}" '{print proto "," n "," $0}' > ${output_file%.dat}_breakdown.csv
 	    elif [ "$p" == "accord" ]; then
 	        compute_breakdown ${nodes} accord | \
-	            awk -F',' -v n="${nodes}" '{print "accord," n "," $0}' >> ${RESULTSDIR}/closed_economy/breakdown.csv
+	            awk -F',' -v n="${nodes}" '{print "accord," n "," $0}' > ${output_file%.dat}_breakdown.csv
 	    fi
 
 	    stop_benchmark ${p} ${nodes}
+	    record_point "${point}" "${output_file}"
         done
     done
 
+    # Breakdowns of all the runs, including the ones of a previous invocation
+    echo "protocol,nodes,dc,fast_commit,slow_commit,commit,ordering,execution" > ${RESULTSDIR}/closed_economy/breakdown.csv
+    for p in ${protocols}
+    do
+        cat ${LOGDIR}/closed_economy/${p}_*_breakdown.csv 2>/dev/null >> ${RESULTSDIR}/closed_economy/breakdown.csv || true
+    done
+
     if [ "$test_run" -eq 0 ]; then
-        mkdir -p ${LOGDIR}/closed_economy_multi
+        init_ledger ${LOGDIR}/closed_economy_multi ${fresh}
         for p in ${protocols}
         do
             if [[ "$p" == "cockroachdb-opt" ]]; then
-                sed -i "s/^cockroachdb\.fix_lease_holder=.*/cockroachdb.fix_lease_holder=true/" "${CONFIG_FILE}"
+                config_set cockroachdb.fix_lease_holder true
             elif [[ "$p" == "cockroachdb-bad" ]]; then
-                sed -i "s/^cockroachdb\.fix_lease_holder=.*/cockroachdb.fix_lease_holder=bad/" "${CONFIG_FILE}"
+                config_set cockroachdb.fix_lease_holder bad
             else
-                sed -i "s/^cockroachdb\.fix_lease_holder=.*/cockroachdb.fix_lease_holder=false/" "${CONFIG_FILE}"
+                config_set cockroachdb.fix_lease_holder false
             fi
 
-            rm -f ${LOGDIR}/closed_economy_multi/*${p}*
+            prune_logs ${LOGDIR}/closed_economy_multi "${p}_*"
 
             for nodes in ${dc_counts}
             do
+                point="${p} nodes=${nodes} workload=${workload} threads=${threads} records=${records}"
+                if point_output "${point}" >/dev/null; then
+                    log "Skipping completed run: ${point}"
+                    continue
+                fi
                 ts=$(date +%Y%m%d%H%M%S%N)
                 output_file="${LOGDIR}/closed_economy_multi/${p}_${nodes}_${workload}_${ts}.dat"
 
                 run_benchmark ${p} ${threads} ${nodes} ${replication_factor} ${workload_type} ${workload} ${records} $((threads * ops_per_thread)) ${output_file} 1 1 -p maxexecutiontime=${maxexecutiontime}
+                record_point "${point}" "${output_file}"
             done
         done
     fi
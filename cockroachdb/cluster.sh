@@ -19,11 +19,18 @@ cockroachdb_start_cluster() {
     cockroachdb_cleanup_cluster >/dev/null 2>&1 || true
 
     local first_city=$(get_location 1 ${DIR}/latencies.csv)
-    local first_node="${first_city}1"
+    local first_node="${PREFIX}${first_city}1"
+
+    # The admin UI is published on the host, except for the concurrent
+    # experiments of the scheduler (only one of them could bind the port)
+    local publish="-p 8080:8080"
+    if [ -n "${PREFIX}" ]; then
+        publish=""
+    fi
 
     # 1. Start the very first node
-    start_container ${image} ${first_node} "initial startup completed" ${LOGDIR}/cockroachdb_node1.log \
-        --rm -d --network ${network} -p 8080:8080 --cap-add=NET_ADMIN --cap-add=NET_RAW ${resource_limits} \
+    start_container ${image} ${first_node} "initial startup completed" ${LOGDIR}/${PREFIX}cockroachdb_node1.log \
+        --rm -d --network ${network} ${publish} --cap-add=NET_ADMIN --cap-add=NET_RAW $(get_resource_limits ${first_node}) $(container_labels node 1) \
         -- start --insecure --store=type=mem,size=${max_mem_gb}GB --join=${first_node} --locality=region=${first_city},zone=1 || {
         error "Failed to start first CockroachDB node ${first_node}"
         return 1
@@ -45,10 +52,10 @@ cockroachdb_start_cluster() {
                 global_node_id=$((global_node_id + 1))
                 continue
             fi
-            local container_name="${city}${k}"
-            start_container ${image} ${container_name} "nodeID" ${LOGDIR}/cockroachdb_node${global_node_id}.log \
-                --rm -d --network ${network} --cap-add=NET_ADMIN --cap-add=NET_RAW ${resource_limits} \
-                -- start --insecure --store=type=mem,size=${max_mem_gb}GB --join=${first_ip} --locality=region=${city},zone=${k} || {
+            local container_name="${PREFIX}${city}${k}"
+            start_container ${image} ${container_name} "nodeID" ${LOGDIR}/${PREFIX}cockroachdb_node${global_node_id}.log \
+                --rm -d --network ${network} --cap-add=NET_ADMIN --cap-add=NET_RAW $(get_resource_limits ${container_name}) $(container_labels node ${i}) \
+                -- start --insecure --store=type=mem,size=${max_mem_gb}GB --join=${first_ip} --locality=region=${city},zone=$(get_rack ${k}) || {
                 error "Failed to start CockroachDB node ${container_name}"
                 return 3
             }
@@ -61,14 +68,24 @@ cockroachdb_start_cluster() {
 
 cockroachdb_cleanup_cluster() {
     log "Cleaning up CockroachDB cluster..."
-    for i in $(seq 1 15); do
-        local city=$(get_location $i ${DIR}/latencies.csv 2>/dev/null)
-        [ -z "$city" ] && continue
-        for k in $(seq 1 8); do
-            local container_name="${city}${k}"
-            stop_container ${container_name} >/dev/null 2>&1 || true
-        done
-    done
+    teardown_cluster
+}
+
+# Scrape the metrics of the nodes into <output_file>_crdb_metrics.csv during a
+# run, until cockroachdb_stop_metrics (see crdb_metrics.py).
+cockroachdb_start_metrics() {
+    local output_file=$1
+    python3 ${COCKROACHDB_DIR}/crdb_metrics.py record "${output_file%.dat}_crdb_metrics.csv" &
+    COCKROACHDB_METRICS_PID=$!
+}
+
+cockroachdb_stop_metrics() {
+    if [ -z "${COCKROACHDB_METRICS_PID}" ]; then
+        return 0
+    fi
+    kill ${COCKROACHDB_METRICS_PID} 2>/dev/null
+    wait ${COCKROACHDB_METRICS_PID} 2>/dev/null
+    unset COCKROACHDB_METRICS_PID
 }
 
 cockroachdb_get_hosts() {
@@ -78,7 +95,7 @@ cockroachdb_get_hosts() {
     for i in $(seq 1 $num_dcs); do
         local city=$(get_location $i ${DIR}/latencies.csv)
         for k in $(seq 1 $nodes_per_dc); do
-            local container_name="${city}${k}"
+            local container_name="${PREFIX}${city}${k}"
             local ip=$(get_container_ip "$container_name")
             if [ -n "$ip" ]; then
                 ips="$ips,$ip"
@@ -90,16 +107,7 @@ cockroachdb_get_hosts() {
 }
 
 cockroachdb_get_node_count() {
-    local num_dcs=0
-    for i in $(seq 1 15); do
-        local city=$(get_location $i ${DIR}/latencies.csv 2>/dev/null)
-        [ -z "$city" ] && continue
-        local ip=$(get_container_ip "${city}1")
-        if [ -n "$ip" ]; then
-            num_dcs=$((num_dcs + 1))
-        fi
-    done
-    echo $num_dcs
+    get_dc_count
 }
 
 cockroachdb_get_port() {
@@ -108,7 +116,7 @@ cockroachdb_get_port() {
 
 cockroachdb_get_leaders() {
     local first_city=$(get_location 1 ${DIR}/latencies.csv)
-    echo "${first_city}1"
+    echo "${PREFIX}${first_city}1"
 }
 
 cockroachdb_fix_lease_holder() {
@@ -175,7 +183,7 @@ PYEOF
 
     log "Pinning CockroachDB lease holder to ${chosen_city}..."
     local first_city=$(get_location 1 ${DIR}/latencies.csv)
-    local container="${first_city}1"
+    local container="${PREFIX}${first_city}1"
     local stmt="ALTER TABLE usertable CONFIGURE ZONE USING constraints = '{+region=${chosen_city}: 1}', lease_preferences = '[[\"+region=${chosen_city}\"]]';"
     docker exec "${container}" cockroach sql --insecure -e "${stmt}"
 }
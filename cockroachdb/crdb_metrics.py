@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Time series of the internal metrics of the CockroachDB nodes during a run.
+
+`record` scrapes, every cockroachdb.metrics_interval seconds, the Prometheus
+endpoint of every node of the experiment (http://<node>:8080/_status/vars,
+over the Docker network) until it is terminated.  Each scrape of a node is a
+row of <run>_crdb_metrics.csv, with the metrics over the last interval:
+    wall_time, node;
+    raft_commit_ms, raft_commit_p99_ms  the mean and p99 latency of the
+                   commit of the Raft commands (proposal to application);
+    latch_wait_ms, latch_waits  the mean wait of the requests that waited for
+                   a latch, and their number;
+    txn_restarts   the restarted transactions (all causes);
+    leaseholders   the range leases the node holds (a gauge);
+    range_splits   the ranges split.
+The histograms of CockroachDB are cumulative, so the interval ones are the
+differences of two scrapes; the first scrape of a node only sets the base.
+
+This is the CockroachDB counterpart of the JMX data of Accord, without the
+overhead of tracing every request (db.tracing).
+
+Usage: python3 crdb_metrics.py record <metrics_file>
+"""
+
+import csv
+import os
+import re
+import signal
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from datetime import datetime
+import docker
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from exp_config import load_config
+from teardown import owner
+
+PORT = 8080
+COLUMNS = ["wall_time", "node", "raft_commit_ms", "raft_commit_p99_ms", "latch_wait_ms", "latch_waits",
+           "txn_restarts", "leaseholders", "range_splits"]
+# Name of each metric, by version of CockroachDB
+RAFT_COMMIT = ("raft_process_commandcommit_latency", "raft_replication_latency")
+LATCH_WAIT = ("kv_concurrency_latch_conflict_wait_durations",)
+TXN_RESTARTS = re.compile(r"^txn_restarts_(?!bucket$|sum$|count$)\w+$")
+SAMPLE = re.compile(r"^([a-zA-Z_:][\w:]*)(?:\{([^}]*)\})?\s+(\S+)")
+LE = re.compile(r'le="([^"]+)"')
+
+config = {}
+
+
+def debug(msg):
+    if config.get("debug", 1):
+        timestamp = datetime.now().strftime("%s:%f")
+        print(f"[{timestamp}] \033[32m{msg}\033[0m", file=sys.stderr)
+
+
+def parse_metrics(text):
+    """({metric: value}, {histogram: {le: count}}) of a Prometheus *text*, summed over the stores."""
+    values = defaultdict(float)
+    buckets = defaultdict(lambda: defaultdict(float))
+    for line in text.splitlines():
+        m = SAMPLE.match(line)
+        if not m or line.startswith("#"):
+            continue
+        try:
+            value = float(m.group(3))
+        except ValueError:
+            continue
+        name, labels = m.group(1), m.group(2) or ""
+        le = LE.search(labels)
+        if name.endswith("_bucket") and le:
+            buckets[name[:-len("_bucket")]][float(le.group(1))] += value
+        else:
+            values[name] += value
+    return values, buckets
+
+
+def histogram(previous, current, names):
+    """(count, sum, {le: count}) of the first of the histograms *names* over the interval."""
+    for name in names:
+        if f"{name}_count" in current[0]:
+            count = current[0][f"{name}_count"] - previous[0].get(f"{name}_count", 0)
+            total = current[0][f"{name}_sum"] - previous[0].get(f"{name}_sum", 0)
+            before = previous[1].get(name, {})
+            return count, total, {le: c - before.get(le, 0) for le, c in current[1].get(name, {}).items()}
+    return 0, 0.0, {}
+
+
+def quantile(buckets, q):
+    """Upper bound of the bucket of quantile *q* of cumulative *buckets*, or None."""
+    bounds = sorted(le for le in buckets if le != float("inf"))
+    total = buckets.get(float("inf"), max(buckets.values(), default=0))
+    if total <= 0:
+        return None
+    for le in bounds:
+        if buckets[le] >= q * total:
+            return le
+    return bounds[-1] if bounds else None
+
+
+def ms(ns):
+    return f"{ns / 1e6:.3f}" if ns is not None else "NA"
+
+
+def row(node, previous, current):
+    count, total, buckets = histogram(previous, current, RAFT_COMMIT)
+    latch_count, latch_total, _ = histogram(previous, current, LATCH_WAIT)
+    restarts = sum(v - previous[0].get(k, 0) for k, v in current[0].items() if TXN_RESTARTS.match(k))
+    return [f"{time.time():.3f}", node,
+            ms(total / count if count > 0 else None), ms(quantile(buckets, 0.99)),
+            ms(latch_total / latch_count if latch_count > 0 else None), f"{latch_count:.0f}",
+            f"{restarts:.0f}", f"{current[0].get('replicas_leaseholders', 0):.0f}",
+            f"{current[0].get('range_splits', 0) - previous[0].get('range_splits', 0):.0f}"]
+
+
+def nodes(client, prefix, network):
+    """{name: IP} of the CockroachDB nodes of the experiment."""
+    result = {}
+    for container in client.containers.list(filters={"label": [f"exp.owner={owner(prefix)}", "exp.role=node"]}):
+        ip = container.attrs["NetworkSettings"]["Networks"].get(network, {}).get("IPAddress")
+        if ip:
+            result[container.name] = ip
+    return result
+
+
+def scrape(ip):
+    with urllib.request.urlopen(f"http://{ip}:{PORT}/_status/vars", timeout=5) as response:
+        return parse_metrics(response.read().decode("utf-8", errors="ignore"))
+
+
+def record(metrics_file):
+    client = docker.from_env()
+    prefix = str(config.get("container_prefix", ""))
+    network = config.get("network_name", "")
+    interval = float(config.get("cockroachdb.metrics_interval", 5))
+    stopped = []
+    signal.signal(signal.SIGTERM, lambda *_: stopped.append(True))
+    signal.signal(signal.SIGINT, lambda *_: stopped.append(True))
+
+    previous = {}
+    rows = 0
+    with open(metrics_file, "w") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        while not stopped:
+            start = time.time()
+            for name, ip in sorted(nodes(client, prefix, network).items()):
+                try:
+                    current = scrape(ip)
+                except OSError:
+                    # Not (or no longer) serving, e.g., a crashed node
+                    previous.pop(name, None)
+                    continue
+                if name in previous:
+                    writer.writerow(row(name, previous[name], current))
+                    rows += 1
+                previous[name] = current
+            f.flush()
+            time.sleep(max(0.0, interval - (time.time() - start)))
+    debug(f"Scraped {rows} sample(s) of {len(previous)} CockroachDB node(s) into {metrics_file}.")
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "record":
+        record(sys.argv[2])
+    else:
+        print(f"Usage: {sys.argv[0]} record <metrics_file>")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    config = load_config()
+    main()
@@ -14,7 +14,7 @@ cockroachdb_create_usertable() {
     fi
 
     local first_city=$(get_location 1 ${DIR}/latencies.csv)
-    local container="${first_city}1"
+    local container="${PREFIX}${first_city}1"
 
     # Set replication factor to num_dcs so each DC gets 1 replica
     local target_replicas=${num_dcs:-3}
@@ -46,6 +46,15 @@ cockroachdb_create_usertable() {
         exit 1
     fi
 
+    # Pre-split the table on the first digit of the YCSB keys (user<n>), so
+    # that the loaders do not all contend on a single range
+    local split_points=$(seq -s, -f "('user%g')" 1 9)
+    docker exec "${container}" cockroach sql --insecure -e "ALTER TABLE usertable SPLIT AT VALUES ${split_points}; ALTER TABLE usertable SCATTER;"
+    if [ $? -ne 0 ]; then
+        error "Error pre-splitting usertable."
+        exit 1
+    fi
+
     local fix_lh
     fix_lh=$(config "cockroachdb.fix_lease_holder")
     if [ "${fix_lh}" = "true" ]; then
@@ -60,3 +69,9 @@ cockroachdb_create_usertable() {
         docker exec "${container}" cockroach sql --insecure -e "${shard_command}"
     fi
 }
+
+cockroachdb_count_rows() {
+    local first_city=$(get_location 1 ${DIR}/latencies.csv)
+    local container="${PREFIX}${first_city}1"
+    docker exec "${container}" cockroach sql --insecure --format=csv -e "SELECT count(*) FROM usertable;" 2>/dev/null | tail -1
+}
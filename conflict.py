@@ -6,6 +6,7 @@ import pandas as pd
 import numpy as np
 
 from emulate_latency import haversine, estimate_latency
+from repeat import confidence_interval
 from colors import load_protocol_colors, load_protocol_aliases, get_protocol_color, make_protocol_legend,sort_protocols_for_plotting
 
 def usage_and_exit():
@@ -139,11 +140,17 @@ def main():
     # x-axis: conflict rates from 0.0 to 1.0 step 0.1
     x_values = [round(x, 1) for x in np.arange(0.0, 1.001, 0.1)]
 
-    # For each protocol, compute average median_latency_ms per conflict rate
+    # For each protocol and conflict rate, the median latency of each run (over
+    # its clients), then their mean and 95% confidence interval over the runs
+    # (repetitions, see repeat.py)
+    if 'run' not in df_valid.columns:
+        df_valid['run'] = 0
     data_by_protocol = {}
+    ci_by_protocol = {}
     for proto in protocol_order:
         dfp = df_valid[df_valid['protocol'] == proto]
         rates = []
+        cis = []
         for x in x_values:
             # Due to floating formatting in CSV, match with a tolerance
             df_rate = dfp[np.isclose(dfp['conflict_rate_f'].astype(float), x, atol=1e-6)]
@@ -152,9 +159,13 @@ def main():
                 df_rate = dfp[dfp['conflict_rate_f'].round(2) == round(x,2)]
             if df_rate.empty:
                 rates.append(None)
+                cis.append(None)
             else:
-                rates.append(float(df_rate['median_latency_ms'].mean()))
+                mean, ci = confidence_interval(df_rate.groupby('run', dropna=False)['median_latency_ms'].median().tolist())
+                rates.append(mean)
+                cis.append(ci)
         data_by_protocol[proto] = rates
+        ci_by_protocol[proto] = cis
 
     # For each protocol, compute average failed percentage per conflict rate
     def get_failed_col(df):
@@ -333,12 +344,15 @@ def main():
                 if fp is not None and fp > 0:
                     failed_coords.append((x, y, fp))
 
-            # Main plot: line connecting all points with normal circle marks
-            f.write(f"      \\addplot+[{col}, mark=*, thick] table {{\n")
-            for x, y in zip(x_values, data_by_protocol[proto]):
+            # Main plot: line connecting all points with normal circle marks,
+            # and the confidence interval of each one
+            f.write(f"      \\addplot+[{col}, mark=*, thick,\n")
+            f.write(f"        error bars/.cd, y dir=both, y explicit, error mark=-,\n")
+            f.write(f"      ] table[x index=0, y index=1, y error index=2] {{\n")
+            for x, y, ci in zip(x_values, data_by_protocol[proto], ci_by_protocol[proto]):
                 if y is None:
                     continue
-                f.write(f"        {x:.2f} {y:.2f}\n")
+                f.write(f"        {x:.2f} {y:.2f} {ci:.2f}\n")
             f.write("      };\n\n")
 
             # Overlay crosshatch marks on failed points
@@ -381,7 +395,7 @@ def main():
         f.write("    \\end{axis}\n")
         f.write(f"   \\node[font=\\tiny] at (10.6,0.6) {{\\color{{gray}}{{$Q$}}}};\n")
         f.write("  \\end{tikzpicture}\n")
-        f.write("  \\caption{Median operation latency across all locations as a function of the conflict parameter ($\\theta$).")
+        f.write("  \\caption{Median operation latency across all locations as a function of the conflict parameter ($\\theta$). Error bars show the 95\\% confidence interval over the runs.")
         # f.write(data_dcs_caption)
         f.write("}\n")
         f.write("  \\label{fig:conflict-latency}\n")
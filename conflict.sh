@@ -9,13 +9,16 @@ source ${DIR}/run_benchmarks.sh
 source ${DIR}/cassandra/cassandra_breakdown.sh
 
 usage() {
-    echo "Usage: $0 [--dry-run] [--test] [--protocols=LIST]"
+    echo "Usage: $0 [--dry-run] [--fresh] [--test] [--protocols=LIST] [--set=KEY=VALUE...]"
     echo "  --dry-run        Skip the experiment run; only draw plots using existing data."
+    echo "  --fresh          Discard the completed runs instead of resuming the sweep."
     echo "  --test           Use a 60s run time and right-size containers to fit this machine."
     echo "  --protocols=LIST Override the list of protocols to run (comma-separated)."
+    echo "  --set=KEY=VALUE  Override a setting of exp.config for this run (repeatable)."
 }
 
 dry_run=0
+fresh=0
 test_run=0
 protocols_override=""
 for arg in "$@"; do
@@ -23,12 +26,18 @@ for arg in "$@"; do
         --dry-run)
             dry_run=1
             ;;
+        --fresh)
+            fresh=1
+            ;;
         --test)
             test_run=1
             ;;
         --protocols=*)
             protocols_override=$(echo "${arg#*=}" | tr ',' ' ')
             ;;
+        --set=*)
+            config_set_arg "$arg"
+            ;;
         *)
             echo "Unknown parameter: $arg"
             usage
@@ -54,68 +63,89 @@ records=10000 # at least one per thread * DC plus one
 ops_per_thread=0
 
 if [ "$test_run" -eq 1 ]; then
-    original_machine=$(config machine)
-    original_maxexecutiontime=$(config maxexecutiontime)
-    restore_test_settings() {
-        sed -i "s/^machine=.*/machine=${original_machine}/" "${CONFIG_FILE}"
-        sed -i "s/^maxexecutiontime=.*/maxexecutiontime=${original_maxexecutiontime}/" "${CONFIG_FILE}"
-    }
-    trap restore_test_settings EXIT
     nodes=3
     records=1000
     compute_test_machine "${nodes}"
-    sed -i "s/^maxexecutiontime=.*/maxexecutiontime=10/" "${CONFIG_FILE}"
+    config_set maxexecutiontime 10
+    config_set repeat.max 1
 fi
 maxexecutiontime=$(config maxexecutiontime)
 
 if [ "$dry_run" -eq 0 ]; then
     pull_images
-    do_clean_up=0
+    init_ledger ${LOGDIR}/conflict ${fresh}
     for p in ${protocols}
     do
-        # clean prior logs
-        rm -f ${LOGDIR}/conflict/*${p}*
-
+        # clean the logs of incomplete runs
+        prune_logs ${LOGDIR}/conflict "${p}_*"
         if [ "$p" == "accord-cmt" ]; then
-            # For Accord (Committed), restart the server for each theta value so that JMX metrics
-            # (accumulated over the full server lifetime) reflect only that theta's workload.
-            rm -f ${RESULTSDIR}/conflict/accord_cmt_*.txt
+            prune_logs ${RESULTSDIR}/conflict "accord_cmt_*.txt"
+        fi
+    done
 
-            for t in ${thetas}
-            do
+    # Each point is run again in later rounds until its results are stable
+    # (see repeat.py), the protocols in a different order in each round
+    for round in $(seq 1 $(config repeat.max))
+    do
+        for p in $(round_order ${round} ${protocols})
+        do
+            if [ "$p" == "accord-cmt" ]; then
+                # For Accord (Committed), restart the server for each theta value so that JMX metrics
+                # (accumulated over the full server lifetime) reflect only that theta's workload.
+                # The runs of a theta and its breakdown make a single point, run once.
+                if [ "${round}" -gt 1 ]; then
+                    continue
+                fi
+
+                for t in ${thetas}
+                do
+                    point="${p} nodes=${nodes} workload=${workload} threads=${threads// /,} records=${records} theta=${t}"
+                    if point_output "${point}" >/dev/null; then
+                        log "Skipping completed run: ${point}"
+                        continue
+                    fi
+                    do_create_and_load=1
+                    artifacts=()
+                    for c in ${threads}
+                    do
+                        ts=$(date +%Y%m%d%H%M%S%N)
+                        output_file="${LOGDIR}/conflict/${p}_${nodes}_a_${ts}.dat"
+                        # Pass do_clean_up=0 so we can query the cluster for breakdown before stopping
+                        run_benchmark ${p} ${c} ${nodes} ${replication_factor} ${workload_type} ${workload} ${records} $((threads * ops_per_thread)) ${output_file} ${do_create_and_load} 0 -p conflict.theta=${t} -p updateproportion=1.0 -p readproportion=0.0 -p maxexecutiontime=${maxexecutiontime}
+                        artifacts+=("${output_file%.dat}"*)
+                        do_create_and_load=0
+                    done
+
+                    # Collect Accord commit latency breakdown while the server is still running
+                    compute_breakdown ${nodes} accord > ${RESULTSDIR}/conflict/accord_cmt_${t}.txt
+
+                    # Stop the cluster before the next theta
+                    stop_benchmark accord ${nodes}
+                    record_point "${point}" "${output_file}" "${artifacts[@]}" ${RESULTSDIR}/conflict/accord_cmt_${t}.txt
+                done
+            else
                 do_create_and_load=1
-                for c in ${threads}
+                for t in ${thetas}
                 do
-                    ts=$(date +%Y%m%d%H%M%S%N)
-                    output_file="${LOGDIR}/conflict/${p}_${nodes}_a_${ts}.dat"
-                    # Pass do_clean_up=0 so we can query the cluster for breakdown before stopping
-                    run_benchmark ${p} ${c} ${nodes} ${replication_factor} ${workload_type} ${workload} ${records} $((threads * ops_per_thread)) ${output_file} ${do_create_and_load} 0 -p conflict.theta=${t} -p updateproportion=1.0 -p readproportion=0.0 -p maxexecutiontime=${maxexecutiontime}
-                    do_create_and_load=0
+	            for c in ${threads}
+	            do
+	                point="${p} nodes=${nodes} workload=${workload} threads=${c} records=${records} theta=${t}"
+	                if point_done "${point}" ${round}; then
+	                    log "Skipping ${point} in round ${round}"
+	                    continue
+	                fi
+	                ts=$(date +%Y%m%d%H%M%S%N)
+	                output_file="${LOGDIR}/conflict/${p}_${nodes}_a_${ts}.dat"
+	                run_benchmark ${p} ${c} ${nodes} ${replication_factor} ${workload_type} ${workload} ${records} $((threads * ops_per_thread)) ${output_file} ${do_create_and_load} 0 -p conflict.theta=${t} -p updateproportion=1.0 -p readproportion=0.0 -p maxexecutiontime=${maxexecutiontime}
+	                record_point "${point} run=${round}" "${output_file}"
+	                do_create_and_load=0
+	            done
                 done
-
-                # Collect Accord commit latency breakdown while the server is still running
-                compute_breakdown ${nodes} accord > ${RESULTSDIR}/conflict/accord_cmt_${t}.txt
-
-                # Stop the cluster before the next theta
-                stop_benchmark accord ${nodes}
-            done
-        else
-            do_create_and_load=1
-            total=$(( $(echo ${thetas} | wc -w) * $(echo ${threads} | wc -w) ))
-            count=0
-            for t in ${thetas}
-            do
-	        for c in ${threads}
-	        do
-	            do_clean_up=$(( count == total-1 ? 1 : 0 ))
-	            ts=$(date +%Y%m%d%H%M%S%N)
-	            output_file="${LOGDIR}/conflict/${p}_${nodes}_a_${ts}.dat"
-	            run_benchmark ${p} ${c} ${nodes} ${replication_factor} ${workload_type} ${workload} ${records} $((threads * ops_per_thread)) ${output_file} ${do_create_and_load} ${do_clean_up} -p conflict.theta=${t} -p updateproportion=1.0 -p readproportion=0.0 -p maxexecutiontime=${maxexecutiontime}
-	            do_create_and_load=0
-	            count=$((count+1))
-	        done
-            done
-        fi
+                if [ "${do_create_and_load}" -eq 0 ]; then
+                    stop_benchmark ${p} ${nodes}
+                fi
+            fi
+        done
     done
 fi
 
@@ -139,7 +169,7 @@ do
             row = row "," sprintf("%.3f", commit_ms)
             # Percentile columns p51-p100: not available from JMX breakdown
             for (i = 51; i <= 100; i++) row = row ",unknown"
-            row = row ",0,NA,NA,NA,NA"
+            row = row ",0,NA,NA,NA,NA,NA,NA,NA,NA,NA,NA,NA,NA"
             print row
         }' "${cmt_file}" >> ${RESULTSDIR}/conflict.csv
     fi
@@ -6,11 +6,12 @@ source ${DIR}/utils.sh
 source ${DIR}/run_benchmarks.sh
 
 usage() {
-    echo "Usage: $0 [--test] [--fast] [--protocols=LIST] [--ycsb-run-only]"
+    echo "Usage: $0 [--test] [--fast] [--protocols=LIST] [--ycsb-run-only] [--set=KEY=VALUE...]"
     echo "  --test           Use a 60s run time and right-size containers to fit this machine."
     echo "  --fast           Disable slow-motion mode (enabled by default)."
     echo "  --protocols=LIST Override the list of protocols to run (comma-separated)."
     echo "  --ycsb-run-only  Only run YCSB clients, skip DB setup, load and cleanup."
+    echo "  --set=KEY=VALUE  Override a setting of exp.config for this run (repeatable)."
 }
 
 test_run=0
@@ -34,6 +35,9 @@ for arg in "$@"; do
         --protocols=*)
             protocols_override=$(echo "${arg#*=}" | tr ',' ' ')
             ;;
+        --set=*)
+            config_set_arg "$arg"
+            ;;
         *)
             echo "Unknown parameter: $arg"
             usage
@@ -56,13 +60,7 @@ replication_factor=3
 records=4
 threads=1
 
-original_illustration=$(config "illustration")
-restore_settings() {
-    sed -i "s/^illustration=.*/illustration=${original_illustration}/" "${CONFIG_FILE}"
-}
-trap restore_settings EXIT
-
-sed -i "s/^illustration=.*/illustration=true/" "${CONFIG_FILE}"
+config_set illustration true
 
 maxexecutiontime=60
 
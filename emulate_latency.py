@@ -4,12 +4,23 @@ import time
 import math
 import re
 import csv
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from exp_config import load_config
+from tc_state import apply_tc, clear_tc_state, run_in_netns, tc_state_path
+
+config = {}
+
 def debug(msg):
     if config.get("debug", 1):
         timestamp = datetime.now().strftime("%s:%f")
         print(f"[{timestamp}] \033[32m{msg}\033[0m")
+
+def error(msg):
+    timestamp = datetime.now().strftime("%s:%f")
+    print(f"[{timestamp}] \033[31m{msg}\033[0m", file=sys.stderr)
         
 def haversine(lat1, lon1, lat2, lon2):
     R = 6371  # Earth radius in kilometers
@@ -24,26 +35,128 @@ def estimate_latency(distance_km):
     latency_ms = distance_km / speed_of_light_km_per_ms
     return math.floor(latency_ms)
         
-def run_tc(container, cmd):
-    res = container.exec_run(cmd)
-    if res.exit_code != 0:
-        if "qdisc del" in cmd:
-            return
-        raise Exception(f"tc command failed (exit {res.exit_code}): {cmd}\nOutput: {res.output.decode('utf-8')}")
-
-def emulate_latency(num_dcs, nodes_per_dc, dc_locations):
-    if not config.get("latency_simulation", 1):
-        return
-            
+def probe_rtts(container, dst_ips, count=3, backend="exec"):
+    """Ping every IP in *dst_ips* concurrently from the namespace of *container*.
+
+    Returns a dict {ip: min_rtt_ms}; unreachable peers are mapped to None.
+    The minimum RTT is used since netem adds a fixed delay, so any excess
+    over it is queueing noise rather than a wrong topology.
+    """
+    if run_in_netns(container, "command -v ping", backend)[0] != 0:
+        debug(f"ping is missing for container {container.name} (backend {backend}), skipping RTT verification from it.")
+        return {}
+    probes = " ".join(dst_ips)
+    script = (f"for ip in {probes}; do "
+              f"(r=$(ping -n -q -c {count} -i 0.2 -W 2 $ip | tail -n 1); echo \"$ip $r\") & "
+              f"done; wait")
+    _, output = run_in_netns(container, script, backend)
+    rtts = {ip: None for ip in dst_ips}
+    for line in output.decode('utf-8', errors='ignore').splitlines():
+        m = re.match(r"^(\S+) .*= ([\d.]+)/([\d.]+)/", line.strip())
+        if m and m.group(1) in rtts:
+            rtts[m.group(1)] = float(m.group(2))
+    return rtts
+
+def verify_latency(client, containers_info, expected, network_name, report_file=None, backend="exec"):
+    """Measure the RTT between every pair of containers and compare it to *expected*.
+
+    *expected* maps (src_name, dst_name) to the intended RTT in ms.  Every source
+    container probes all its peers at once, and the sources run in parallel.
+    Returns the list of links whose RTT is off by more than latency_tolerance ms.
+    """
+    tolerance = float(config.get("latency_tolerance", 2))
+    ips = {}
+    for _, _, cname, _ in containers_info:
+        c = client.containers.get(cname)
+        ips[cname] = c.attrs['NetworkSettings']['Networks'][network_name]['IPAddress']
+
+    def probe(cname):
+        peers = [ips[dst] for (src, dst) in expected if src == cname]
+        return cname, probe_rtts(client.containers.get(cname), peers, backend=backend)
+
+    measured = {}
+    with ThreadPoolExecutor() as executor:
+        for cname, rtts in executor.map(probe, [cname for _, _, cname, _ in containers_info]):
+            measured[cname] = rtts
+
+    rows = []
+    deviations = []
+    for (src, dst), rtt in sorted(expected.items()):
+        if not measured.get(src):
+            continue
+        got = measured[src].get(ips[dst])
+        deviation = None if got is None else got - rtt
+        status = "ok"
+        if deviation is None or abs(deviation) > tolerance:
+            status = "deviation"
+            deviations.append((src, dst, rtt, got))
+        rows.append((src, dst, rtt, got, deviation, status))
+
+    if report_file:
+        with open(report_file, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["src", "dst", "expected_ms", "measured_ms", "deviation_ms", "status"])
+            for src, dst, rtt, got, deviation, status in rows:
+                writer.writerow([src, dst, rtt,
+                                 "NA" if got is None else f"{got:.3f}",
+                                 "NA" if deviation is None else f"{deviation:.3f}",
+                                 status])
+        debug(f"RTT verification report written to {report_file}.")
+
+    for src, dst, rtt, got in deviations:
+        measured_str = "unreachable" if got is None else f"{got:.3f}ms"
+        print(f"RTT between '{src}' and '{dst}' is {measured_str}, expected {rtt}ms (tolerance {tolerance}ms).")
+    debug(f"Verified {len(rows)} link(s), {len(deviations)} deviation(s).")
+    return deviations
+
+def rack_of(k, nodes_per_dc):
+    """Rack (1-based) of the k-th node of a DC; by default every node has its own rack."""
+    racks_per_dc = int(config.get("racksperdc", 0) or nodes_per_dc)
+    return (k - 1) % racks_per_dc + 1
+
+def local_link(k1, k2, nodes_per_dc):
+    """Return the (one-way delay in ms, rate) tier between two nodes of the same DC.
+
+    A remote client (k == 0) placed in a DC reaches its replicas across racks.
+    """
+    if k1 and k2 and rack_of(k1, nodes_per_dc) == rack_of(k2, nodes_per_dc):
+        delay = config.get("network.intra_rack_delay", 0)
+    else:
+        delay = config.get("network.inter_rack_delay", 0)
+    return float(delay or 0), config.get("network.intra_dc_rate", "") or None
+
+def client_locations(locations, num_dcs):
+    """Locations of the remote YCSB clients (ycsb.client_placement=remote), else [].
+
+    They are taken from ycsb.client_locations (names from latencies.csv) and
+    default to the locations of the replicas.
+    """
+    if config.get("ycsb.client_placement", "colocated") != "remote":
+        return []
+    names = [n.strip() for n in str(config.get("ycsb.client_locations", "")).split(",") if n.strip()]
+    if not names:
+        return locations[:num_dcs]
+    by_name = {loc: (lat, lon, loc) for lat, lon, loc in locations}
+    return [by_name[n] for n in names]
+
+def emulate_latency(num_dcs, nodes_per_dc, dc_locations, report_file=None, clients=()):
+    """Install the WAN delays, then verify them; returns False when the run must fail.
+
+    *clients* lists the locations of the remote YCSB clients: the j-th one runs
+    in the namespace of container ycsb-<j>-ns and gets an access latency to
+    every replica (no rule between two clients).
+    """
     client = docker.from_env()
     network_name = config["network_name"]
+    backend = config.get("latency_backend", "exec")
 
+    prefix = config.get("container_prefix", "")
     containers_info = []
     global_idx = 0
     for i in range(num_dcs):
         _, _, dc_name = dc_locations[i]
         for k in range(1, nodes_per_dc + 1):
-            container_name = f"{dc_name}{k}"
+            container_name = f"{prefix}{dc_name}{k}"
             try:
                 client.containers.get(container_name)
             except docker.errors.NotFound:
@@ -57,81 +170,108 @@ def emulate_latency(num_dcs, nodes_per_dc, dc_locations):
             containers_info.append((i, k, container_name, global_idx))
             global_idx += 1
 
+    # Remote clients are endpoints with k == 0, at a replica DC or at a location of their own
+    dc_locations = list(dc_locations)
+    for j, location in enumerate(clients, start=1):
+        container_name = f"{prefix}ycsb-{j}-ns"
+        try:
+            client.containers.get(container_name)
+        except docker.errors.NotFound:
+            debug(f"Client namespace '{container_name}' not found. Skipping.")
+            continue
+        if location not in dc_locations:
+            dc_locations.append(location)
+        containers_info.append((dc_locations.index(location), 0, container_name, global_idx))
+        global_idx += 1
+
+    # The rules of a former deployment are gone with its containers
+    for _, _, cname, _ in containers_info:
+        clear_tc_state(cname)
+    if not config.get("latency_simulation", 1):
+        return True
+
     total_containers = len(containers_info)
     if total_containers == 0:
         debug("No active database containers found for latency emulation.")
-        return
+        return True
 
+    # Intended round-trip time (in ms) for every ordered pair of containers.
+    expected = {}
     try:
-        priomap = " ".join(["0"] * 16)
+        ips = {}
+        states = {}
         for _, _, cname, _ in containers_info:
             c = client.containers.get(cname)
-            if c.exec_run("tc -help").exit_code != 0:
+            if backend == "exec" and c.exec_run("tc -help").exit_code != 0:
                 raise Exception(f"tc is missing in container {cname}!")
-            run_tc(c, "tc qdisc del dev eth0 root")
-            run_tc(c, f"tc qdisc add dev eth0 root handle 1: prio bands {total_containers + 1} priomap {priomap}")
+            ips[cname] = c.attrs['NetworkSettings']['Networks'][network_name]['IPAddress']
+            states[cname] = {"container": cname, "dev": "eth0", "links": []}
 
-        # Add specific latencies based on geographical distances between different DCs
+        # Add specific latencies based on geographical distances between different DCs,
+        # and the configured rack tiers between the nodes of a same DC
+        wan_rate = config.get("network.inter_dc_rate", "") or None
         for idx1 in range(total_containers):
             dc1, k1, src_name, _ = containers_info[idx1]
             lat1, lon1, _ = dc_locations[dc1]
-            src_container = client.containers.get(src_name)
 
             for idx2 in range(idx1 + 1, total_containers):
                 dc2, k2, dst_name, _ = containers_info[idx2]
-                if dc1 == dc2:
-                    # Intra-DC latency is negligible (~0ms, no tc rule needed)
+                if k1 == 0 and k2 == 0:
+                    # Clients do not talk to each other
                     continue
+                if dc1 == dc2:
+                    latency, rate = local_link(k1, k2, nodes_per_dc)
+                    expected[(src_name, dst_name)] = expected[(dst_name, src_name)] = 2 * latency
+                    if latency == 0 and rate is None:
+                        # No intra-DC tier configured (~0ms, no tc rule needed)
+                        continue
+                    where = "rack" if k1 and k2 and rack_of(k1, nodes_per_dc) == rack_of(k2, nodes_per_dc) else "DC"
+                    debug(f"Adding {latency}ms intra-{where} latency between '{src_name}' and '{dst_name}' (rate: {rate or 'unlimited'}).")
+                else:
+                    lat2, lon2, _ = dc_locations[dc2]
+                    distance = haversine(lat1, lon1, lat2, lon2)
+                    latency = estimate_latency(distance)
+                    rate = wan_rate
+                    expected[(src_name, dst_name)] = expected[(dst_name, src_name)] = 2 * latency
+                    debug(f"Adding {latency}ms ping latency between '{src_name}' and '{dst_name}' (distance: {distance:.2f} km).")
 
-                lat2, lon2, _ = dc_locations[dc2]
-                distance = haversine(lat1, lon1, lat2, lon2)
-                latency = estimate_latency(distance)
-                dst_container = client.containers.get(dst_name)
-
-                dst_ip = dst_container.attrs['NetworkSettings']['Networks'][network_name]['IPAddress']
-                src_ip = src_container.attrs['NetworkSettings']['Networks'][network_name]['IPAddress']
-
-                dst_band = idx2 + 2
-                src_band = idx1 + 2
-
-                # Add latency from src to dst
-                run_tc(src_container, f"tc qdisc add dev eth0 parent 1:{dst_band:x} handle {dst_band:x}0: netem delay {latency}ms")
-                run_tc(src_container, f"tc filter add dev eth0 protocol ip parent 1:0 prio 1 u32 match ip dst {dst_ip} flowid 1:{dst_band:x}")
+                # Add latency from src to dst, and from dst to src
+                states[src_name]["links"].append({"peer": dst_name, "dst": ips[dst_name], "delay_ms": latency, "rate": rate})
+                states[dst_name]["links"].append({"peer": src_name, "dst": ips[src_name], "delay_ms": latency, "rate": rate})
 
-                # Add latency from dst to src
-                run_tc(dst_container, f"tc qdisc add dev eth0 parent 1:{src_band:x} handle {src_band:x}0: netem delay {latency}ms")
-                run_tc(dst_container, f"tc filter add dev eth0 protocol ip parent 1:0 prio 1 u32 match ip dst {src_ip} flowid 1:{src_band:x}")
+        # One tc batch per container, the containers being configured in parallel
+        def apply(cname):
+            apply_tc(client.containers.get(cname), states[cname], backend)
+            return cname
 
-                debug(f"Added {latency}ms ping latency between '{src_name}' and '{dst_name}' (distance: {distance:.2f} km).")
+        with ThreadPoolExecutor() as executor:
+            for cname in executor.map(apply, states):
+                debug(f"Applied {len(states[cname]['links'])} tc link(s) on '{cname}' (state in {tc_state_path(cname)}).")
 
     except Exception as e:
-        print(f"Error adding latency: {e}")
+        # Measuring without the emulation would compare the protocols on a LAN
+        error(f"Error adding latency: {e}")
+        return False
+
+    mode = str(config.get("latency_verification", "report"))
+    if mode in ("0", "off", "false"):
+        return True
+    deviations = verify_latency(client, containers_info, expected, network_name, report_file, backend)
+    if deviations and mode == "fail":
+        error(f"Latency emulation does not match the intended matrix ({len(deviations)} link(s) off).")
+        return False
+    return True
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python3 emulate_latency.py <num_dcs> [nodes_per_dc]")
+        print("Usage: python3 emulate_latency.py <num_dcs> [nodes_per_dc] [report_file]")
         sys.exit(1)
 
-    config = {}
-    with open('exp.config', 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-            if '=' in line:
-                key, value = line.split('=', 1)
-                value = value.strip()
-                try:
-                    value = int(value)
-                except ValueError:
-                    try:
-                        value = float(value)
-                    except ValueError:
-                        pass
-                config[key.strip()] = value
+    config = load_config()
 
     num_dcs = int(sys.argv[1])
     nodes_per_dc = int(sys.argv[2]) if len(sys.argv) > 2 else int(config.get("nodesperdc", 1))
+    report_file = sys.argv[3] if len(sys.argv) > 3 else None
 
     locations = []
     with open('latencies.csv', newline='') as csvfile:
@@ -143,4 +283,6 @@ if __name__ == "__main__":
             locations.append((lat, lon, loc))
 
     dc_locations = locations[:num_dcs]
-    emulate_latency(num_dcs, nodes_per_dc, dc_locations)
+    if not emulate_latency(num_dcs, nodes_per_dc, dc_locations, report_file,
+                           clients=client_locations(locations, num_dcs)):
+        sys.exit(1)
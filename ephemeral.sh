@@ -13,24 +13,33 @@ source ${DIR}/utils.sh
 source ${DIR}/run_benchmarks.sh
 
 usage() {
-    echo "Usage: $0 [--dry-run] [--test] [--protocols=LIST]"
+    echo "Usage: $0 [--dry-run] [--fresh] [--test] [--protocols=LIST] [--set=KEY=VALUE...]"
     echo "  --dry-run        Skip the experiment run; only draw plots using existing data."
+    echo "  --fresh          Discard the completed runs instead of resuming the sweep."
     echo "  --test           Use a 60s run time and right-size containers to fit this machine."
     echo "  --protocols=LIST Accepted for compatibility; ignored (experiment always uses accord)."
+    echo "  --set=KEY=VALUE  Override a setting of exp.config for this run (repeatable)."
 }
 
 dry_run=0
+fresh=0
 test_run=0
 for arg in "$@"; do
     case "$arg" in
         --dry-run)
             dry_run=1
             ;;
+        --fresh)
+            fresh=1
+            ;;
         --test)
             test_run=1
             ;;
         --protocols=*)
             ;;
+        --set=*)
+            config_set_arg "$arg"
+            ;;
         *)
             echo "Unknown parameter: $arg"
             usage
@@ -50,33 +59,23 @@ records=1000
 threads=50
 ops_per_thread=0
 
-# Helper to update accord.ephemeral_read_enabled in exp.config
+# Helper to override accord.ephemeral_read_enabled for the next deployments
 set_ephemeral_read() {
     local value=$1
-    sed -i "s/^accord\.ephemeral_read_enabled=.*/accord.ephemeral_read_enabled=${value}/" ${CONFIG_FILE}
-}
-
-# Save original ephemeral setting, machine, and maxexecutiontime; restore all on exit
-original_ephemeral=$(config "accord.ephemeral_read_enabled")
-original_machine=$(config machine)
-original_maxexecutiontime=$(config maxexecutiontime)
-restore_config() {
-    set_ephemeral_read "${original_ephemeral:-true}"
-    sed -i "s/^machine=.*/machine=${original_machine}/" "${CONFIG_FILE}"
-    sed -i "s/^maxexecutiontime=.*/maxexecutiontime=${original_maxexecutiontime}/" "${CONFIG_FILE}"
+    config_set accord.ephemeral_read_enabled "${value}"
 }
-trap restore_config EXIT
 
 if [ "$test_run" -eq 1 ]; then
     nodes=3
     records=1000
     compute_test_machine "${nodes}"
-    sed -i "s/^maxexecutiontime=.*/maxexecutiontime=10/" "${CONFIG_FILE}"
+    config_set maxexecutiontime 10
 fi
 maxexecutiontime=$(config maxexecutiontime)
 
 if [ "$dry_run" -eq 0 ]; then
     pull_images
+    init_ledger ${LOGDIR}/ephemeral ${fresh}
     total=$(echo ${workloads} | wc -w)
 
     # --- Run with ephemeral reads ENABLED ---
@@ -85,17 +84,23 @@ if [ "$dry_run" -eq 0 ]; then
     # Note: run_benchmark appends _<dc>.dat per YCSB client, so the variable
     # below is only the base template passed to run_benchmark.
     set_ephemeral_read "true"
-    rm -f ${LOGDIR}/ephemeral/accord_*
+    prune_logs ${LOGDIR}/ephemeral "accord_*"
     do_create_and_load=1
     count=0
     for w in ${workloads}
     do
         do_clean_up=$(( count == total-1 ? 1 : 0 ))
+        count=$((count+1))
+        point="accord nodes=${nodes} workload=${w} threads=${threads} records=${records}"
+        if point_output "${point}" >/dev/null; then
+            log "Skipping completed run: ${point}"
+            continue
+        fi
         ts=$(date +%Y%m%d%H%M%S%N)
         output_file="${LOGDIR}/ephemeral/accord_${nodes}_${w}_${ts}.dat"
         run_benchmark ${protocol} ${threads} ${nodes} ${replication_factor} ${workload_type} ${w} ${records} $((threads * ops_per_thread)) ${output_file} ${do_create_and_load} ${do_clean_up} -p maxexecutiontime=${maxexecutiontime}
+        record_point "${point}" "${output_file}"
         do_create_and_load=0
-        count=$((count+1))
     done
 
     # --- Run with ephemeral reads DISABLED ---
@@ -104,17 +109,23 @@ if [ "$dry_run" -eq 0 ]; then
     # Note: run_benchmark appends _<dc>.dat per YCSB client, so the variable
     # below is only the base template passed to run_benchmark.
     set_ephemeral_read "false"
-    rm -f ${LOGDIR}/ephemeral/accord-noephem_*
+    prune_logs ${LOGDIR}/ephemeral "accord-noephem_*"
     do_create_and_load=1
     count=0
     for w in ${workloads}
     do
         do_clean_up=$(( count == total-1 ? 1 : 0 ))
+        count=$((count+1))
+        point="accord-noephem nodes=${nodes} workload=${w} threads=${threads} records=${records}"
+        if point_output "${point}" >/dev/null; then
+            log "Skipping completed run: ${point}"
+            continue
+        fi
         ts=$(date +%Y%m%d%H%M%S%N)
         output_file="${LOGDIR}/ephemeral/accord-noephem_${nodes}_${w}_${ts}.dat"
         run_benchmark ${protocol} ${threads} ${nodes} ${replication_factor} ${workload_type} ${w} ${records} $((threads * ops_per_thread)) ${output_file} ${do_create_and_load} ${do_clean_up} -p maxexecutiontime=${maxexecutiontime}
+        record_point "${point}" "${output_file}"
         do_create_and_load=0
-        count=$((count+1))
     done
 fi
 
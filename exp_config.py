@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Layered configuration of the experiments.
+
+A setting is resolved, from the lowest to the highest priority, from:
+  1. defaults.config, next to this file;
+  2. the experiment configuration, exp.config (or the file named by EXP_CONFIG);
+  3. the environment: EXP_CFG_<key>, with the dots of the key written as "__"
+     (e.g., EXP_CFG_cockroachdb__fix_lease_holder=true).  The experiment scripts
+     set these with config_set (utils.sh) or their --set=<key>=<value> flag.
+A setting given with an empty value (e.g., "load.partitions=" or an empty
+EXP_CFG_load__partitions) is empty, whatever the lower layers say.  config()
+in utils.sh follows the same rules, so the bash and Python readers agree.
+
+Usage: python3 exp_config.py get <key>
+       python3 exp_config.py dump
+
+`dump` prints the resolved configuration, as run_benchmark records it next to
+the logs of every run.
+"""
+
+import os
+import sys
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULTS_FILE = os.path.join(DIR, "defaults.config")
+ENV_PREFIX = "EXP_CFG_"
+
+
+def config_file():
+    return os.environ.get("EXP_CONFIG", os.path.join(DIR, "exp.config"))
+
+
+def read_config_file(path):
+    """Raw (string) settings of *path*."""
+    settings = {}
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if '=' in line:
+                key, value = line.split('=', 1)
+                settings[key.strip()] = value.strip()
+    return settings
+
+
+def env_overrides():
+    return {name[len(ENV_PREFIX):].replace("__", "."): value
+            for name, value in os.environ.items() if name.startswith(ENV_PREFIX)}
+
+
+def resolve():
+    """The raw (string) settings, once the layers are merged."""
+    settings = {}
+    if os.path.exists(DEFAULTS_FILE):
+        settings.update(read_config_file(DEFAULTS_FILE))
+    settings.update(read_config_file(config_file()))
+    settings.update(env_overrides())
+    return settings
+
+
+def load_config():
+    """The resolved settings, cast to int or float when possible."""
+    config = {}
+    for key, value in resolve().items():
+        try:
+            value = int(value)
+        except ValueError:
+            try:
+                value = float(value)
+            except ValueError:
+                pass
+        config[key] = value
+    return config
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "get":
+        print(resolve().get(sys.argv[2], ""))
+    elif len(sys.argv) == 2 and sys.argv[1] == "dump":
+        for key, value in sorted(resolve().items()):
+            print(f"{key}={value}")
+    else:
+        print(f"Usage: {sys.argv[0]} get <key> | dump")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
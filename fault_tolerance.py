@@ -3,7 +3,7 @@
 Fault-tolerance experiment plotter.
 
 Parses YCSB -s status output lines from log files produced by fault-tolerance.sh
-and generates a throughput-over-time TikZ/pgfplots figure with one curve per protocol.
+(or, when present, their time series, see timeseries.py) and generates a throughput-over-time TikZ/pgfplots figure with one curve per protocol.
 
 Usage:
     python3 fault_tolerance.py <logdir> <protocol1> [protocol2 ...] \
@@ -13,6 +13,7 @@ Usage:
 import sys
 import os
 import re
+import csv
 import glob
 from collections import defaultdict
 
@@ -44,6 +45,23 @@ def parse_status_lines(logfile):
     return results
 
 
+def parse_time_series(ts_file):
+    """
+    Parse the time series of a client (<client>.ts.csv, see timeseries.py).
+
+    Returns a list of (elapsed_seconds, current_ops_per_sec) tuples, one per
+    status line (the series has one row per operation type of the line).
+    """
+    results = {}
+    try:
+        with open(ts_file, newline="") as f:
+            for row in csv.DictReader(f):
+                results.setdefault(int(row["elapsed_s"]), float(row["ops_per_s"]))
+    except (OSError, KeyError, ValueError):
+        pass
+    return sorted(results.items())
+
+
 def main():
     # Expect: logdir protocol1 [protocol2 ...] duration_s slowdown_s slowdown_end_s crash_s output.tex
     if len(sys.argv) < 8:
@@ -68,14 +86,20 @@ def main():
     # Collect per-protocol aggregated throughput series
     protocol_data = {}
     for protocol in protocols:
+        ts_files = glob.glob(os.path.join(logdir, f"{protocol}_*.ts.csv"))
         dat_files = glob.glob(os.path.join(logdir, f"{protocol}_*.dat"))
-        if not dat_files:
+        if not ts_files and not dat_files:
             print(f"Warning: no .dat files found for protocol '{protocol}' in {logdir}")
             continue
         throughput_by_time = defaultdict(float)
-        for f in dat_files:
-            for elapsed, ops in parse_status_lines(f):
-                throughput_by_time[elapsed] += ops
+        if ts_files:
+            for f in ts_files:
+                for elapsed, ops in parse_time_series(f):
+                    throughput_by_time[elapsed] += ops
+        else:
+            for f in dat_files:
+                for elapsed, ops in parse_status_lines(f):
+                    throughput_by_time[elapsed] += ops
         if throughput_by_time:
             times = sorted(throughput_by_time.keys())
             protocol_data[protocol] = (times, [throughput_by_time[t] for t in times])
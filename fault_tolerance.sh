@@ -13,13 +13,16 @@ source ${DIR}/utils.sh
 source ${DIR}/run_benchmarks.sh
 
 usage() {
-    echo "Usage: $0 [--dry-run] [--test] [--protocols=LIST]"
+    echo "Usage: $0 [--dry-run] [--fresh] [--test] [--protocols=LIST] [--set=KEY=VALUE...]"
     echo "  --dry-run        Skip the experiment run; only draw plots using existing data."
+    echo "  --fresh          Discard the completed runs instead of resuming the sweep."
     echo "  --test           Use a 120s run time and right-size containers to fit this machine."
     echo "  --protocols=LIST Override the list of protocols to run (comma-separated)."
+    echo "  --set=KEY=VALUE  Override a setting of exp.config for this run (repeatable)."
 }
 
 dry_run=0
+fresh=0
 test_run=0
 protocols_override=""
 for arg in "$@"; do
@@ -27,12 +30,18 @@ for arg in "$@"; do
         --dry-run)
             dry_run=1
             ;;
+        --fresh)
+            fresh=1
+            ;;
         --test)
             test_run=1
             ;;
         --protocols=*)
             protocols_override=$(echo "${arg#*=}" | tr ',' ' ')
             ;;
+        --set=*)
+            config_set_arg "$arg"
+            ;;
         *)
             echo "Unknown parameter: $arg"
             usage
@@ -58,20 +67,9 @@ records=10000
 threads=100
 status_interval=1   # YCSB -s reporting interval in seconds
 
-original_machine=$(config machine)
-original_maxexecutiontime=$(config maxexecutiontime)
-original_fix_lh=$(config "cockroachdb.fix_lease_holder")
-restore_settings() {
-    sed -i "s/^machine=.*/machine=${original_machine}/" "${CONFIG_FILE}"
-    sed -i "s/^maxexecutiontime=.*/maxexecutiontime=${original_maxexecutiontime}/" "${CONFIG_FILE}"
-    sed -i "s/^cockroachdb\.fix_lease_holder=.*/cockroachdb.fix_lease_holder=${original_fix_lh}/" "${CONFIG_FILE}"
-}
-trap restore_settings EXIT
-
 if [ "$test_run" -eq 1 ]; then
     nodes=3
     duration_minutes=3
-    original_machine=$(config machine)
     compute_test_machine "${nodes}"
 fi
 
@@ -86,23 +84,31 @@ log "  Crash (SIGWAIT the leader) at ${crash_s}s"
 
 if [ "$dry_run" -eq 0 ]; then
     pull_images
+    init_ledger ${LOGDIR}/fault_tolerance ${fresh}
     for protocol in ${protocols}; do
 
 	# if needed set a single lease at the optimal location
 	if [[ "$protocol" == cockroachdb* ]]; then
 	    if [[ "$protocol" == cockroachdb-opt ]]; then
 		log "Cockroachdb-opt detected, will pin lease holder."
-		sed -i "s/^cockroachdb\.fix_lease_holder=.*/cockroachdb.fix_lease_holder=true/" "${CONFIG_FILE}"
+		config_set cockroachdb.fix_lease_holder true
 	    else
-		sed -i "s/^cockroachdb\.fix_lease_holder=.*/cockroachdb.fix_lease_holder=false/" "${CONFIG_FILE}"
+		config_set cockroachdb.fix_lease_holder false
 	    fi
 	fi
 
-        # clean prior logs
-        rm -f ${LOGDIR}/fault_tolerance/*${protocol}*
+        # clean the logs of incomplete runs
+        prune_logs ${LOGDIR}/fault_tolerance "${protocol}_*"
+
+        point="${protocol} nodes=${nodes} workload=${workload} threads=${threads} records=${records} duration=${duration_s}"
+        if point_output "${point}" >/dev/null; then
+            log "Skipping completed run: ${point}"
+            continue
+        fi
         
         ts=$(date +%Y%m%d%H%M%S%N)
         output_file="${LOGDIR}/fault_tolerance/${protocol}_${nodes}_${workload}_${ts}.dat"
+        save_run_config "${output_file}"
 
         # Determine cluster prefix
         pref=cassandra
@@ -129,25 +135,23 @@ if [ "$dry_run" -eq 0 ]; then
         fi
 
         # Load YCSB data
-        # Load YCSB data
-        location1=$(get_location 1 ${DIR}/latencies.csv)
-        nearby_database="${location1}1"
-        run_ycsb "load" "${workload_type}" "${workload}" "${hosts}" "${port}" \
-            "${records}" "${records}" "${protocol}" "${replication_factor}" \
-            "${output_file%.dat}.load" "1" "ycsb" "${nearby_database}"
-        wait_container "ycsb"
+        load_dataset "${workload_type}" "${workload}" "${hosts}" "${port}" \
+            "${records}" "${protocol}" "${replication_factor}" \
+            "${output_file%.dat}.load" "1" "${node_count}"
 
         # Emulate WAN latency
         log "Emulating latency for ${node_count} node(s)..."
-        emulate_latency "${node_count}"
+        emulate_latency "${node_count}" "" "${output_file%.dat}_rtt.csv"
+
+        start_telemetry "${output_file}" "${pref}"
 
         # Start YCSB run clients from each node (time-bounded via maxexecutiontime)
         for i in $(seq 1 ${node_count}); do
             location=$(get_location $i ${DIR}/latencies.csv)
-            nearby_database="${location}1"
+            nearby_database="${PREFIX}${location}1"
             run_ycsb "run" "${workload_type}" "${workload}" "${hosts}" "${port}" \
                 "${records}" 0 "${protocol}" "${replication_factor}" \
-                "${output_file%.dat}_${location}.dat" "${threads}" "ycsb-${i}" "${nearby_database}" \
+                "${output_file%.dat}_${location}.dat" "${threads}" "${PREFIX}ycsb-${i}" "${nearby_database}" \
                 -p maxexecutiontime=${duration_s} \
                 -p status.interval=${status_interval} \
 		-p conflict.theta=${theta} -p updateproportion=1.0 -p readproportion=0.0 -p conflict.shift=$(( (records / node_count) * (i - 1) ))\
@@ -167,22 +171,18 @@ if [ "$dry_run" -eq 0 ]; then
         # Event 1: at X/4, add 400ms latency to (some) leader outbound traffic
         sleep ${slowdown_s}
 	wait $leader_pid; leader=$(cat "$tmp_file"); rm "$tmp_file"
-        # Save the leader's current tc policies before injecting the slowdown so
-        # they can be restored when the slowdown disappears.
-        docker exec "${leader}" bash -c \
-            "tc qdisc show dev eth0 > /tmp/tc_qdisc_save.txt && \
-             tc filter show dev eth0 2>/dev/null > /tmp/tc_filter_save.txt" \
+        # Checkpoint the leader's tc policies (recorded on the host by
+        # emulate_latency) so that they can be rolled back when the slowdown ends.
+        python3 ${DIR}/tc_state.py save "${leader}" \
             || log "Warning: failed to save tc policies for ${leader}; restore after slowdown may be incomplete"
         log "Event 1 @ ${slowdown_s}s: Adding 400ms latency to ${leader}"
-        docker exec "${leader}" tc qdisc del dev eth0 root 2>/dev/null || true
-        docker exec "${leader}" tc qdisc add dev eth0 root netem delay 400ms
+        python3 ${DIR}/tc_state.py swap "${leader}" 400
 
         # Event 1b: at X/4+X/8, remove the slowdown from leader and restore the
         # tc policies that were in effect before the slowdown was injected.
         sleep ${slowdown_end_s}
         log "Event 1b @t1 = t0 + ${slowdown_end_s}s: Removing slowdown from ${leader} and restoring tc policies"
-        docker exec "${leader}" tc qdisc del dev eth0 root 2>/dev/null || true
-        python3 ${DIR}/restore_tc.py "${leader}"
+        python3 ${DIR}/tc_state.py rollback "${leader}"
 
         # Event 2: at 3X/4, suspend leader (to mimick an actual crash)
         sleep ${crash_s}
@@ -191,12 +191,17 @@ if [ "$dry_run" -eq 0 ]; then
 
         # Wait for all YCSB clients to complete
         for i in $(seq 1 ${node_count}); do
-            wait_container "ycsb-${i}"
+            wait_container "${PREFIX}ycsb-${i}"
         done
+        stop_telemetry "${output_file}" "${pref}"
+        if [ "$(config gc.logging)" == "true" ]; then
+            python3 ${DIR}/gc_analysis.py run "${output_file}"
+        fi
 
         # Cleanup
         ${pref}_cleanup_cluster >/dev/null 2>&1 || true
         stop_network
+        record_point "${point}" "${output_file}"
 
     done
 fi
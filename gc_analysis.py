@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""GC and safepoint pauses of the JVMs of a run, and the latencies they explain.
+
+With gc.logging, the JVMs log their GC pauses and safepoints (unified logging,
+JDK 9+) with wall-clock timestamps:
+  - a Cassandra node into logs/gc/<node>.<start time>.gc.log, bind-mounted, so
+    that the log outlives the container and covers all the runs of the
+    deployment (teardown.py removes it with the node);
+  - a YCSB client into <run>_<dc>.gc.log, next to its .dat log.
+After a run, `run` collects the pauses of all these JVMs during the run (the
+span of the time series of its clients, see timeseries.py) and writes:
+    <run>_gc_pauses.csv   every pause: jvm, role, kind (gc or safepoint),
+                          end time, duration and cause;
+    <run>_gc.csv          the distribution of the pauses of each JVM;
+    <run>_gc_overlap.csv  for every status interval of every client, its p99
+                          latency and how long the client itself, its
+                          coordinator (the first node of its DC) and its
+                          quorum were paused during it.
+Only the nodes of the current deployment of the experiment (container_prefix)
+are accounted for.  Every node is a replica of every key (the keyspace has
+nodesperdc replicas in each DC), so a quorum of the N nodes, N // 2 + 1 of
+them, is paused as long as the (N // 2 + 1)-th least paused node is.
+An interval is flagged when it overlaps a pause, and is an outlier when its
+p99 latency exceeds gc.outlier_factor times the median one of the client.
+YCSB reports no per-operation timestamps, so the operations are accounted for
+by the interval (ycsb.status_interval) in which they completed.
+
+Usage: python3 gc_analysis.py options <log_file>
+       python3 gc_analysis.py run <output_file>
+
+`options` prints the JVM options logging into <log_file> (a path in the
+container).
+"""
+
+import csv
+import glob
+import os
+import re
+import statistics
+import sys
+from collections import defaultdict
+from datetime import datetime
+import docker
+from exp_config import load_config
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+# Logs of the nodes on the host, and in their containers
+NODE_LOG_DIR = os.path.join(DIR, "logs", "gc")
+CONTAINER_LOG_DIR = "/gclogs"
+# No wildcard in the tags, as the entrypoints expand JVM_OPTS unquoted
+XLOG = "-Xlog:gc=info,safepoint=info:file={}:time,uptime,level,tags:filecount=5,filesize=20m"
+
+TIME = re.compile(r"^\[(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}[+-]\d{4})\]")
+GC_PAUSE = re.compile(r"\[gc\s*\] GC\(\d+\) (Pause.*?) (?:\d+[KMG]->\d+[KMG]\(\d+[KMG]\) )?([\d.]+)ms\s*$")
+# JDK 17+, and JDK 9 to 16
+SAFEPOINT = re.compile(r"\[safepoint\s*\] Safepoint \"([^\"]+)\".*?Total: (\d+) ns")
+STOPPED = re.compile(r"\[safepoint\s*\] Total time for which application threads were stopped: ([\d.]+) seconds")
+
+config = {}
+
+
+def debug(msg):
+    if config.get("debug", 1):
+        timestamp = datetime.now().strftime("%s:%f")
+        print(f"[{timestamp}] \033[32m{msg}\033[0m", file=sys.stderr)
+
+
+def jvm_options(log_file):
+    return XLOG.format(log_file)
+
+
+def node_volume():
+    """Bind mount of the GC logs of the nodes."""
+    os.makedirs(NODE_LOG_DIR, exist_ok=True)
+    # The nodes do not run as the user of the host
+    os.chmod(NODE_LOG_DIR, 0o777)
+    return f"{NODE_LOG_DIR}:{CONTAINER_LOG_DIR}"
+
+
+def node_logs(name):
+    return glob.glob(os.path.join(NODE_LOG_DIR, f"{glob.escape(name)}.*.gc.log*"))
+
+
+def deployment_nodes(prefix):
+    """Names of the running nodes of the experiment of *prefix* (see teardown.py)."""
+    containers = docker.from_env().containers.list(
+        filters={"label": [f"exp.owner={prefix or 'default'}", "exp.role=node"]})
+    return sorted(c.name for c in containers)
+
+
+def remove_node_logs(names):
+    """Remove the GC logs of the nodes *names*, so that a later deployment starts afresh."""
+    for name in names:
+        for path in node_logs(name):
+            os.remove(path)
+
+
+def parse_pauses(path):
+    """[(kind, end time, duration in s, cause)] of the GC log *path*."""
+    pauses = []
+    with open(path, errors="replace") as f:
+        for line in f:
+            m = TIME.match(line)
+            if not m:
+                continue
+            end = datetime.strptime(m.group(1), "%Y-%m-%dT%H:%M:%S.%f%z").timestamp()
+            pause = GC_PAUSE.search(line)
+            if pause:
+                pauses.append(("gc", end, float(pause.group(2)) / 1e3, pause.group(1)))
+                continue
+            safepoint = SAFEPOINT.search(line)
+            if safepoint:
+                pauses.append(("safepoint", end, int(safepoint.group(2)) / 1e9, safepoint.group(1)))
+                continue
+            stopped = STOPPED.search(line)
+            if stopped:
+                pauses.append(("safepoint", end, float(stopped.group(1)), ""))
+    return pauses
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered))) - 1))]
+
+
+def client_intervals(base):
+    """{dc: {elapsed: (wall time, p99 in us)}} of the clients of the run *base*."""
+    intervals = defaultdict(dict)
+    for path in glob.glob(f"{glob.escape(base)}_*.ts.csv"):
+        dc = path[len(base) + 1:-len(".ts.csv")]
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                try:
+                    elapsed, wall_time = int(row["elapsed_s"]), float(row["wall_time"])
+                    p99 = float(row["p99_us"]) if row["p99_us"] else 0.0
+                except (KeyError, ValueError):
+                    continue
+                previous = intervals[dc].get(elapsed, (wall_time, 0.0))[1]
+                intervals[dc][elapsed] = (wall_time, max(previous, p99))
+    return intervals
+
+
+def overlap(pauses, start, end):
+    """Time (s) *pauses*, [(end time, duration)], overlap [*start*, *end*]."""
+    return sum(max(0.0, min(e, end) - max(e - d, start)) for e, d in pauses)
+
+
+def analyse(output_file):
+    base = output_file[:-len(".dat")] if output_file.endswith(".dat") else output_file
+    interval = float(config.get("ycsb.status_interval", 1))
+    intervals = client_intervals(base)
+    wall_times = [w for dc in intervals.values() for w, _ in dc.values()]
+    if not wall_times:
+        debug(f"No time series for {output_file}, no GC analysis.")
+        return
+    start, end = min(wall_times) - interval, max(wall_times)
+
+    prefix = str(config.get("container_prefix", ""))
+    nodes = deployment_nodes(prefix)
+    logs = [(path, "node") for node in nodes for path in node_logs(node)]
+    logs += [(path, "client") for path in glob.glob(f"{glob.escape(base)}_*.gc.log*")]
+    # {jvm: (role, [(kind, end time, duration, cause)])}
+    jvms = {}
+    for path, role in logs:
+        name = os.path.basename(path)
+        jvm = name.split(".")[0] if role == "node" else name[len(os.path.basename(base)) + 1:name.index(".gc.log")]
+        pauses = [p for p in parse_pauses(path) if p[1] >= start and p[1] - p[2] <= end]
+        jvms.setdefault(jvm, (role, []))[1].extend(pauses)
+
+    with open(f"{base}_gc_pauses.csv", "w") as f:
+        f.write("jvm,role,kind,end_time,duration_ms,cause\n")
+        for jvm, (role, pauses) in sorted(jvms.items()):
+            for kind, pause_end, duration, cause in sorted(pauses, key=lambda p: p[1]):
+                f.write(f"{jvm},{role},{kind},{pause_end:.3f},{duration * 1e3:.3f},\"{cause}\"\n")
+
+    with open(f"{base}_gc.csv", "w") as f:
+        f.write("jvm,role,kind,pauses,total_ms,p50_ms,p90_ms,p99_ms,max_ms\n")
+        for jvm, (role, pauses) in sorted(jvms.items()):
+            for kind in ("gc", "safepoint"):
+                durations = [d * 1e3 for k, _, d, _ in pauses if k == kind]
+                if durations:
+                    f.write(f"{jvm},{role},{kind},{len(durations)},{sum(durations):.3f},"
+                            + ",".join(f"{percentile(durations, p):.3f}" for p in (50, 90, 99))
+                            + f",{max(durations):.3f}\n")
+
+    # A safepoint covers the GC pause it serves, when the safepoints are logged
+    stops = {}
+    for jvm, (role, pauses) in jvms.items():
+        kind = "safepoint" if any(k == "safepoint" for k, _, _, _ in pauses) else "gc"
+        stops[jvm] = [(e, d) for k, e, d, _ in pauses if k == kind]
+    # Fastest quorum of the nodes
+    quorum_size = len(nodes) // 2 + 1
+    outlier_factor = float(config.get("gc.outlier_factor", 2))
+    outliers = flagged_outliers = 0
+    with open(f"{base}_gc_overlap.csv", "w") as f:
+        f.write("dc,wall_time,elapsed_s,p99_us,client_pause_ms,coordinator_pause_ms,quorum_pause_ms,outlier,flagged\n")
+        for dc, by_elapsed in sorted(intervals.items()):
+            coordinator = f"{prefix}{dc}1"
+            median = statistics.median([p99 for _, p99 in by_elapsed.values()])
+            for elapsed, (wall_time, p99) in sorted(by_elapsed.items()):
+                window = (wall_time - interval, wall_time)
+                client = overlap(stops.get(dc, []), *window)
+                coord = overlap(stops.get(coordinator, []), *window)
+                paused = sorted(overlap(stops.get(n, []), *window) for n in nodes)
+                quorum = paused[quorum_size - 1] if paused else 0.0
+                outlier = int(median > 0 and p99 > outlier_factor * median)
+                flagged = int(client + coord + quorum > 0)
+                outliers += outlier
+                flagged_outliers += outlier * flagged
+                f.write(f"{dc},{wall_time:.3f},{elapsed},{p99:g},{client * 1e3:.3f},{coord * 1e3:.3f},"
+                        f"{quorum * 1e3:.3f},{outlier},{flagged}\n")
+    debug(f"{flagged_outliers} of the {outliers} p99 outlier interval(s) of {os.path.basename(base)} overlap a pause.")
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) == 2 and args[0] == "options":
+        print(jvm_options(args[1]))
+    elif len(args) == 2 and args[0] == "run":
+        analyse(args[1])
+    else:
+        print(f"Usage: {sys.argv[0]} options <log_file> | run <output_file>")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    config = load_config()
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""Measurements of a YCSB client over a time window, from its HdrHistogram logs.
+
+With hdrhistogram.fileoutput=true, YCSB logs the latencies (us) of each of its
+measurements (an operation, e.g. READ, its failures, READ-FAILED, or its
+intended latencies, INTENDED-READ) into <hdrhistogram.output.path><name>.hdr,
+one compressed histogram per status interval (HdrHistogram log format):
+
+    #[StartTime: 1767261600.123 (seconds since epoch), Thu Jan 01 ...]
+    "StartTimestamp","Interval_Length","Interval_Max","Interval_Compressed_Histogram"
+    0.127,1.007,2.769,HISTFAAAAEV42pJpYGA...
+
+`summary` adds up the intervals of a window (the ones whose middle falls in
+it) and prints what YCSB prints at its exit, as if the client had only been
+measured over the window: per measurement, its Operations, Return=OK (for
+the successful ones), AverageLatency(us), MinLatency(us), MaxLatency(us) and
+<p>thPercentileLatency(us) for p in 1..100, then the [OVERALL] RunTime(ms)
+and Throughput(ops/sec) over the intervals summed up.  orchestrate.py relies
+on it to measure the runs given `-warmup auto` from the moment their clients
+are steady, without restarting them (see steady_state.py).
+
+Usage: python3 hdr_window.py summary <start> <end> <hdr_prefix>
+
+<start> and <end> are epoch times, in seconds, and <hdr_prefix> is the
+hdrhistogram.output.path of the client (on the host).
+"""
+
+import base64
+import glob
+import math
+import re
+import struct
+import sys
+import zlib
+
+COMPRESSED_COOKIE = 0x1c849304
+ENCODING_COOKIE = 0x1c849303
+# Cookie, payload length, normalizing index offset, significant digits,
+# lowest discernible value, highest trackable value, integer to double ratio
+HEADER = struct.Struct(">iiiiqqd")
+START_TIME = re.compile(r"^#\[StartTime: ([\d.]+)")
+BASE_TIME = re.compile(r"^#\[BaseTime: ([\d.]+)")
+SUFFIX = ".hdr"
+
+
+def cookie_base(cookie):
+    # The low bits of the second byte hold the word size
+    return cookie & ~0xf0
+
+
+def zigzag_longs(data):
+    """The ZigZag LEB128 longs of *data* (at most 9 bytes each)."""
+    i = 0
+    while i < len(data):
+        value = shift = 0
+        for k in range(9):
+            b = data[i]
+            i += 1
+            if k == 8:
+                value |= b << 56
+                break
+            value |= (b & 0x7f) << shift
+            shift += 7
+            if not b & 0x80:
+                break
+        yield (value >> 1) ^ -(value & 1)
+
+
+class Layout:
+    """Value ranges of the bucket indexes of an HdrHistogram."""
+
+    def __init__(self, lowest, digits):
+        magnitude = int(math.ceil(math.log2(2 * 10 ** digits)))
+        self.half_magnitude = max(magnitude, 1) - 1
+        self.half_count = 1 << self.half_magnitude
+        self.unit_magnitude = int(math.floor(math.log2(lowest)))
+
+    def range(self, index):
+        """(lowest equivalent value, size of the range) of bucket *index*."""
+        bucket = (index >> self.half_magnitude) - 1
+        sub_bucket = (index & (self.half_count - 1)) + self.half_count
+        if bucket < 0:
+            sub_bucket -= self.half_count
+            bucket = 0
+        return sub_bucket << (bucket + self.unit_magnitude), 1 << (bucket + self.unit_magnitude)
+
+
+def decode(encoded):
+    """(Layout, {bucket index: count}) of a base64 compressed histogram."""
+    data = base64.b64decode(encoded)
+    cookie, length = struct.unpack(">ii", data[:8])
+    if cookie_base(cookie) != COMPRESSED_COOKIE:
+        raise ValueError(f"Not a compressed histogram (cookie {cookie:#x})")
+    payload = zlib.decompress(data[8:8 + length])
+    cookie, payload_length, _, digits, lowest, _, _ = HEADER.unpack(payload[:HEADER.size])
+    if cookie_base(cookie) != ENCODING_COOKIE:
+        raise ValueError(f"Unsupported histogram encoding (cookie {cookie:#x})")
+    counts = {}
+    index = 0
+    for value in zigzag_longs(payload[HEADER.size:HEADER.size + payload_length]):
+        if value < 0:
+            # A run of empty buckets
+            index -= value
+        else:
+            if value:
+                counts[index] = value
+            index += 1
+    return Layout(lowest, digits), counts
+
+
+def read_intervals(path):
+    """[(start, length, Layout, counts)] of the HdrHistogram log *path*, in epoch seconds."""
+    start_time = base_time = None
+    intervals = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            m = START_TIME.match(line) or BASE_TIME.match(line)
+            if m:
+                if line.startswith("#[BaseTime"):
+                    base_time = float(m.group(1))
+                else:
+                    start_time = float(m.group(1))
+                continue
+            if not line or line.startswith("#") or line.startswith('"'):
+                continue
+            fields = line.split(",")
+            if fields[0].startswith("Tag="):
+                fields = fields[1:]
+            try:
+                start, length = float(fields[0]), float(fields[1])
+                layout, counts = decode(fields[3])
+            except (IndexError, ValueError, zlib.error):
+                continue
+            intervals.append((start, length, layout, counts))
+    base = base_time if base_time is not None else (start_time or 0.0)
+    # Timestamps are relative to the base time, unless there is none
+    return [(s + base if s < 1e9 else s, l, layout, counts) for s, l, layout, counts in intervals]
+
+
+def ordinal(n):
+    if 10 <= n % 100 <= 20:
+        return f"{n}th"
+    return f"{n}{ {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')}"
+
+
+def measurement(name, layout, counts):
+    """Summary lines of the measurement *name* with *counts* ({bucket index: count})."""
+    total = sum(counts.values())
+    indexes = sorted(counts)
+    ranges = {i: layout.range(i) for i in indexes}
+    mean = sum((ranges[i][0] + (ranges[i][1] >> 1)) * counts[i] for i in indexes) / total
+    lines = [f"[{name}], Operations, {total}"]
+    if not name.endswith("-FAILED") and not name.startswith("INTENDED-"):
+        lines.append(f"[{name}], Return=OK, {total}")
+    lines += [f"[{name}], AverageLatency(us), {mean}",
+              f"[{name}], MinLatency(us), {ranges[indexes[0]][0]}",
+              f"[{name}], MaxLatency(us), {sum(ranges[indexes[-1]]) - 1}"]
+    cumulative = 0
+    k = 0
+    for p in range(1, 101):
+        target = max(1, math.ceil(p / 100 * total))
+        while cumulative + counts[indexes[k]] < target:
+            cumulative += counts[indexes[k]]
+            k += 1
+        lines.append(f"[{name}], {ordinal(p)}PercentileLatency(us), {sum(ranges[indexes[k]]) - 1}")
+    return lines
+
+
+def summary(start, end, prefix):
+    """Summary lines of the YCSB client logging its histograms to *prefix*<name>.hdr, over [*start*, *end*)."""
+    lines = []
+    operations = 0
+    first, last = None, None
+    for path in sorted(glob.glob(f"{glob.escape(prefix)}*{SUFFIX}")):
+        name = path[len(prefix):-len(SUFFIX)]
+        layout, counts = None, {}
+        for s, l, interval_layout, interval_counts in read_intervals(path):
+            if not start <= s + l / 2 < end:
+                continue
+            layout = layout or interval_layout
+            for index, count in interval_counts.items():
+                counts[index] = counts.get(index, 0) + count
+            first = s if first is None else min(first, s)
+            last = s + l if last is None else max(last, s + l)
+        if not counts or name.upper() == "CLEANUP":
+            continue
+        if not name.startswith("INTENDED-"):
+            operations += sum(counts.values())
+        lines += measurement(name, layout, counts)
+    runtime = (last - first) if first is not None else 0.0
+    throughput = operations / runtime if runtime > 0 else 0.0
+    return [f"[OVERALL], RunTime(ms), {runtime * 1e3:.0f}", f"[OVERALL], Throughput(ops/sec), {throughput}"] + lines
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) == 4 and args[0] == "summary":
+        for line in summary(float(args[1]), float(args[2]), args[3]):
+            print(line)
+    else:
+        print(f"Usage: {sys.argv[0]} summary <start> <end> <hdr_prefix>")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,12 @@ This script generates a classical latency vs throughput graph showing:
 - One line per protocol showing how latency increases as load increases
 - Demonstrates the "hockey stick" effect where latency increases sharply
   and throughput plateaus/degrades as the system saturates
+
+The points of a protocol are its runs at the same offered load: the target
+rate of the open-loop runs, or the number of clients of the closed-loop ones.
+The open-loop runs also report their response time (the intended-<op> rows,
+measured from the scheduled start of each operation), drawn dashed next to
+the service time.
 """
 
 import sys
@@ -63,6 +69,14 @@ def main():
 
     df['tput_f'] = df['tput'].apply(safe_float)
     df['clients_int'] = df['clients'].apply(safe_int)
+    if 'target' in df.columns:
+        df['target_f'] = df['target'].apply(safe_float)
+    else:
+        df['target_f'] = None
+    # Offered load of a run: its target rate (open loop), or its clients (closed loop)
+    df['load'] = [t if t is not None and not pd.isna(t) else c
+                  for t, c in zip(df['target_f'], df['clients_int'])]
+    df['intended'] = df['op'].astype(str).str.startswith('intended-')
 
     # Filter to valid rows
     df = df[df['tput_f'].notnull() & df['clients_int'].notnull()].copy()
@@ -91,33 +105,38 @@ def main():
     # For plotting, Accord is drawn last so its curve overwrites others.
     plot_order = sort_protocols_for_plotting(raw_protocols)
 
-    # For each protocol, aggregate by number of clients
-    # Group by protocol and clients, compute average throughput and latency
+    # For each protocol, aggregate by offered load
+    # Group by protocol and load, compute total throughput and average latency
     data_by_protocol = {}
     for proto in raw_protocols:
         dfp = df[df['protocol'] == proto]
         
-        # Group by number of clients
-        client_counts = sorted(dfp['clients_int'].unique().tolist())
+        # Group by offered load
+        loads = sorted(dfp['load'].unique().tolist())
         
         throughputs = []
         latencies = []
+        response_latencies = []
         
-        for clients in client_counts:
-            df_clients = dfp[dfp['clients_int'] == clients]
-            if not df_clients.empty:
-                total_tput = df_clients['tput_f'].sum() / 1000
-                avg_lat = df_clients['median_latency_ms'].mean()
+        for load in loads:
+            df_load = dfp[(dfp['load'] == load) & ~dfp['intended']]
+            df_intended = dfp[(dfp['load'] == load) & dfp['intended']]
+            if not df_load.empty:
+                total_tput = df_load['tput_f'].sum() / 1000
+                avg_lat = df_load['median_latency_ms'].mean()
                 throughputs.append(total_tput)
                 latencies.append(avg_lat)
+                response_latencies.append(df_intended['median_latency_ms'].mean() if not df_intended.empty else None)
             else:
                 throughputs.append(None)
                 latencies.append(None)
+                response_latencies.append(None)
         
         data_by_protocol[proto] = {
-            'clients': client_counts,
+            'loads': loads,
             'throughputs': throughputs,
-            'latencies': latencies
+            'latencies': latencies,
+            'response_latencies': response_latencies
         }
 
     # Prepare colors (unified protocol color schema)
@@ -174,6 +193,14 @@ def main():
                     f.write(f"        {tput:.2f} {lat:.2f}\n")
             f.write("      };\n\n")
 
+            # Response time of the open-loop runs
+            if any(l is not None for l in data['response_latencies']):
+                f.write(f"      \\addplot+[{col}, mark=o, thick, dashed, forget plot] table {{\n")
+                for tput, lat in zip(data['throughputs'], data['response_latencies']):
+                    if tput is not None and tput != 0 and lat is not None and lat != 0:
+                        f.write(f"        {tput:.2f} {lat:.2f}\n")
+                f.write("      };\n\n")
+
         f.write("    \\end{axis}\n")
         f.write("  \\end{tikzpicture}\n")
         f.write("  \\caption{Latency vs Throughput.}\n")        
@@ -1,7 +1,10 @@
 #!/usr/bin/env bash
 
-# Latency vs Throughput experiment: increases the number of clients by a factor of 2
-# (1, 2, 4, 8, ..., up to max_threads) to produce a classical latency vs throughput graph.
+# Latency vs Throughput experiment: doubles the offered load until the system
+# saturates, then bisects around the saturation point (see saturation.py), to
+# produce a classical latency vs throughput graph.  The load is offered
+# open-loop, at a target rate regardless of the latency, or closed-loop
+# (--closed-loop) by a growing number of clients.
 # The graph shows the "hockey stick" effect where latency increases sharply and
 # throughput plateaus/degrades as the system becomes saturated.
 
@@ -11,26 +14,40 @@ source ${DIR}/utils.sh
 source ${DIR}/run_benchmarks.sh
 
 usage() {
-    echo "Usage: $0 [--dry-run] [--test] [--protocols=LIST]"
+    echo "Usage: $0 [--dry-run] [--fresh] [--test] [--closed-loop] [--protocols=LIST] [--set=KEY=VALUE...]"
     echo "  --dry-run        Skip the experiment run; only draw plots using existing data."
+    echo "  --fresh          Discard the completed runs instead of resuming the sweep."
     echo "  --test           Use a 60s run time and right-size containers to fit this machine."
+    echo "  --closed-loop    Sweep the number of client threads instead of the offered load."
     echo "  --protocols=LIST Override the list of protocols to run (comma-separated)."
+    echo "  --set=KEY=VALUE  Override a setting of exp.config for this run (repeatable)."
 }
 
 dry_run=0
+fresh=0
 test_run=0
+closed_loop=0
 protocols_override=""
 for arg in "$@"; do
     case "$arg" in
         --dry-run)
             dry_run=1
             ;;
+        --fresh)
+            fresh=1
+            ;;
         --test)
             test_run=1
             ;;
+        --closed-loop)
+            closed_loop=1
+            ;;
         --protocols=*)
             protocols_override=$(echo "${arg#*=}" | tr ',' ' ')
             ;;
+        --set=*)
+            config_set_arg "$arg"
+            ;;
         *)
             echo "Unknown parameter: $arg"
             usage
@@ -53,94 +70,82 @@ replication_factor=${nodes}
 records=$(config records)
 ops_per_thread=0
 if [ "$test_run" -eq 1 ]; then
-    original_machine=$(config machine)
-    original_maxexecutiontime=$(config maxexecutiontime)
-    restore_test_settings() {
-        sed -i "s/^machine=.*/machine=${original_machine}/" "${CONFIG_FILE}"
-        sed -i "s/^maxexecutiontime=.*/maxexecutiontime=${original_maxexecutiontime}/" "${CONFIG_FILE}"
-    }
-    trap restore_test_settings EXIT
     nodes=3
     records=1000
     compute_test_machine "${nodes}"
-    sed -i "s/^maxexecutiontime=.*/maxexecutiontime=10/" "${CONFIG_FILE}"
+    config_set maxexecutiontime 10
 fi
 maxexecutiontime=$(config maxexecutiontime)
 
-# Start with 1 thread and double until reaching max_threads
-# The resulting graph demonstrates the hockey stick effect
-# Maximum threads to prevent infinite loop
-max_threads=2048
+# The knee of the curve is searched between min_load and max_load (see
+# saturation.py): the offered load (ops/s, over all the DCs) of open-loop runs
+# with open_loop_threads threads per client, or the number of threads per
+# client of closed-loop runs
+if [ "$closed_loop" -eq 1 ]; then
+    min_load=16
+    max_load=2048
+else
+    min_load=250
+    max_load=64000
+    open_loop_threads=256
+fi
 
 if [ "$dry_run" -eq 0 ]; then
     pull_images
+    init_ledger ${LOGDIR}/latency_throughput ${fresh}
     do_clean_up=0
     for p in ${protocols}
     do
 
-        # clean prior logs
-        rm -f ${LOGDIR}/latency_throughput/*${p}*
+        # clean the logs of incomplete runs
+        prune_logs ${LOGDIR}/latency_throughput "${p}_*"
 
         do_create_and_load=1
-        threads=16
-        prev_latency=-1
-        prev_throughput=-1
+        runs=()
 
-        while [ ${threads} -le ${max_threads} ]
+        # Next load of the search of the knee (see saturation.py), none once
+        # located
+        while load=$(python3 ${DIR}/saturation.py next ${min_load} ${max_load} "${runs[@]}") && [ -n "${load}" ]
         do
             ts=$(date +%Y%m%d%H%M%S%N)
             output_file="${LOGDIR}/latency_throughput/${p}_${nodes}_${workload}_${ts}.dat"
-            
-            # Clean up after the last iteration of each protocol's thread sequence, or in case the protocol uses Cassandra.
-            # This ensures we start fresh for the next protocol
-            do_clean_up=0
-            next_threads=$(( (threads * 3 + 1) / 2 ));
-	    if [ "$next_threads" -gt "$max_threads" ] || [ "$p" = "cassandra-paxos" ] || [ "$p" = "accord" ]; then
-                do_clean_up=1		
-            fi
-            
-            run_benchmark ${p} ${threads} ${nodes} ${replication_factor} ${workload_type} ${workload} ${records} $((threads * ops_per_thread)) ${output_file} ${do_create_and_load} ${do_clean_up} -p conflict.theta=${theta} -p updateproportion=1.0 -p readproportion=0.0 -p maxexecutiontime=${maxexecutiontime}
-
-	    if [ "$p" != "cassandra-paxos" ] && [ "$p" != "accord" ]; then
-		do_create_and_load=0
-	    fi
-		
-            # Extract global metrics aggregated across all sites:
-            # sum throughput and average latency over the first ${nodes} DCs
-            total_tput=0
-            total_latency=0
-            dc_count=0
-            for i in $(seq 1 ${nodes}); do
-                dc=$(get_location ${i} ${DIR}/latencies.csv)
-                dc_file="${output_file%.dat}_${dc}.dat"
-                [ -f "${dc_file}" ] || continue
-                dc_tput=$(awk -F',' '/^\[OVERALL\], Throughput\(ops\/sec\),/{t=$3; gsub(/[[:space:]]/,"",t); print int(t+0.5); exit}' "${dc_file}")
-                dc_tput=${dc_tput:-0}
-                dc_lat=$(grep -v CLEANUP "${dc_file}" | grep -v FAILED | awk -F',' '/AverageLatency\(us\)/{lat=$3; gsub(/[[:space:]]/,"",lat); if(lat+0>max) max=lat+0} END{print int(max/1000)}')
-                dc_lat=${dc_lat:-0}
-                total_tput=$(( total_tput + dc_tput ))
-                total_latency=$(( total_latency + dc_lat ))
-                dc_count=$(( dc_count + 1 ))
-            done
-            tput=${total_tput}
-            if [ "${dc_count}" -gt 0 ]; then
-                max_avg_latency=$(( total_latency / dc_count ))
+
+            if [ "$closed_loop" -eq 1 ]; then
+                threads=${load}
+                load_opts=()
+                point="${p} nodes=${nodes} workload=${workload} threads=${threads} records=${records} theta=${theta}"
             else
-                max_avg_latency=0
+                threads=${open_loop_threads}
+                load_opts=(-target ${load})
+                point="${p} nodes=${nodes} workload=${workload} threads=${threads} records=${records} theta=${theta} target=${load}"
             fi
 
-            # Stop when both latency and throughput degrade wrt. previous values (Pareto front)
-            if [ "${prev_latency}" -ge 0 ] && [ "${prev_throughput}" -ge 0 ] && [ "${max_avg_latency}" -gt "${prev_latency}" ] && [ "${tput}" -lt "${prev_throughput}" ]; then
-                log "Pareto front reached for ${p}: latency ${max_avg_latency}ms > ${prev_latency}ms and throughput ${tput} < ${prev_throughput} ops/s, stopping thread increase"
-                stop_benchmark ${p} ${nodes}
-                break
-            fi
-            prev_latency=${max_avg_latency}
-            prev_throughput=${tput}
+            # A completed point is not run again, but its results still
+            # drive the search
+            if point_output "${point}" >/dev/null; then
+                log "Skipping completed run: ${point}"
+                output_file=$(point_output "${point}")
+            else
+                # Cassandra-based systems start each point from freshly loaded
+                # data, on the warm cluster of the previous point
+                if [ "${do_create_and_load}" -eq 0 ] && { [ "$p" = "cassandra-paxos" ] || [ "$p" = "accord" ]; }; then
+                    reset_benchmark ${p} ${replication_factor} ${workload_type} ${workload} ${records} ${threads} ${output_file}
+                fi
+
+                # The cluster is kept until the search ends
+                run_benchmark ${p} ${threads} ${nodes} ${replication_factor} ${workload_type} ${workload} ${records} $((threads * ops_per_thread)) ${output_file} ${do_create_and_load} 0 -p conflict.theta=${theta} -p updateproportion=1.0 -p readproportion=0.0 -p maxexecutiontime=${maxexecutiontime} "${load_opts[@]}"
+                record_point "${point}" "${output_file}"
 
-            # Double the number of threads for next iteration
-            threads=${next_threads}
+	        do_create_and_load=0
+            fi
+            runs+=("${load}:${output_file}")
         done
+
+        log "Saturation search of ${p}:"
+        python3 ${DIR}/saturation.py show "${runs[@]}" | tee ${LOGDIR}/latency_throughput/${p}_saturation.csv
+        if [ "${do_create_and_load}" -eq 0 ]; then
+            stop_benchmark ${p} ${nodes}
+        fi
     done
 fi
 
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Ledger of the completed points of an experiment sweep, to resume it after a failure.
+
+Each line of the ledger (logs/<experiment>/ledger.jsonl) records a completed
+point: its description (protocol, nodes, workload and swept parameter, as
+given by the experiment), a digest of the resolved configuration (see
+exp_config.py), the output file of the run and the SHA-256 of all its
+artifacts.  A point is complete when it is recorded with the same
+configuration and all its artifacts are intact; a re-invoked experiment skips
+the complete points and runs the others.
+
+Usage: python3 ledger.py output <ledger> <point>
+       python3 ledger.py record <ledger> <point> <output_file> <artifact>...
+       python3 ledger.py prune <ledger> <directory> <glob>
+
+`output` prints the output file of the point and exits with 0 when the point
+is complete, 1 otherwise.  `prune` deletes the files of <directory> matching
+<glob> that are not an artifact of a complete point, i.e., the leftovers of
+failed or outdated runs.
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import sys
+import time
+from exp_config import resolve
+
+# Settings that do not change the results of a run
+IGNORED_SETTINGS = {"debug", "container_prefix", "network_name", "images.offline", "images.bundle", "images.ttl"}
+
+
+def config_digest():
+    settings = sorted((k, v) for k, v in resolve().items() if k not in IGNORED_SETTINGS)
+    return hashlib.sha256(json.dumps(settings).encode()).hexdigest()[:16]
+
+
+def sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def entries(ledger):
+    if not os.path.exists(ledger):
+        return []
+    with open(ledger) as f:
+        # A line cut by a crash is ignored
+        result = []
+        for line in f:
+            try:
+                result.append(json.loads(line))
+            except json.JSONDecodeError:
+                pass
+        return result
+
+
+def intact(entry):
+    return all(os.path.exists(path) and sha256(path) == digest for path, digest in entry["artifacts"].items())
+
+
+def complete_entries(ledger):
+    """The last complete entry of every point, by point."""
+    digest = config_digest()
+    points = {}
+    for entry in entries(ledger):
+        if entry["config"] == digest:
+            points[entry["point"]] = entry
+    return {point: entry for point, entry in points.items() if intact(entry)}
+
+
+def record(ledger, point, output_file, artifacts):
+    entry = {"point": point,
+             "config": config_digest(),
+             "output": os.path.abspath(output_file),
+             "artifacts": {os.path.abspath(p): sha256(p) for p in sorted(set(artifacts)) if os.path.isfile(p)},
+             "completed_at": time.time()}
+    os.makedirs(os.path.dirname(os.path.abspath(ledger)), exist_ok=True)
+    with open(ledger, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def prune(ledger, directory, pattern):
+    kept = {path for e in complete_entries(ledger).values() for path in e["artifacts"]}
+    kept.add(os.path.abspath(ledger))
+    removed = 0
+    for name in os.listdir(directory) if os.path.isdir(directory) else []:
+        path = os.path.join(directory, name)
+        if fnmatch.fnmatch(name, pattern) and os.path.isfile(path) and os.path.abspath(path) not in kept:
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) == 3 and args[0] == "output":
+        entry = complete_entries(args[1]).get(args[2])
+        if entry is None:
+            sys.exit(1)
+        print(entry["output"])
+    elif len(args) >= 4 and args[0] == "record":
+        record(args[1], args[2], args[3], args[4:])
+    elif len(args) == 4 and args[0] == "prune":
+        prune(args[1], args[2], args[3])
+    else:
+        print(f"Usage: {sys.argv[0]} output <ledger> <point> | record <ledger> <point> <output_file> <artifact>... | prune <ledger> <directory> <glob>")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""Run the YCSB clients of a measurement window concurrently and collect their metrics.
+
+run_ycsb (run_benchmarks.sh) writes the .docker env file of each client and,
+when YCSB_SPEC_FILE is set, appends the description of the client to that file
+(one JSON object per line) instead of launching it:
+
+    {"name": "ycsb-1", "image": "...", "network": "Hanoi1",
+     "env_file": ".../run_Hanoi.docker", "log_file": ".../run_Hanoi.dat",
+     "volumes": ["/host/path:/container/path"],
+     "cpuset_cpus": "4-5", "cpuset_mems": "0",
+     "labels": {"exp.owner": "default", "exp.role": "client"}}
+
+This script then starts all the clients at once, streams the logs of each one
+into its .dat file (and its status lines into its .ts.csv time series, see
+timeseries.py), and awaits their exits (Docker wait API, no polling).  The
+fast-path script of the system is finally run on all the given replicas
+concurrently, and the averaged ratios are written to the ratio file.
+
+With --warmup=<summary_file>, the clients warm the system up before they are
+measured, in the same run: without a warmup period of their own, with a status
+line every warmup.interval seconds and their latencies logged as HdrHistogram
+interval logs (<client>.<measurement>.hdr).  As soon as they are all steady
+(see steady_state.py), or after warmup.max seconds, they are measured for their
+maxexecutiontime and then stopped.  Their .dat files hold the summary of that
+window only (see hdr_window.py; the whole logs are kept in <client>.full), their
+time series are cut to it, and the time it took each client to get steady is
+written to the summary file with the window.
+
+Usage: python3 orchestrate.py [--warmup=<summary_file>] <spec_file> [<fast_path_script> <ratio_file> <replica>...]
+"""
+
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+import docker
+import hdr_window
+from exp_config import load_config
+from steady_state import SteadyState
+from timeseries import TimeSeries
+
+RATIOS = ["Fast", "Medium", "Slow", "Ephemeral"]
+# Directory of the HdrHistogram logs in the clients (see hdr_window.py)
+HDR_DIR = "/hdrlogs"
+# A line of the summary YCSB prints at its exit, e.g. "[READ], Operations, 1000"
+SUMMARY_LINE = re.compile(r"^\[[A-Z0-9_-]+\], ")
+
+config = {}
+
+
+def debug(msg):
+    if config.get("debug", 1):
+        timestamp = datetime.now().strftime("%s:%f")
+        print(f"[{timestamp}] \033[32m{msg}\033[0m")
+
+
+def error(msg):
+    timestamp = datetime.now().strftime("%s:%f")
+    print(f"[{timestamp}] \033[31m{msg}\033[0m", file=sys.stderr)
+
+
+def read_env_file(path):
+    """Parse a `docker run --env-file` file: KEY=VALUE lines, values taken verbatim."""
+    env = {}
+    with open(path) as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            env[key] = value
+    return env
+
+
+def volume_binds(volumes):
+    binds = []
+    for volume in volumes:
+        host, target = volume.split(":", 1)
+        binds.append(f"{os.path.abspath(host)}:{target}")
+    return binds
+
+
+def stream_logs(container, log_file, on_line=None):
+    pending = ""
+    with open(log_file, "wb") as f:
+        for chunk in container.logs(stream=True, follow=True):
+            f.write(chunk)
+            f.flush()
+            if on_line:
+                # A line may arrive in several chunks
+                lines = (pending + chunk.decode("utf-8", errors="ignore")).split("\n")
+                pending = lines.pop()
+                for line in lines:
+                    on_line(line)
+
+
+async def run_client(client, spec, on_line=None, extra_opts=""):
+    """Start the client described by *spec*, log it to its .dat file and wait for its exit.
+
+    Each line of its logs is passed to *on_line*, if any, and *extra_opts* are
+    appended to its YCSB options.  Returns the exit code of the client (None
+    when it could not be started).
+    """
+    name = spec["name"]
+    # Dedicated CPUs of the client, if any (see placement.py)
+    cpuset = {key: spec[key] for key in ("cpuset_cpus", "cpuset_mems") if spec.get(key)}
+    environment = read_env_file(spec["env_file"])
+    if extra_opts:
+        environment["YCSB_OPTS"] = environment.get("YCSB_OPTS", "") + extra_opts
+    try:
+        container = await asyncio.to_thread(
+            client.containers.run,
+            spec["image"],
+            name=name,
+            detach=True,
+            network_mode=f"container:{spec['network']}",
+            security_opt=["apparmor=unconfined"],
+            environment=environment,
+            volumes=volume_binds(spec.get("volumes", [])),
+            log_config=docker.types.LogConfig(type="json-file", config={"max-size": "10m", "max-file": "3"}),
+            labels=spec.get("labels", {}),
+            **cpuset)
+    except docker.errors.APIError as e:
+        error(f"Failed to start YCSB client '{name}': {e}")
+        return None
+    debug(f"Started YCSB client '{name}' (id: {container.short_id}) on the network of '{spec['network']}'")
+
+    try:
+        logs = asyncio.create_task(asyncio.to_thread(stream_logs, container, spec["log_file"], on_line))
+        result = await asyncio.to_thread(container.wait)
+        await logs
+        exit_code = result.get("StatusCode")
+        debug(f"YCSB client '{name}' terminated with code {exit_code}")
+        return exit_code
+    finally:
+        # The clients are not started with auto-remove, so that their logs
+        # can be drained after their exit
+        try:
+            await asyncio.to_thread(container.remove, force=True)
+        except docker.errors.APIError:
+            pass
+
+
+async def fast_path_ratios(script, replica):
+    """Run the fast-path *script* on *replica*; returns {ratio name: value}."""
+    proc = await asyncio.create_subprocess_exec(script, replica,
+                                                stdout=asyncio.subprocess.PIPE,
+                                                stderr=asyncio.subprocess.DEVNULL)
+    output, _ = await proc.communicate()
+    ratios = dict.fromkeys(RATIOS, 0.0)
+    for line in output.decode(errors="ignore").splitlines():
+        m = re.match(r"^(\w+) ratio: ([0-9.]+)", line)
+        if m and m.group(1) in ratios:
+            ratios[m.group(1)] = float(m.group(2))
+    return ratios
+
+
+def base_name(log_file):
+    return log_file[:-len(".dat")] if log_file.endswith(".dat") else log_file
+
+
+def full_log(log_file):
+    """Log of a client measured from its steady point, warmup and YCSB summary included."""
+    return base_name(log_file) + ".full"
+
+
+def kill(client, name):
+    try:
+        client.containers.get(name).kill()
+    except docker.errors.APIError:
+        # Already exited
+        pass
+
+
+def run_length(spec):
+    """The maxexecutiontime (s) of the client of *spec*, from its YCSB options."""
+    values = re.findall(r"maxexecutiontime=(\d+)", read_env_file(spec["env_file"]).get("YCSB_OPTS", ""))
+    return int(values[-1]) if values else int(config.get("maxexecutiontime", 60))
+
+
+def cut_log(spec, start, end):
+    """Write the .dat log of the client of *spec*, with the YCSB summary of [*start*, *end*) only."""
+    with open(full_log(spec["log_file"]), errors="replace") as f:
+        lines = [line for line in f if not SUMMARY_LINE.match(line)]
+    with open(spec["log_file"], "w") as f:
+        f.writelines(lines)
+        f.write("\n".join(hdr_window.summary(start, end, base_name(spec["log_file"]) + ".")) + "\n")
+
+
+def cut_series(path, start, end):
+    """Keep the rows of the time series *path* of (*start*, *end*]."""
+    with open(path) as f:
+        header, *rows = f.readlines()
+    with open(path, "w") as f:
+        f.write(header)
+        f.writelines(row for row in rows if start < float(row.split(",", 1)[0]) <= end)
+
+
+async def measure_when_steady(client, specs, runs, detectors, all_steady, summary_file, stopped):
+    """Wait until the clients of *specs* are all steady, then measure them for their run length.
+
+    Returns the measurement window (start, end), or None when the clients
+    exited before it started.  The names of the clients stopped at its end
+    are added to *stopped*.
+    """
+    max_s = int(config.get("warmup.max", 120))
+    interval = int(config.get("warmup.interval", 1))
+    length = min(run_length(spec) for spec in specs)
+    steady = asyncio.create_task(all_steady.wait())
+    await asyncio.wait([runs, steady], timeout=max_s, return_when=asyncio.FIRST_COMPLETED)
+    steady.cancel()
+    if runs.done():
+        error("The YCSB clients exited before their measurement started.")
+        return None
+    start = time.time()
+    if all(d.steady for d in detectors.values()):
+        debug(f"Steady after {max(d.steady_at for d in detectors.values())}s of warmup, measuring for {length}s.")
+    else:
+        # A run that does not settle is still measured, after the longest warmup
+        error(f"Not steady after {max_s}s of warmup: {' '.join(n for n, d in detectors.items() if not d.steady)}")
+    # The histograms of an interval are logged at its end
+    await asyncio.wait([runs], timeout=length + 2 * interval)
+    if not runs.done():
+        stopped.update(spec["name"] for spec in specs)
+        await asyncio.gather(*(asyncio.to_thread(kill, client, spec["name"]) for spec in specs))
+
+    with open(summary_file, "w") as f:
+        f.write("client,steady_after_s,status_lines,measured_from,measured_to\n")
+        for name, detector in detectors.items():
+            f.write(f"{name},{detector.steady_at if detector.steady else 'NA'},{len(detector.samples)},"
+                    f"{start:.3f},{start + length:.3f}\n")
+    return start, start + length
+
+
+async def orchestrate(specs, fast_path_script=None, ratio_file=None, replicas=(), summary_file=None):
+    """Run the clients of *specs*; with *summary_file*, measure them from the moment they are all steady."""
+    client = docker.from_env()
+    series = {spec["name"]: TimeSeries(spec["log_file"][:-len(".dat")] + ".ts.csv")
+              for spec in specs if spec["log_file"].endswith(".dat")}
+    loop = asyncio.get_running_loop()
+    all_steady = asyncio.Event()
+    detectors = {}
+    if summary_file:
+        window = int(config.get("warmup.window", 5))
+        tolerance = float(config.get("warmup.tolerance", 0.1))
+        detectors = {spec["name"]: SteadyState(window, tolerance) for spec in specs}
+
+    def follower(name):
+        def on_line(line):
+            if name in series:
+                series[name].add(line)
+            if name in detectors and detectors[name].add(line) and all(d.steady for d in detectors.values()):
+                loop.call_soon_threadsafe(all_steady.set)
+        return on_line
+
+    def client_args(spec):
+        if not summary_file:
+            return spec, ""
+        # Run for the longest warmup and the measurement, logging the
+        # histogram of every status interval (see hdr_window.py)
+        base = base_name(spec["log_file"])
+        max_s = int(config.get("warmup.max", 120))
+        interval = int(config.get("warmup.interval", 1))
+        volume = f"{os.path.dirname(os.path.abspath(base))}:{HDR_DIR}"
+        extra_opts = (f" -p warmupexecutiontime=0 -p maxexecutiontime={max_s + run_length(spec) + 3 * interval}"
+                      f" -p status.interval={interval} -p hdrhistogram.fileoutput=true"
+                      f" -p hdrhistogram.output.path={HDR_DIR}/{os.path.basename(base)}.")
+        return dict(spec, log_file=full_log(spec["log_file"]), volumes=spec.get("volumes", []) + [volume]), extra_opts
+
+    measured = None
+    stopped = set()
+    try:
+        runs = asyncio.gather(*(run_client(client, run_spec, follower(spec["name"]), extra_opts)
+                                for spec in specs for run_spec, extra_opts in [client_args(spec)]))
+        if summary_file:
+            measured = await measure_when_steady(client, specs, runs, detectors, all_steady, summary_file, stopped)
+        exit_codes = await runs
+    finally:
+        for ts in series.values():
+            ts.close()
+    if summary_file:
+        if measured is None:
+            return False
+        for spec in specs:
+            if os.path.exists(full_log(spec["log_file"])):
+                cut_log(spec, *measured)
+            if spec["name"] in series:
+                cut_series(spec["log_file"][:-len(".dat")] + ".ts.csv", *measured)
+
+    if fast_path_script and ratio_file and replicas:
+        results = await asyncio.gather(*(fast_path_ratios(fast_path_script, r) for r in replicas))
+        with open(ratio_file, "w") as f:
+            for name in RATIOS:
+                f.write(f"{name} ratio: {sum(r[name] for r in results) / len(results):.4f}\n")
+
+    # The clients stopped at the end of their measurement did not fail
+    failed = [spec["name"] for spec, code in zip(specs, exit_codes) if code != 0 and spec["name"] not in stopped]
+    if failed:
+        error(f"YCSB client(s) failed: {' '.join(failed)}")
+    return not failed
+
+
+def main():
+    args = sys.argv[1:]
+    summary_file = None
+    if args and args[0].startswith("--warmup="):
+        summary_file = args.pop(0).split("=", 1)[1]
+    if len(args) < 1 or len(args) == 2:
+        print(f"Usage: {sys.argv[0]} [--warmup=<summary_file>] <spec_file> [<fast_path_script> <ratio_file> <replica>...]")
+        sys.exit(1)
+
+    with open(args[0]) as f:
+        specs = [json.loads(line) for line in f if line.strip()]
+
+    fast_path_script = args[1] if len(args) > 1 else None
+    ratio_file = args[2] if len(args) > 2 else None
+
+    if not asyncio.run(orchestrate(specs, fast_path_script, ratio_file, args[3:], summary_file)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    config = load_config()
+    main()
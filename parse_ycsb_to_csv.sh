@@ -6,12 +6,14 @@ DIR=$(dirname "${BASH_SOURCE[0]}")
 
 source ${DIR}/utils.sh
 
-# Output concise header
+# Output concise header; run is the timestamp of the run, shared by its DCs,
+# stalls the number of status intervals the DC stalled (see timeseries.py),
+# and the last columns the resource utilization of the run (see telemetry.py)
 header="protocol,nodes,workload,conflict_rate,dc,op,clients,tput,avg_latency_us"
 for p in $(seq 1 100); do
     header="$header,p$p"
 done
-header="$header,failed,fast_path,medium_path,slow_path,ephemeral_path"
+header="$header,failed,fast_path,medium_path,slow_path,ephemeral_path,target,run,stalls,replica_cpu,replica_throttled,client_cpu,client_throttled,replica_mem_mb"
 echo "$header"
 
 # Process a single file, outputting CSV rows
@@ -52,15 +54,32 @@ process_file() {
         [ -n "${val}" ] && ephemeral_path="${val}"
     fi
 
+    # Resource utilization of the run, from the summary of its telemetry
+    local usage_file="${dir}/${protocol}_${nodes}_${workload}_${timestamp}_resource_usage.dat"
+    local usage="NA,NA,NA,NA,NA"
+    if [ -f "${usage_file}" ]; then
+        usage=$(awk -F': ' '{ v[$1] = $2 } END { print v["replica_cpu"] "," v["replica_throttled"] "," v["client_cpu"] "," v["client_throttled"] "," v["replica_mem_mb"] }' "${usage_file}")
+    fi
+
+    # Stalled status intervals, from the time series of the client
+    local ts_file="${dir}/${protocol}_${nodes}_${workload}_${timestamp}_${dc}.ts.csv"
+    local stalls="NA"
+    if [ -f "${ts_file}" ]; then
+        stalls=$(awk -F, 'NR > 1 && $8 == 1 && !($2 in seen) { seen[$2] = 1; n++ } END { print n + 0 }' "${ts_file}")
+    fi
+
     # Single awk pass: extract all needed values and generate CSV rows
     awk -v protocol="$protocol" -v nodes="$nodes" \
-        -v workload="$workload" -v dc="$dc" \
+        -v workload="$workload" -v dc="$dc" -v run="$timestamp" \
         -v fast_path="$fast_path" -v medium_path="$medium_path" \
-        -v slow_path="$slow_path" -v ephemeral_path="$ephemeral_path" '
+        -v slow_path="$slow_path" -v ephemeral_path="$ephemeral_path" \
+        -v stalls="$stalls" -v usage="$usage" '
     BEGIN {
         clients       = "unknown"
         conflict_rate = "NA"
         tput          = "unknown"
+        target        = "NA"
+        agg_target    = "NA"
         is_conflict   = 0
         is_swap       = 0
     }
@@ -79,6 +98,27 @@ process_file() {
         }
     }
 
+    # The aggregate offered load (ops/s) of an open-loop run, over all its
+    # clients: "-p exp.target=300" (see split_target)
+    agg_target == "NA" && match($0, /exp\.target=[0-9]+/) {
+        agg_target = substr($0, RSTART + 11, RLENGTH - 11)
+    }
+
+    # Else, the offered load of the client: "-target 100" or "-p target=100"
+    target == "NA" && /(^|[ \t])(-target[ \t]+|target=)[0-9]/ {
+        for (i = 1; i < NF; i++) {
+            if ($i == "-target") {
+                target = $(i+1)
+                break
+            }
+        }
+        if (target == "NA" && match($0, /(^|[ \t])target=[0-9]+/)) {
+            t = substr($0, RSTART, RLENGTH)
+            sub(/.*target=/, "", t)
+            target = t
+        }
+    }
+
     # Detect ConflictWorkload
     /site\.ycsb\.workloads\.ConflictWorkload/ { is_conflict = 1 }
 
@@ -167,7 +207,10 @@ process_file() {
     }
 
     END {
-        n_ops = split("read insert update scan readmodifywrite tx-readmodifywrite", ops, " ")
+        if (agg_target != "NA") target = agg_target
+        # With measurement.interval=both, the INTENDED-<op> rows carry the
+        # response time (from the scheduled start) of the open-loop runs
+        n_ops = split("read insert update scan readmodifywrite tx-readmodifywrite intended-read intended-insert intended-update intended-scan intended-readmodifywrite intended-tx-readmodifywrite", ops, " ")
         for (o = 1; o <= n_ops; o++) {
             op  = ops[o]
             row = protocol "," nodes "," workload "," conflict_rate "," dc \
@@ -183,7 +226,7 @@ process_file() {
                 fail = (op in op_fail) ? op_fail[op] : 0
                 total = succ + fail
                 if (total > 0) failed_pct = fail / total * 100
-                print row "," sprintf("%.4f", failed_pct) "," fast_path "," medium_path "," slow_path "," ephemeral_path
+                print row "," sprintf("%.4f", failed_pct) "," fast_path "," medium_path "," slow_path "," ephemeral_path "," target "," run "," stalls "," usage
             }
         }
     }
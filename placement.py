@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""CPU and memory-node placement of the containers of the experiments.
+
+With cpu_pinning=true, each node container gets a set of dedicated CPUs
+(--cpuset-cpus) instead of a CFS quota (--cpus), with as many CPUs as its
+machine type (gcp.csv), and the memory nodes of these CPUs (--cpuset-mems).
+The CPUs of a container are taken from a single NUMA node when one has enough
+free CPUs (the fullest node that fits), whole cores first, so that two
+containers do not share the hyperthreads of a core.  Each YCSB client gets
+ycsb.cpus CPUs of its own the same way; when none is left, it gets all the
+CPUs but the ones of the replica it is co-located with.
+
+The assignments of all the experiments running on the host (see scheduler.py)
+are kept in logs/placement.json, under a lock.  The assignment of a container
+that is no longer running is dropped (after a grace period, as a container is
+placed before it is started).
+
+Usage: python3 placement.py assign <container> <vcpus> [<colocated_container>]
+       python3 placement.py show [<container_prefix>]
+       python3 placement.py release <container>...
+
+`assign` prints "<cpus> <mems>" (e.g., "0-3 0"), or nothing when the host has
+too few CPUs or <vcpus> is below 1, in which case the container keeps its
+quota.  `show` prints the
+assignments as JSON, as recorded next to the logs of a run.
+"""
+
+import fcntl
+import glob
+import json
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+import docker
+from exp_config import load_config
+
+PLACEMENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+STATE_FILE = os.path.join(PLACEMENT_DIR, "placement.json")
+LOCK_FILE = os.path.join(PLACEMENT_DIR, "placement.lock")
+GRACE_S = 300
+
+config = {}
+
+
+def debug(msg):
+    # stdout carries the assignment
+    if config.get("debug", 1):
+        timestamp = datetime.now().strftime("%s:%f")
+        print(f"[{timestamp}] \033[32m{msg}\033[0m", file=sys.stderr)
+
+
+def parse_cpulist(text):
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-")
+            cpus.extend(range(int(lo), int(hi) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def format_cpulist(cpus):
+    """Compact list of *cpus*, e.g. [0, 1, 2, 5] -> "0-2,5"."""
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(lo) if lo == hi else f"{lo}-{hi}" for lo, hi in ranges)
+
+
+def read_int(path, default):
+    try:
+        with open(path) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return default
+
+
+def host_topology():
+    """{cpu: (NUMA node, core)} of the CPUs this process may run on."""
+    nodes = {}
+    for path in glob.glob("/sys/devices/system/node/node[0-9]*/cpulist"):
+        node = int(re.search(r"node(\d+)/cpulist$", path).group(1))
+        with open(path) as f:
+            for cpu in parse_cpulist(f.read()):
+                nodes[cpu] = node
+    topology = {}
+    for cpu in sorted(os.sched_getaffinity(0)):
+        base = f"/sys/devices/system/cpu/cpu{cpu}/topology"
+        core = (read_int(f"{base}/physical_package_id", 0), read_int(f"{base}/core_id", cpu))
+        topology[cpu] = (nodes.get(cpu, 0), core)
+    return topology
+
+
+def pick_cpus(topology, free, vcpus):
+    """*vcpus* CPUs among *free*, on a single NUMA node when possible, or None."""
+    if len(free) < vcpus:
+        return None
+    busy_cores = {topology[c][1] for c in topology if c not in free}
+    by_node = {}
+    for cpu in free:
+        by_node.setdefault(topology[cpu][0], []).append(cpu)
+    fitting = [node for node, cpus in by_node.items() if len(cpus) >= vcpus]
+    candidates = by_node[min(fitting, key=lambda n: (len(by_node[n]), n))] if fitting else free
+    # Whole free cores first, the hyperthreads of a core next to each other
+    ordered = sorted(candidates, key=lambda c: (topology[c][1] in busy_cores, topology[c], c))
+    return sorted(ordered[:vcpus])
+
+
+@contextmanager
+def locked_state():
+    os.makedirs(PLACEMENT_DIR, exist_ok=True)
+    with open(LOCK_FILE, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        state = {}
+        if os.path.exists(STATE_FILE):
+            with open(STATE_FILE) as f:
+                state = json.load(f)
+        yield state
+        tmp = f"{STATE_FILE}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(tmp, STATE_FILE)
+
+
+def drop_stale(state):
+    try:
+        running = {c.name for c in docker.from_env().containers.list()}
+    except docker.errors.DockerException:
+        return
+    now = time.time()
+    for name in [n for n, a in state.items() if n not in running and now - a["assigned_at"] > GRACE_S]:
+        del state[name]
+
+
+def assign(name, vcpus, colocated=None):
+    """Place *name* on *vcpus* dedicated CPUs; returns its assignment, or None."""
+    if vcpus < 1:
+        # An empty cpuset would not run
+        debug(f"Cannot pin '{name}' on {vcpus} CPUs, it keeps its quota.")
+        return None
+    topology = host_topology()
+    with locked_state() as state:
+        drop_stale(state)
+        state.pop(name, None)
+        used = {cpu for a in state.values() if not a["shared"] for cpu in parse_cpulist(a["cpus"])}
+        cpus = pick_cpus(topology, [c for c in topology if c not in used], vcpus)
+        shared = cpus is None
+        if shared:
+            if colocated not in state:
+                debug(f"Not enough free CPUs to pin '{name}' ({vcpus} CPUs).")
+                return None
+            # Off the cores of the co-located replica, shared with the rest
+            avoid = set(parse_cpulist(state[colocated]["cpus"]))
+            cpus = [c for c in topology if c not in avoid] or sorted(topology)
+        assignment = {"cpus": format_cpulist(cpus),
+                      "mems": format_cpulist({topology[c][0] for c in cpus}),
+                      "vcpus": vcpus,
+                      "shared": shared,
+                      "colocated": colocated,
+                      "assigned_at": time.time()}
+        state[name] = assignment
+    debug(f"Placed '{name}' on CPUs {assignment['cpus']} (memory nodes {assignment['mems']})"
+          f"{' shared' if shared else ''}.")
+    return assignment
+
+
+def release(names):
+    with locked_state() as state:
+        for name in names:
+            state.pop(name, None)
+
+
+def show(prefix=""):
+    with locked_state() as state:
+        return {n: a for n, a in state.items() if n.startswith(prefix)}
+
+
+def main():
+    if len(sys.argv) >= 4 and sys.argv[1] == "assign":
+        colocated = sys.argv[4] if len(sys.argv) > 4 else None
+        try:
+            vcpus = int(float(sys.argv[3]))
+        except ValueError:
+            vcpus = 0
+        assignment = assign(sys.argv[2], vcpus, colocated)
+        if assignment:
+            print(f"{assignment['cpus']} {assignment['mems']}")
+    elif len(sys.argv) <= 3 and len(sys.argv) >= 2 and sys.argv[1] == "show":
+        print(json.dumps(show(sys.argv[2] if len(sys.argv) > 2 else ""), indent=2, sort_keys=True))
+    elif len(sys.argv) >= 2 and sys.argv[1] == "release":
+        release(sys.argv[2:])
+    else:
+        print(f"Usage: {sys.argv[0]} assign <container> <vcpus> [<colocated_container>] | show [<prefix>] | release <container>...")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    config = load_config()
+    main()
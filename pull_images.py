@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Bring the Docker images of the experiments (every *_image setting) up to date.
+
+The digest of each local image is compared with the one of its tag in the
+registry, and only the stale or missing images are pulled, all at once.  An
+image that cannot be pulled is kept as is when a local copy exists: only a
+missing image fails the run.
+
+Checking is skipped for images.ttl seconds after a successful check (the time
+is stamped in logs/images.json), so back-to-back experiments do not query the
+registry again.  With images.offline=true the registry is never contacted:
+the missing images are loaded from the images.bundle tarball (as written by
+`docker save`, see `save` below), if any.
+
+Usage: python3 pull_images.py [--force]
+       python3 pull_images.py save <bundle.tar>
+
+--force ignores the stamps.  `save` writes all the images to a bundle for the
+offline mode.  Concurrent calls (see scheduler.py) are serialized.
+"""
+
+import fcntl
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import docker
+from exp_config import load_config
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+STAMP_FILE = os.path.join(LOG_DIR, "images.json")
+LOCK_FILE = os.path.join(LOG_DIR, "images.lock")
+
+
+def debug(msg):
+    if config.get("debug", 1):
+        timestamp = datetime.now().strftime("%s:%f")
+        print(f"[{timestamp}] \033[32m{msg}\033[0m")
+
+
+def log(msg):
+    timestamp = datetime.now().strftime("%s:%f")
+    print(f"[{timestamp}] \033[33m{msg}\033[0m")
+
+
+def configured_images():
+    return sorted({str(v) for k, v in config.items() if k.endswith("_image") and str(v)})
+
+
+def local_image(client, image):
+    try:
+        return client.images.get(image)
+    except docker.errors.ImageNotFound:
+        return None
+
+
+def is_current(client, image, local):
+    """Whether the digest of the tag of *image* in the registry is the one of *local*."""
+    remote = client.images.get_registry_data(image).id
+    return any(d.endswith(f"@{remote}") for d in local.attrs.get("RepoDigests", []))
+
+
+def refresh(client, image):
+    """Pull *image* if missing or stale; returns an error message, or None."""
+    local = local_image(client, image)
+    try:
+        if local is not None and is_current(client, image, local):
+            debug(f"Image {image} is up to date.")
+            return None
+        log(f"Pulling image: {image}")
+        client.images.pull(image)
+        debug(f"Pulled image {image}.")
+        return None
+    except docker.errors.APIError as e:
+        if local is not None:
+            log(f"WARNING: Could not refresh image '{image}' ({e}); using the local copy.")
+            return None
+        return f"Failed to pull image '{image}': {e}"
+
+
+def load_bundle(client, images):
+    """Load the images missing among *images* from images.bundle; returns the errors."""
+    missing = [i for i in images if local_image(client, i) is None]
+    bundle = str(config.get("images.bundle", ""))
+    if missing and bundle and os.path.exists(bundle):
+        log(f"Loading {len(missing)} image(s) from {bundle}...")
+        with open(bundle, "rb") as f:
+            client.images.load(f)
+        missing = [i for i in images if local_image(client, i) is None]
+    return [f"Image '{i}' is not available offline." for i in missing]
+
+
+def read_stamps():
+    if not os.path.exists(STAMP_FILE):
+        return {}
+    with open(STAMP_FILE) as f:
+        return json.load(f)
+
+
+def write_stamps(stamps):
+    tmp = f"{STAMP_FILE}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(stamps, f, indent=2, sort_keys=True)
+    os.replace(tmp, STAMP_FILE)
+
+
+def pull_images(force=False):
+    client = docker.from_env()
+    images = configured_images()
+    if str(config.get("images.offline", "false")).lower() == "true":
+        return load_bundle(client, images)
+
+    ttl = float(config.get("images.ttl", 0) or 0)
+    stamps = {} if force else read_stamps()
+    now = time.time()
+    due = [i for i in images
+           if local_image(client, i) is None or now - stamps.get(i, 0) >= ttl]
+    for image in sorted(set(images) - set(due)):
+        debug(f"Image {image} was checked less than {ttl:g}s ago.")
+
+    with ThreadPoolExecutor() as executor:
+        results = dict(zip(due, executor.map(lambda i: refresh(client, i), due)))
+    stamps.update({i: now for i, err in results.items() if err is None})
+    write_stamps(stamps)
+    return [err for err in results.values() if err]
+
+
+def main():
+    args = sys.argv[1:]
+    os.makedirs(LOG_DIR, exist_ok=True)
+    if len(args) == 2 and args[0] == "save":
+        images = configured_images()
+        log(f"Saving {len(images)} image(s) to {args[1]}...")
+        sys.exit(subprocess.call(["docker", "save", "-o", args[1]] + images))
+    if args not in ([], ["--force"]):
+        print(f"Usage: {sys.argv[0]} [--force] | save <bundle.tar>")
+        sys.exit(1)
+
+    with open(LOCK_FILE, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        errors = pull_images(force=bool(args))
+    for err in errors:
+        log(f"ERROR: {err}")
+    if errors:
+        sys.exit(1)
+    log("All Docker images are available.")
+
+
+if __name__ == "__main__":
+    config = load_config()
+    main()
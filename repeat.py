@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Repetition of the points of an experiment until their results are stable.
+
+A point is run again, in successive rounds, until the 95% confidence interval
+of its throughput, p50 and p99 latencies (see saturation.measure) over its
+runs is narrower than repeat.ci_width (the half-width, relative to the mean),
+with at least repeat.min and at most repeat.max runs.  So a stable point costs
+repeat.min runs, and a noisy one up to repeat.max.  The runs of a point are
+recorded in the ledger of the experiment (see ledger.py) as "<point> run=<k>".
+
+The protocols are run in a different order in each round (shuffled with
+repeat.seed and the round), so that a drift of the host over time does not
+bias the comparison of the protocols.
+
+Usage: python3 repeat.py order <round> <protocol>...
+       python3 repeat.py done <ledger> <point> <round>
+
+`order` prints the protocols in the order of the round.  `done` exits with 0
+when the point needs no run in the round (k = <round>), 1 otherwise.
+"""
+
+import math
+import random
+import statistics
+import sys
+from datetime import datetime
+from exp_config import load_config
+from ledger import complete_entries
+from saturation import measure
+
+# Two-sided 95% quantiles of the Student t distribution, by degrees of freedom
+T_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262,
+        10: 2.228, 11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131, 16: 2.120, 17: 2.110,
+        18: 2.101, 19: 2.093, 20: 2.086, 25: 2.060, 30: 2.042}
+
+config = {}
+
+
+def debug(msg):
+    if config.get("debug", 1):
+        timestamp = datetime.now().strftime("%s:%f")
+        print(f"[{timestamp}] \033[32m{msg}\033[0m", file=sys.stderr)
+
+
+def t_95(dof):
+    known = [d for d in T_95 if d <= dof]
+    return T_95[max(known)] if dof <= 30 else 1.960
+
+
+def confidence_interval(values):
+    """(mean, half-width of the 95% confidence interval) of *values*; the half-width is 0 for a single value."""
+    mean = statistics.mean(values)
+    if len(values) < 2:
+        return mean, 0.0
+    return mean, t_95(len(values) - 1) * statistics.stdev(values) / math.sqrt(len(values))
+
+
+def order(round_, protocols):
+    shuffled = list(protocols)
+    random.Random(f"{config.get('repeat.seed', 0)}-{round_}").shuffle(shuffled)
+    return shuffled
+
+
+def done(ledger, point, round_):
+    """Whether *point* needs no run in round *round_*, given its runs of the previous rounds."""
+    entries = complete_entries(ledger)
+    if f"{point} run={round_}" in entries:
+        return True
+    runs = [measure(entries[f"{point} run={k}"]["output"]) for k in range(1, round_) if f"{point} run={k}" in entries]
+    runs = [r for r in runs if r is not None]
+    if len(runs) >= int(config.get("repeat.max", 1)):
+        return True
+    if len(runs) < max(int(config.get("repeat.min", 1)), 2):
+        return False
+    width = float(config.get("repeat.ci_width", 0.1))
+    for name, values in zip(("throughput", "p50", "p99"), zip(*runs)):
+        mean, half = confidence_interval(values)
+        if mean > 0 and half / mean > width:
+            debug(f"{point}: {name} {mean:g} +- {half:g} after {len(runs)} runs.")
+            return False
+    debug(f"{point}: stable after {len(runs)} runs.")
+    return True
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) >= 2 and args[0] == "order":
+        print(" ".join(order(int(args[1]), args[2:])))
+    elif len(args) == 4 and args[0] == "done":
+        sys.exit(0 if done(args[1], args[2], int(args[3])) else 1)
+    else:
+        print(f"Usage: {sys.argv[0]} order <round> <protocol>... | done <ledger> <point> <round>")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    config = load_config()
+    main()
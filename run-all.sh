@@ -8,13 +8,15 @@ DIR=$(dirname "${BASH_SOURCE[0]}")
 source ${DIR}/utils.sh
 
 usage() {
-    echo "Usage: $0 [--dry-run] [--no-test] [--protocols=LIST]"
+    echo "Usage: $0 [--dry-run] [--no-test] [--parallel] [--protocols=LIST]"
     echo "  --dry-run        Skip the experiments; only draw plots using existing data."
     echo "  --no-test        Disable the --test flag (run full experiments)."
+    echo "  --parallel       Run the experiments concurrently, as many as the host fits (see scheduler.py)."
     echo "  --protocols=LIST Override the list of protocols to run (comma-separated)."
 }
 
 dry_run=0
+parallel=0
 test_flag="--test"
 protocols_flag=""
 for arg in "$@"; do
@@ -25,6 +27,9 @@ for arg in "$@"; do
         --no-test)
             test_flag=""
             ;;
+        --parallel)
+            parallel=1
+            ;;
         --protocols=*)
             protocols_flag="$arg"
             ;;
@@ -47,6 +52,16 @@ scripts=(
     "ycsb.sh"
 )
 
+if [ "$dry_run" -eq 0 ] && [ "$parallel" -eq 1 ]; then
+    log "Running ${scripts[*]} concurrently ${test_flag} ${protocols_flag}..."
+    python3 ${DIR}/scheduler.py ${test_flag} ${protocols_flag} "${scripts[@]}" || {
+        log "ERROR: some experiments failed."
+        exit 1
+    }
+    log "All experiments completed successfully."
+    exit 0
+fi
+
 for script in "${scripts[@]}"; do
     if [ "$dry_run" -eq 0 ]; then	
 	log "Running ${script} ${test_flag} ${protocols_flag}..."
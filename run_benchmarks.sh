@@ -52,13 +52,241 @@ stop_network() {
 emulate_latency() {
     local num_dcs=$1
     local nodes_per_dc=${2:-$(config nodesperdc)}
-    python3 emulate_latency.py "$num_dcs" "$nodes_per_dc"
+    local report_file=$3
+    python3 emulate_latency.py "$num_dcs" "$nodes_per_dc" ${report_file}
     if [ $? -ne 0 ]; then
         error "Failed to add latency emulation."
         exit 1
     fi
 }
 
+# Prefix of the cluster.sh functions of the system running <protocol>
+get_pref() {
+    local protocol=$1
+    if printf '%s\n' "$protocol" | grep -wF -q -- "swiftpaxos"; then
+	echo swiftpaxos
+    elif printf '%s\n' "$protocol" | grep -wF -q -- "cockroachdb"; then
+	echo cockroachdb
+    elif printf '%s\n' "$protocol" | grep -wF -q -e "tiga" -e "calvin" -e "detock" -e "janus"; then
+	echo tiga
+    else
+	echo cassandra
+    fi
+}
+
+ycsb_create_schema() {
+    local protocol=$1
+    local replication_factor=$2
+    local workload_type=$3
+
+    local norm_protocol="$protocol"
+    if [[ "$norm_protocol" == tiga-* ]]; then
+        norm_protocol="${norm_protocol#tiga-}"
+    fi
+
+    if printf '%s\n' "$norm_protocol" | grep -wF -q -e "swiftpaxos" -e "tiga" -e "calvin" -e "detock" -e "janus";
+    then
+	true
+    elif printf '%s\n' "$protocol" | grep -wF -q -- "cockroachdb";
+    then
+	cockroachdb_create_usertable 10 "$replication_factor" "${node_count:-3}" "$workload_type"
+    else
+	local transaction_mode="bruh"
+	if [ "$protocol" == "accord" ]; then 
+	    transaction_mode="full"
+	fi
+	local nodes_per_dc=$(config nodesperdc)
+	cassandra_create_keyspace 3600 "${node_count:-3}" "$replication_factor" "${nodes_per_dc}"
+	cassandra_create_usertable 3600 "$transaction_mode" "${node_count:-3}" "$workload_type"
+    fi
+}
+
+# Load the YCSB dataset, from a snapshot of an identical deployment when one
+# exists (see snapshot.py); a fresh load is snapshotted for the next runs.
+load_dataset() {
+    if [ $# -lt 10 ]; then
+	echo "Usage: load_dataset <workload_type> <workload> <hosts> <port> <recordcount> <protocol> <replication_factor> <output_file> <threads> <num_dcs> [extra_ycsb_options]"
+	exit 1
+    fi
+    local workload_type=$1
+    local workload=$2
+    local hosts=$3
+    local port=$4
+    local recordcount=$5
+    local protocol=$6
+    local replication_factor=$7
+    local output_file=$8
+    local threads=$9
+    local num_dcs=${10}
+    shift 10
+
+    local nodes_per_dc=$(config nodesperdc)
+    local snapshot_args=("$protocol" "$replication_factor" "$num_dcs" "${nodes_per_dc:-1}" "$recordcount" "$workload_type")
+    local use_snapshot=$(config load_snapshot)
+
+    ycsb_create_schema "$protocol" "$replication_factor" "$workload_type"
+    if [ "${use_snapshot}" == "true" ]; then
+	if python3 ${DIR}/snapshot.py restore "${snapshot_args[@]}"; then
+	    log "Restored the ${recordcount} records of ${protocol} from a snapshot."
+	    return 0
+	fi
+    fi
+
+    # The keyspace is split into contiguous key number ranges
+    # (insertstart/insertcount), each loaded by its own client from the
+    # namespace of the first replica of a DC, round-robin.
+    local partitions=$(config load.partitions)
+    partitions=${partitions:-${num_dcs}}
+    local load_threads=$(config load.threads)
+    load_threads=${load_threads:-${threads}}
+    local retries=$(config load.retries)
+    retries=${retries:-0}
+
+    local pref=$(get_pref "$protocol")
+    local pending=$(seq 0 $((partitions - 1)))
+    local attempt=0
+    while [ -n "${pending}" ]; do
+	YCSB_SPEC_FILE="${output_file}.clients"
+	rm -f "${YCSB_SPEC_FILE}"
+	for p in ${pending}; do
+	    local start=$(( recordcount * p / partitions ))
+	    local count=$(( recordcount * (p + 1) / partitions - start ))
+	    local dc=$(get_location $(( p % num_dcs + 1 )) ${DIR}/latencies.csv)
+	    log "Loading records [${start}, $((start + count))) from ${dc} (partition ${p}, attempt ${attempt})"
+	    run_ycsb "load" "$workload_type" "$workload" "$hosts" "$port" "$recordcount" "$recordcount" "$protocol" "$replication_factor" "${output_file%.load}.p${p}.load" "$load_threads" "${PREFIX}ycsb-load-${p}" "${PREFIX}${dc}1" \
+		"$@" -p insertstart=${start} -p insertcount=${count}
+	done
+	python3 ${DIR}/orchestrate.py "${YCSB_SPEC_FILE}" || {
+	    error "Failed to launch the YCSB loaders."
+	    exit 1
+	}
+	rm -f "${YCSB_SPEC_FILE}"
+	unset YCSB_SPEC_FILE
+
+	# A partition is done when YCSB acknowledged all of its inserts
+	local failed=""
+	for p in ${pending}; do
+	    local count=$(( recordcount * (p + 1) / partitions - recordcount * p / partitions ))
+	    local ok=$(awk -F', ' '$1=="[INSERT]" && $2=="Return=OK" {print $3}' "${output_file%.load}.p${p}.load")
+	    if [ "${ok:-0}" -ne "${count}" ]; then
+		failed="${failed} ${p}"
+	    fi
+	done
+	# A retried partition fails the inserts of the keys it already loaded
+	# on the systems that refuse duplicate keys (e.g., CockroachDB): the
+	# load is then judged by the rows of the table
+	if [ -n "${failed}" ] && declare -F ${pref}_count_rows >/dev/null; then
+	    local loaded=$(${pref}_count_rows)
+	    if [ "${loaded:-0}" -eq "${recordcount}" ]; then
+		failed=""
+	    fi
+	fi
+	pending=${failed# }
+	if [ -n "${pending}" ]; then
+	    if [ ${attempt} -ge ${retries} ]; then
+		error "Partition(s) ${pending} of the load failed after ${attempt} retries."
+		break
+	    fi
+	    attempt=$((attempt + 1))
+	    log "Retrying the load of partition(s) ${pending}..."
+	fi
+    done
+
+    if declare -F ${pref}_count_rows >/dev/null; then
+	local rows=$(${pref}_count_rows)
+	if [ -z "${rows}" ]; then
+	    log "Could not count the rows of usertable; skipping the load verification."
+	elif [ "${rows}" -ne "${recordcount}" ]; then
+	    error "Loaded ${rows} rows instead of ${recordcount}."
+	    exit 1
+	else
+	    log "Loaded ${rows} rows."
+	fi
+    elif [ -n "${pending}" ]; then
+	exit 1
+    fi
+
+    if [ "${use_snapshot}" == "true" ]; then
+	python3 ${DIR}/snapshot.py save "${snapshot_args[@]}" || true
+    fi
+}
+
+# Locations of the YCSB clients: one per replica DC, unless
+# ycsb.client_placement=remote and ycsb.client_locations lists other ones.
+# A location may not be listed twice: the logs of a client are named after it.
+get_client_locations() {
+    local num_dcs=$1
+    local locations=$(config ycsb.client_locations | tr ',' ' ')
+    if [ "$(config ycsb.client_placement)" != "remote" ] || [ -z "${locations}" ]; then
+        locations=""
+        for i in $(seq 1 ${num_dcs}); do
+            locations="${locations} $(get_location $i ${DIR}/latencies.csv)"
+        done
+    fi
+    local duplicates=$(printf '%s\n' ${locations} | sort | uniq -d | tr '\n' ' ')
+    if [ -n "${duplicates}" ]; then
+        error "ycsb.client_locations lists ${duplicates% } more than once."
+        return 1
+    fi
+    echo ${locations}
+}
+
+# Replica a client located at <location> sends its requests to: the first
+# node of that DC if it hosts one, the nearest replica otherwise.
+nearest_replica() {
+    local location=$1
+    local num_dcs=$2
+    if [ "$(config ycsb.client_placement)" != "remote" ]; then
+        echo "${PREFIX}${location}1"
+        return 0
+    fi
+    local nearest
+    nearest=$(python3 - "${location}" "${num_dcs}" "${DIR}" <<'PYEOF'
+import csv, os, sys
+sys.path.insert(0, sys.argv[3])
+from emulate_latency import estimate_latency, haversine
+
+location = sys.argv[1]
+num_dcs = int(sys.argv[2])
+with open(os.path.join(sys.argv[3], 'latencies.csv'), newline='') as f:
+    locations = [(float(r['lat']), float(r['lon']), r['loc'].strip().strip('"')) for r in csv.DictReader(f)]
+
+lat, lon = next((la, lo) for la, lo, loc in locations if loc == location)
+# The replica with the lowest emulated latency (see emulate_latency.py)
+distances = {loc: haversine(lat, lon, la, lo) for la, lo, loc in locations[:num_dcs]}
+print(min(distances, key=lambda loc: (estimate_latency(distances[loc]), distances[loc])))
+PYEOF
+)
+    echo "${PREFIX}${nearest}1"
+}
+
+# With ycsb.client_placement=remote, every YCSB client runs in a namespace of
+# its own (held by the ycsb-<j>-ns container) to which emulate_latency applies
+# an access latency towards every replica.
+start_client_namespaces() {
+    local num_dcs=$1
+    if [ "$(config ycsb.client_placement)" != "remote" ]; then
+        return 0
+    fi
+    local locations
+    locations=$(get_client_locations ${num_dcs}) || return 1
+    stop_client_namespaces
+    local j=1
+    for location in ${locations}; do
+        log "Starting the network namespace of YCSB client ${j} at ${location}"
+        docker run --rm -d --name "${PREFIX}ycsb-${j}-ns" --network $(config network_name) --cap-add=NET_ADMIN --cap-add=NET_RAW $(container_labels namespace) \
+            --entrypoint sleep $(config ycsb_image) infinity >/dev/null || {
+            error "Failed to start the network namespace of YCSB client ${j}"
+            return 1
+        }
+        j=$((j + 1))
+    done
+}
+
+stop_client_namespaces() {
+    python3 ${DIR}/teardown.py namespace >/dev/null || true
+}
+
 run_ycsb() {
     if [ $# -lt 13 ]; then
 	echo "Usage: $0 <action> <workload_type> <workload> <hosts> <port> <recordcount> <operation_count> <protocol> <replication_factor> <output_file> <threads> <container_name> <network_adapter> [extra_ycsb_options]"
@@ -85,10 +313,6 @@ run_ycsb() {
         norm_protocol="${norm_protocol#tiga-}"
     fi
 
-    if [ "$action" == "load" ]; then
-        ycsb_threads=1 # FIXME CRDB parallel load is failing
-    fi
-    
     shift 13
     local extra_opts=( "$@" )
 
@@ -129,30 +353,35 @@ run_ycsb() {
     fi
     log ${extra_opts_str[@]}
 
-    local docker_args="--rm -d --security-opt apparmor=unconfined --network container:${nearby_database} --env-file=${output_file%.dat}.docker"
+    # Remote clients join their own namespace rather than the replica's one
+    local network_container=${nearby_database}
+    if [ "$action" == "run" ] && docker inspect "${container_name}-ns" >/dev/null 2>&1; then
+        network_container="${container_name}-ns"
+    fi
+
+    local role=client
+    if [ "$action" == "load" ]; then
+        role=loader
+    fi
+    local docker_args="--rm -d --security-opt apparmor=unconfined --network container:${network_container} --env-file=${output_file%.dat}.docker $(container_labels ${role})"
+    # Dedicated CPUs, off the cores of the co-located replica (see placement.py)
+    local cpuset=""
+    if [ "$(config cpu_pinning)" == "true" ]; then
+        cpuset=$(python3 ${DIR}/placement.py assign "${container_name}" "$(config ycsb.cpus)" "${nearby_database}")
+        if [ -n "${cpuset% *}" ]; then
+            docker_args+=" --cpuset-cpus ${cpuset% *} --cpuset-mems ${cpuset#* }"
+        fi
+    fi
     if printf '%s\n' "$norm_protocol" | grep -wF -q -e "tiga" -e "calvin" -e "detock" -e "janus"; then
-        docker_args+=" -v ${DIR}/tiga/config-ycsb.yml:/ycsb/config-ycsb.yml"
+        docker_args+=" -v $(tiga_config_file):/ycsb/config-ycsb.yml"
     fi
-    
-    if [ "$action" == "load" ];
-    then
-	if printf '%s\n' "$norm_protocol" | grep -wF -q -e "swiftpaxos" -e "tiga" -e "calvin" -e "detock" -e "janus";
-	then
-	    true
-	elif printf '%s\n' "$protocol" | grep -wF -q -- "cockroachdb";
-	then
-	    cockroachdb_create_usertable 10 "$replication_factor" "${node_count:-3}" "$workload_type"
-	else
-	    local transaction_mode="bruh"
-	    if [ "$protocol" == "accord" ]; then 
-		transaction_mode="full"
-	    fi
-	    local nodes_per_dc=$(config nodesperdc)
-	    cassandra_create_keyspace 3600 "${node_count:-3}" "$replication_factor" "${nodes_per_dc}"
-	    cassandra_create_usertable 3600 "$transaction_mode" "${node_count:-3}" "$workload_type"
-	fi
+    # GC and safepoint log of the client, next to its log (see gc_analysis.py)
+    local gc_volume=""
+    if [ "$(config gc.logging)" == "true" ] && [ "$action" == "run" ]; then
+        gc_volume="$(realpath "$(dirname "${output_file}")"):/gclogs"
+        docker_args+=" -v ${gc_volume}"
     fi
-
+    
     local ycsb_image=$(config ycsb_image)
     local ycsb_client="swiftpaxos"
 
@@ -218,6 +447,9 @@ run_ycsb() {
     if ! printf '%s\n' "$norm_protocol" | grep -wF -q -e "tiga" -e "calvin" -e "detock" -e "janus"; then
         java_opts+=" -Ddatastax-java-driver.advanced.request.trace.attempts=100 -Ddatastax-java-driver.advanced.request.trace.interval=100ms"
     fi
+    if [ -n "${gc_volume}" ]; then
+        java_opts+=" $(python3 ${DIR}/gc_analysis.py options "/gclogs/$(basename "${output_file%.dat}").gc.log")"
+    fi
 
     echo -e "JAVA_OPTS=${java_opts}\n\
 YCSB_COMMAND=${action}\n\
@@ -226,8 +458,29 @@ YCSB_WORKLOAD=/ycsb/workloads/workload${workload}\n\
 YCSB_RECORDCOUNT=${recordcount}\n\
 YCSB_OPERATIONCOUNT=${operationcount}\n\
 YCSB_THREADS=${ycsb_threads}\n\
-YCSB_OPTS=-s -p core_workload_insertion_retry_limit=10 -p fieldcount=1 -p fieldlength=4000 -p workload=${workload_type} -p workload=${workload_type} -p measurementtype=hdrhistogram -p hdrhistogram.fileoutput=false -p hdrhistogram.percentiles=$(seq -s, 1 100) ${extra_opts_str}" > ${output_file%.dat}.docker
+YCSB_OPTS=-s -p core_workload_insertion_retry_limit=10 -p fieldcount=1 -p fieldlength=4000 -p workload=${workload_type} -p workload=${workload_type} -p measurementtype=hdrhistogram -p hdrhistogram.fileoutput=false -p hdrhistogram.percentiles=$(seq -s, 1 100) -p status.interval=$(config ycsb.status_interval) ${extra_opts_str}" > ${output_file%.dat}.docker
     
+    # The clients of a measurement window, or the loaders of a partitioned
+    # load, are launched together by orchestrate.py
+    if [ -n "${YCSB_SPEC_FILE}" ]; then
+        local volumes=""
+        if printf '%s\n' "$norm_protocol" | grep -wF -q -e "tiga" -e "calvin" -e "detock" -e "janus"; then
+            volumes="\"$(tiga_config_file):/ycsb/config-ycsb.yml\""
+        fi
+        if [ -n "${gc_volume}" ]; then
+            volumes+="${volumes:+, }\"${gc_volume}\""
+        fi
+        local cpuset_cpus="" cpuset_mems=""
+        if [ -n "${cpuset% *}" ]; then
+            cpuset_cpus="${cpuset% *}"
+            cpuset_mems="${cpuset#* }"
+        fi
+        printf '{"name": "%s", "image": "%s", "network": "%s", "env_file": "%s", "log_file": "%s", "volumes": [%s], "cpuset_cpus": "%s", "cpuset_mems": "%s", "labels": {"exp.owner": "%s", "exp.role": "%s"}}\n' \
+            "${container_name}" "${ycsb_image}" "${network_container}" "${output_file%.dat}.docker" "${output_file}" "${volumes}" "${cpuset_cpus}" "${cpuset_mems}" "${PREFIX:-default}" "${role}" >> "${YCSB_SPEC_FILE}"
+        log "YCSB $action of ${container_name} scheduled."
+        return 0
+    fi
+
     start_container ${ycsb_image} ${container_name} "Starting" ${output_file} ${docker_args}
 
     if [ $? -eq 0 ]; then
@@ -236,11 +489,125 @@ YCSB_OPTS=-s -p core_workload_insertion_retry_limit=10 -p fieldcount=1 -p fieldl
         log "Error launching YCSB $action."
         exit 1
     fi
+
+    # Time series of the status lines of the client, while it runs
+    if [ "$action" == "run" ] && [[ "${output_file}" == *.dat ]]; then
+        python3 ${DIR}/timeseries.py follow ${container_name} ${output_file%.dat}.ts.csv &
+    fi
+}
+
+# YCSB options of the <i>-th of <num_clients> clients of an open-loop run at
+# the aggregate rate <target> (ops/s): its share of the rate, the aggregate
+# rate (exp.target, which the results report, as the shares may differ), and
+# the latencies measured both from the actual start of each operation
+# (service time) and from its scheduled start (response time, reported as
+# INTENDED-<op>), so that a slow system does not hide the operations it
+# delayed (coordinated omission).  The rate must be at least 1 op/s per
+# client, as YCSB does not throttle a client with a target of 0.
+split_target() {
+    local target=$1
+    local num_clients=$2
+    local i=$3
+    local share=$(( target / num_clients + (i <= target % num_clients ? 1 : 0) ))
+    if [ ${share} -le 0 ]; then
+        error "A target of ${target} ops/s leaves no rate to client ${i} of ${num_clients}."
+        return 1
+    fi
+    echo "-target ${share} -p exp.target=${target} -p measurement.interval=both"
+}
+
+# Ledger of the completed points of the experiment writing to <dir> (see
+# ledger.py), started over with <fresh>=1.  The containers left over by an
+# interrupted sweep are removed.
+init_ledger() {
+    local dir=$1
+    local fresh=$2
+    LEDGER="${dir}/ledger.jsonl"
+    mkdir -p "${dir}"
+    if [ "${fresh}" -eq 1 ]; then
+        rm -f "${LEDGER}"
+    fi
+    teardown_cluster >/dev/null || true
+    stop_client_namespaces
+}
+
+# Output file of <point> when it is complete (exit code 0), nothing otherwise.
+point_output() {
+    python3 ${DIR}/ledger.py output "${LEDGER}" "$1"
+}
+
+# Record <point> as complete, with all the files of its run into <output_file>
+# and the extra artifacts, if any.
+record_point() {
+    local point=$1
+    local output_file=$2
+    shift 2
+    python3 ${DIR}/ledger.py record "${LEDGER}" "${point}" "${output_file}" "${output_file%.dat}"* "$@"
+}
+
+# The protocols in the order of round <round> of a repeated experiment (see
+# repeat.py).
+round_order() {
+    python3 ${DIR}/repeat.py order "$@"
+}
+
+# Whether <point> needs no run in round <round>: its run of the round is
+# complete, or its previous runs are stable or as many as repeat.max.
+point_done() {
+    python3 ${DIR}/repeat.py done "${LEDGER}" "$1" "$2"
+}
+
+# Delete the files of <dir> matching <glob> that belong to no complete point.
+prune_logs() {
+    python3 ${DIR}/ledger.py prune "${LEDGER}" "$1" "$2"
+}
+
+# Sample the resource usage of the containers of the experiment into
+# <output_file>_telemetry.csv, until stop_telemetry (see telemetry.py), and
+# the internal metrics of system <pref>, when it defines <pref>_start_metrics.
+start_telemetry() {
+    local output_file=$1
+    local pref=$2
+    python3 ${DIR}/telemetry.py record "${output_file%.dat}_telemetry.csv" &
+    TELEMETRY_PID=$!
+    if declare -F ${pref}_start_metrics >/dev/null; then
+        ${pref}_start_metrics "${output_file}"
+    fi
+}
+
+# Stop the sampling of the run into <output_file> (and of the metrics of
+# system <pref>), and summarize its
+# utilization into <output_file>_resource_usage.dat.
+stop_telemetry() {
+    local output_file=$1
+    local pref=$2
+    if declare -F ${pref}_stop_metrics >/dev/null; then
+        ${pref}_stop_metrics
+    fi
+    if [ -z "${TELEMETRY_PID}" ]; then
+        return 0
+    fi
+    kill ${TELEMETRY_PID} 2>/dev/null
+    wait ${TELEMETRY_PID} 2>/dev/null
+    unset TELEMETRY_PID
+    python3 ${DIR}/telemetry.py summary "${output_file%.dat}_telemetry.csv" > "${output_file%.dat}_resource_usage.dat"
+}
+
+# Record the settings a run uses (see exp_config.py) next to its logs,
+# read-only, as <output_file>.config.
+save_run_config() {
+    local output_file=$1
+    local config_file="${output_file%.dat}.config"
+    rm -f "${config_file}"
+    python3 ${DIR}/exp_config.py dump > "${config_file}"
+    chmod a-w "${config_file}"
 }
 
 run_benchmark() {    
     if [ $# -lt 11 ]; then
 	echo "Usage: $0 <protocol> <number_of_threads> <node_count> <replication_factor> <workload_type> <workload> <record_count> <operation_count> <output_file> <do_create_and_load> <do_clean_up> [EXTRA_YCSB_OPTS...]"
+	echo "  -target <ops/s> among EXTRA_YCSB_OPTS runs open-loop at this aggregate rate (see split_target)."
+	echo "  -warmup auto among EXTRA_YCSB_OPTS warms the system up until it is steady (see steady_state.py)."
 	exit 1
     fi
 
@@ -259,25 +626,37 @@ run_benchmark() {
     do_create_and_load=${10}
     do_clean_up=${11}
     nodes_per_dc=$(config nodesperdc)
-
+    save_run_config "${output_file}"
+
+    # -target is the aggregate offered load of an open-loop run; it is
+    # split across the clients below, and the load is not throttled.
+    # -warmup auto replaces the warmup period of the clients by a warmup
+    # that lasts until the system is steady
+    target=""
+    warmup=""
+    EXTRA_YCSB_OPTS=()
     if [ $# -gt 11 ]; then
-	EXTRA_YCSB_OPTS=( "${@:12}" )
-    else
-	EXTRA_YCSB_OPTS=()
+	local opts=( "${@:12}" )
+	local k=0
+	while [ $k -lt ${#opts[@]} ]; do
+	    if [ "${opts[$k]}" == "-target" ] && [ $((k+1)) -lt ${#opts[@]} ]; then
+		target=${opts[$((k+1))]}
+		k=$((k+2))
+	    elif [ "${opts[$k]}" == "-warmup" ] && [ $((k+1)) -lt ${#opts[@]} ]; then
+		warmup=${opts[$((k+1))]}
+		k=$((k+2))
+	    else
+		EXTRA_YCSB_OPTS+=("${opts[$k]}")
+		k=$((k+1))
+	    fi
+	done
     fi
 
-    pref=cassandra
-    if printf '%s\n' "$protocol" | grep -wF -q -- "swiftpaxos"; then	
-	pref=swiftpaxos
-	if [ "${nodes_per_dc:-1}" -gt 1 ]; then
-	    error "swiftpaxos protocol does not support nodesperdc > 1 (current nodesperdc=${nodes_per_dc})."
-	    exit 1
-	fi
-    elif printf '%s\n' "$protocol" | grep -wF -q -- "cockroachdb"; then
-	pref=cockroachdb
-    elif printf '%s\n' "$protocol" | grep -wF -q -e "tiga" -e "calvin" -e "detock" -e "janus"; then
-	pref=tiga
-    fi   
+    pref=$(get_pref "$protocol")
+    if [ "${pref}" == "swiftpaxos" ] && [ "${nodes_per_dc:-1}" -gt 1 ]; then
+	error "swiftpaxos protocol does not support nodesperdc > 1 (current nodesperdc=${nodes_per_dc})."
+	exit 1
+    fi
 
     log "Running ${workload_type} ${workload^^} for ${dc_count} DC(s) with ${nodes_per_dc} node(s)/DC..."
 
@@ -296,13 +675,13 @@ run_benchmark() {
 		exit 1
 	fi
 
-	first_dc=$(get_location 1 ${DIR}/latencies.csv)
-	nearby_database="${first_dc}1"
-	run_ycsb "load" "$workload_type" "$workload" "$hosts" "$port" "$record_count" "$operation_count" "$protocol" "$replication_factor" "${output_file%.dat}.load" "$nthreads" "ycsb" "${nearby_database}" "${EXTRA_YCSB_OPTS[@]}"
-	wait_container "ycsb"
+	load_dataset "$workload_type" "$workload" "$hosts" "$port" "$record_count" "$protocol" "$replication_factor" "${output_file%.dat}.load" "$nthreads" "${num_dcs}" "${EXTRA_YCSB_OPTS[@]}"
+	reset_fast_path_counters "${pref}" "${num_dcs}"
+
+	start_client_namespaces "${num_dcs}" || exit 1
 
 	log "Emulating latency for ${num_dcs} DC(s) with ${nodes_per_dc} node(s)/DC..."
-	emulate_latency "${num_dcs}" "${nodes_per_dc}"
+	emulate_latency "${num_dcs}" "${nodes_per_dc}" "${output_file%.dat}_rtt.csv"
     fi
 
     num_dcs=$(${pref}_get_node_count)
@@ -314,73 +693,115 @@ run_benchmark() {
         exit 1
     fi
 
-    for i in $(seq 1 1 ${num_dcs});
+    client_locations=$(get_client_locations ${num_dcs}) || exit 1
+    num_clients=$(echo ${client_locations} | wc -w)
+
+    YCSB_SPEC_FILE="${output_file%.dat}.clients"
+    rm -f "${YCSB_SPEC_FILE}"
+
+    i=1
+    for location in ${client_locations};
     do
-        location=$(get_location $i ${DIR}/latencies.csv)
-        nearby_database="${location}1"
-        log ${location}
+        nearby_database=$(nearest_replica ${location} ${num_dcs})
+        log "${location} (coordinator ${nearby_database})"
 
         EXTRA_YCSB_OPTS2=("${EXTRA_YCSB_OPTS[@]}")
         if [ "${workload_type}" == "site.ycsb.workloads.ConflictWorkload" ]; 
         then
             EXTRA_YCSB_OPTS2+=("-p")
-            EXTRA_YCSB_OPTS2+=("conflict.shift=$(( (record_count / num_dcs) * (i - 1) ))")
+            EXTRA_YCSB_OPTS2+=("conflict.shift=$(( (record_count / num_clients) * (i - 1) ))")
         fi
-
-        run_ycsb "run" "$workload_type" "$workload" "$hosts" "$port" "$record_count" "$operation_count" "$protocol" "$replication_factor" "${output_file%.dat}_${location}.dat" "$nthreads" "ycsb-${i}" "${nearby_database}" "${EXTRA_YCSB_OPTS2[@]}"
-    done
-    
-    for i in $(seq 1 1 ${num_dcs});
-    do
-        wait_container "ycsb-${i}"
+        if [ -n "${target}" ]; then
+            local target_opts
+            target_opts=$(split_target "${target}" "${num_clients}" "${i}") || exit 1
+            EXTRA_YCSB_OPTS2+=(${target_opts})
+        fi
+        run_ycsb "run" "$workload_type" "$workload" "$hosts" "$port" "$record_count" "$operation_count" "$protocol" "$replication_factor" "${output_file%.dat}_${location}.dat" "$nthreads" "${PREFIX}ycsb-${i}" "${nearby_database}" "${EXTRA_YCSB_OPTS2[@]}"
+        i=$((i + 1))
     done
 
-    local fast_path_script="${DIR}/${pref}/${pref}_fast_path.sh"
-
-    local fast_ratio_sum=0
-    local medium_ratio_sum=0
-    local slow_ratio_sum=0
-    local ephemeral_ratio_sum=0
-    local ratio_count=0
-
+    local replicas=()
     for i in $(seq 1 1 ${num_dcs}); do
-        location=$(get_location $i ${DIR}/latencies.csv)
-        container_name="${location}1"
-        fp_output=$("${fast_path_script}" "${container_name}" 2>/dev/null) || true
-
-        fp_fast=$(echo "$fp_output" | grep "^Fast ratio:" | awk '{print $3}')
-        fp_medium=$(echo "$fp_output" | grep "^Medium ratio:" | awk '{print $3}')
-        fp_slow=$(echo "$fp_output" | grep "^Slow ratio:" | awk '{print $3}')
-        fp_ephemeral=$(echo "$fp_output" | grep "^Ephemeral ratio:" | awk '{print $3}')
-
-        fp_fast=${fp_fast:-0}
-        fp_medium=${fp_medium:-0}
-        fp_slow=${fp_slow:-0}
-        fp_ephemeral=${fp_ephemeral:-0}
-
-        fast_ratio_sum=$(awk "BEGIN {printf \"%.4f\", ${fast_ratio_sum} + ${fp_fast}}")
-        medium_ratio_sum=$(awk "BEGIN {printf \"%.4f\", ${medium_ratio_sum} + ${fp_medium}}")
-        slow_ratio_sum=$(awk "BEGIN {printf \"%.4f\", ${slow_ratio_sum} + ${fp_slow}}")
-        ephemeral_ratio_sum=$(awk "BEGIN {printf \"%.4f\", ${ephemeral_ratio_sum} + ${fp_ephemeral}}")
-        ratio_count=$((ratio_count + 1))
+        replicas+=("${PREFIX}$(get_location $i ${DIR}/latencies.csv)1")
     done
 
-    if [ $ratio_count -gt 0 ]; then
-        {
-            echo "Fast ratio: $(awk "BEGIN {printf \"%.4f\", ${fast_ratio_sum} / ${ratio_count}}")"
-            echo "Medium ratio: $(awk "BEGIN {printf \"%.4f\", ${medium_ratio_sum} / ${ratio_count}}")"
-            echo "Slow ratio: $(awk "BEGIN {printf \"%.4f\", ${slow_ratio_sum} / ${ratio_count}}")"
-            echo "Ephemeral ratio: $(awk "BEGIN {printf \"%.4f\", ${ephemeral_ratio_sum} / ${ratio_count}}")"
-        } > "${output_file%.dat}_fast_path_ratio.dat"
+    if [ "$(config cpu_pinning)" == "true" ]; then
+        python3 ${DIR}/placement.py show "${PREFIX}" > "${output_file%.dat}_placement.json"
+    fi
+
+    # The clients keep running once steady and are measured from there, in
+    # the same run (see orchestrate.py)
+    local steady_opts=()
+    if [ "${warmup}" == "auto" ]; then
+        steady_opts=(--warmup="${output_file%.dat}_warmup.csv")
     fi
 
+    log "Running ${num_clients} YCSB client(s)..."
+    start_telemetry "${output_file}" "${pref}"
+    local status=0
+    python3 ${DIR}/orchestrate.py "${steady_opts[@]}" "${YCSB_SPEC_FILE}" "${DIR}/${pref}/${pref}_fast_path.sh" "${output_file%.dat}_fast_path_ratio.dat" "${replicas[@]}" || status=1
+    stop_telemetry "${output_file}" "${pref}"
+    if [ "$(config gc.logging)" == "true" ]; then
+        python3 ${DIR}/gc_analysis.py run "${output_file}"
+    fi
+    if [ ${status} -ne 0 ]; then
+        error "The YCSB clients failed."
+        exit 1
+    fi
+    rm -f "${YCSB_SPEC_FILE}"
+    unset YCSB_SPEC_FILE
+
     if [ $do_clean_up == "1" ];
     then
+        stop_client_namespaces
         ${pref}_cleanup_cluster ${num_dcs}
         stop_network
     fi
 }
 
+# Record the current coordinator counters, so that the ratios of the next run
+# only account for its own transactions (only Cassandra keeps a baseline).
+reset_fast_path_counters() {
+    local pref=$1
+    local num_dcs=$2
+    if [ "${pref}" != "cassandra" ]; then
+        return 0
+    fi
+    for i in $(seq 1 1 ${num_dcs}); do
+        "${DIR}/${pref}/${pref}_fast_path.sh" "${PREFIX}$(get_location $i ${DIR}/latencies.csv)1" --baseline >/dev/null 2>&1 &
+    done
+    wait
+}
+
+# Bring the data of a running deployment back to its freshly loaded state,
+# so that the next point of a sweep reuses the warm cluster: the table is
+# recreated and reloaded (from its snapshot when there is one).
+reset_benchmark() {
+    if [ $# -lt 7 ]; then
+	echo "Usage: $0 <protocol> <replication_factor> <workload_type> <workload> <record_count> <threads> <output_file> [EXTRA_YCSB_OPTS...]"
+	exit 1
+    fi
+
+    local protocol=$1
+    local replication_factor=$2
+    local workload_type=$3
+    local workload=$4
+    local record_count=$5
+    local threads=$6
+    local output_file=$7
+    shift 7
+
+    local pref=$(get_pref "$protocol")
+    local num_dcs=$(${pref}_get_node_count)
+    local nodes_per_dc=$(config nodesperdc)
+    local hosts=$(${pref}_get_hosts "${num_dcs}" "${nodes_per_dc}")
+    local port=$(${pref}_get_port)
+
+    log "Resetting the ${protocol} deployment with ${num_dcs} DC(s)..."
+    load_dataset "$workload_type" "$workload" "$hosts" "$port" "$record_count" "$protocol" "$replication_factor" "${output_file%.dat}.load" "$threads" "${num_dcs}" "$@"
+    reset_fast_path_counters "${pref}" "${num_dcs}"
+}
+
 stop_benchmark() {
     if [ $# -lt 2 ]; then
 	echo "Usage: $0 <protocol> <dc_count>"
@@ -390,15 +811,9 @@ stop_benchmark() {
     protocol=$1
     dc_count=$2
 
-    pref=cassandra
-    if printf '%s\n' "$protocol" | grep -wF -q -- "swiftpaxos"; then	
-	pref=swiftpaxos
-    elif printf '%s\n' "$protocol" | grep -wF -q -- "cockroachdb"; then
-	pref=cockroachdb
-    elif printf '%s\n' "$protocol" | grep -wF -q -e "tiga" -e "calvin" -e "detock" -e "janus"; then
-	pref=tiga
-    fi
-    
+    pref=$(get_pref "$protocol")
+
+    stop_client_namespaces
     ${pref}_cleanup_cluster ${dc_count}
     stop_network
 }
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Adaptive search of the saturation point (knee) of a latency vs throughput curve.
+
+Given the runs already measured for a protocol, prints the load of the next
+run, or nothing when the knee is located.  The load is the number of client
+threads of a closed-loop run, or the offered load (ops/s) of an open-loop one.
+The search:
+  1. brackets the knee, doubling the load from the first run until a run is
+     saturated (or the maximal load is reached);
+  2. bisects (geometrically) the bracket [last unsaturated, first saturated]
+     until it is narrower than saturation.resolution (relative), which refines
+     the curve around the knee.
+A run is saturated when its p50 (resp. p99) latency exceeds
+saturation.p50_factor (resp. saturation.p99_factor) times the one of the
+lightest run, or when its throughput is not at least saturation.min_gain
+higher than the best throughput of the lighter runs.  A run without results
+(e.g., failed, or with no parsable percentiles) is saturated.
+
+The metrics are the ones of parse_ycsb_to_csv.sh: the throughput is summed
+over the DCs, and the p50/p99 latencies (of the histograms of YCSB) are the
+worst over the DCs.  The latencies of an open-loop run are its response times
+(the INTENDED-<op> rows), which include the time an operation waited for its
+turn once the system is saturated.  The search is deterministic given the
+runs, so a resumed sweep (see ledger.py) walks the same points.
+
+Usage: python3 saturation.py next <min_load> <max_load> [<load>:<output_file>...]
+       python3 saturation.py show [<load>:<output_file>...]
+"""
+
+import csv
+import glob
+import io
+import math
+import os
+import subprocess
+import sys
+from datetime import datetime
+from exp_config import load_config
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+
+config = {}
+
+
+def debug(msg):
+    # stdout carries the next load
+    if config.get("debug", 1):
+        timestamp = datetime.now().strftime("%s:%f")
+        print(f"[{timestamp}] \033[32m{msg}\033[0m", file=sys.stderr)
+
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def measure(output_file):
+    """(throughput, p50, p99) of the run into *output_file*, or None when it has no results."""
+    base = output_file[:-len(".dat")] if output_file.endswith(".dat") else output_file
+    files = [f for f in glob.glob(f"{glob.escape(base)}_*.dat")
+             if not f.endswith(("_fast_path_ratio.dat", "_resource_usage.dat"))]
+    if not files:
+        return None
+    parsed = subprocess.run([os.path.join(DIR, "parse_ycsb_to_csv.sh")] + sorted(files),
+                            capture_output=True, text=True, check=True).stdout
+    rows = list(csv.DictReader(io.StringIO(parsed)))
+    tput = {}
+    for row in rows:
+        dc_tput = to_float(row["tput"])
+        if dc_tput is not None:
+            tput[row["dc"]] = dc_tput
+    intended = [row for row in rows if row["op"].startswith("intended-")]
+    rows = intended or rows
+    p50 = [v for v in (to_float(row["p50"]) for row in rows) if v is not None]
+    p99 = [v for v in (to_float(row["p99"]) for row in rows) if v is not None]
+    if not tput or not p50 or not p99:
+        return None
+    return sum(tput.values()), max(p50), max(p99)
+
+
+def saturated_runs(runs):
+    """{load: saturated} of *runs*, {load: (throughput, p50, p99), or None without results}."""
+    result = {load: True for load, metrics in runs.items() if metrics is None}
+    loads = sorted(load for load in runs if load not in result)
+    if not loads:
+        return result
+    _, base_p50, base_p99 = runs[loads[0]]
+    p50_factor = float(config.get("saturation.p50_factor", 1.5))
+    p99_factor = float(config.get("saturation.p99_factor", 3))
+    min_gain = float(config.get("saturation.min_gain", 0.05))
+    result[loads[0]] = False
+    best = runs[loads[0]][0]
+    for load in loads[1:]:
+        tput, p50, p99 = runs[load]
+        result[load] = (p50 > p50_factor * base_p50 or p99 > p99_factor * base_p99
+                     or tput < (1 + min_gain) * best)
+        best = max(best, tput)
+    return result
+
+
+def next_load(runs, min_load, max_load):
+    """Load of the next run, or None when the knee is located."""
+    if not runs:
+        return min_load
+    saturated = saturated_runs(runs)
+    unsaturated = [load for load in sorted(runs) if not saturated[load]]
+    if not unsaturated:
+        debug(f"No results at a load of {min(runs)}.")
+        return None
+    above = [load for load in sorted(runs) if saturated[load] and load > unsaturated[-1]]
+    lo = unsaturated[-1]
+    if not above:
+        if lo >= max_load:
+            debug(f"Not saturated at a load of {max_load}.")
+            return None
+        return min(2 * lo, max_load)
+    hi = above[0]
+    resolution = float(config.get("saturation.resolution", 0.1))
+    mid = int(round(math.sqrt(lo * hi)))
+    if hi - lo <= max(1, resolution * lo) or mid in (lo, hi):
+        debug(f"Knee between a load of {lo} and {hi}.")
+        return None
+    return mid
+
+
+def parse_runs(args):
+    runs = {}
+    for arg in args:
+        load, output_file = arg.split(":", 1)
+        metrics = measure(output_file)
+        if metrics is None:
+            debug(f"No results in {output_file}, taken as saturated.")
+        runs[int(load)] = metrics
+    return runs
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) >= 3 and args[0] == "next":
+        runs = parse_runs(args[3:])
+        load = next_load(runs, int(args[1]), int(args[2]))
+        if load in runs:
+            # The caller would run it again, forever
+            debug(f"Load {load} already measured.")
+            sys.exit(1)
+        if load is not None:
+            print(load)
+    elif len(args) >= 1 and args[0] == "show":
+        runs = parse_runs(args[1:])
+        saturated = saturated_runs(runs) if runs else {}
+        print("load,tput,p50,p99,saturated")
+        for load in sorted(runs):
+            if runs[load] is None:
+                print(f"{load},NA,NA,NA,1")
+                continue
+            tput, p50, p99 = runs[load]
+            print(f"{load},{tput:.2f},{p50:g},{p99:g},{int(saturated[load])}")
+    else:
+        print(f"Usage: {sys.argv[0]} next <min_load> <max_load> [<load>:<output_file>...] | show [<load>:<output_file>...]")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    config = load_config()
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Run the experiments concurrently, packed on the host by container footprint.
+
+Each experiment runs the nodes of its largest deployment with the CPU and
+memory limits of a gcp.csv machine type (get_resource_limits in utils.sh), so
+its footprint is (#DCs x nodesperdc) times that machine, plus ycsb.cpus CPUs
+and CLIENT_MEM_GB for each YCSB client or loader (whichever are more, as the
+loaders exit before the clients start), plus NAMESPACE_MEM_GB for the network
+namespace of each remote client.  The number of DCs is read from the script
+itself: the largest of its `nodes=` and `dc_counts=` assignments, the ones of
+its `if [ "$test_run" -eq 1 ]` block with --test.
+
+Experiments are started in order as long as the sum of the footprints of the
+running ones fits the CPUs and memory of the host.  An experiment larger than
+the host (or without a machine type, hence without limits) is only started
+once no other one runs, and no other one starts until it is done.
+
+Every experiment overrides two settings through the environment (see
+exp_config.py): its containers are prefixed with its name (container_prefix)
+and attached to a network of their own (network_name), so the experiments do
+not collide; exp.config itself is never modified.  With
+--test, the experiments size their machine type for a 1/<slots> share of the
+host (EXP_HOST_CPUS/EXP_HOST_MEM_GB, see compute_test_machine).
+
+Usage: python3 scheduler.py [--test] [--slots=N] [--protocols=LIST] [experiment.sh...]
+
+The output of each experiment goes to logs/scheduler/<experiment>.log.
+"""
+
+import csv
+import os
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime
+from exp_config import load_config
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEDULER_DIR = os.path.join(DIR, "logs", "scheduler")
+
+EXPERIMENTS = ["cdf.sh", "closed_economy.sh", "ephemeral.sh", "conflict.sh", "fault_tolerance.sh",
+               "latency_throughput.sh", "swap.sh", "ycsb.sh"]
+# Memory of a YCSB JVM, and of the sleeping container of a client namespace
+CLIENT_MEM_GB = 1.0
+NAMESPACE_MEM_GB = 0.05
+DC_COUNT = re.compile(r'^\s*(?:nodes|dc_counts)="?([\d ]+)"?\s*(?:#.*)?$')
+TEST_BLOCK = re.compile(r'^if \[ "\$test_run" -eq 1 \]; then')
+
+
+def debug(msg):
+    if config.get("debug", 1):
+        timestamp = datetime.now().strftime("%s:%f")
+        print(f"[{timestamp}] \033[32m{msg}\033[0m")
+
+
+def log(msg):
+    timestamp = datetime.now().strftime("%s:%f")
+    print(f"[{timestamp}] \033[33m{msg}\033[0m")
+
+
+def read_machines():
+    with open(os.path.join(DIR, "gcp.csv"), newline="") as f:
+        return {row["name"]: (float(row["vcpus"]), float(row["memory"])) for row in csv.DictReader(f)}
+
+
+def host_capacity():
+    with open("/proc/meminfo") as f:
+        mem_kb = next(int(line.split()[1]) for line in f if line.startswith("MemTotal:"))
+    return float(os.cpu_count()), mem_kb / 1048576
+
+
+def test_machine(machines, total_nodes, mem_gb):
+    """The machine type compute_test_machine picks for *total_nodes* nodes in *mem_gb*."""
+    fitting = [(cpus, mem) for cpus, mem in machines.values() if mem * total_nodes <= mem_gb]
+    return max(fitting, key=lambda m: m[0]) if fitting else None
+
+
+def dc_count(script, test_run):
+    """Number of DCs of the largest deployment of *script*."""
+    full, test = [], []
+    in_test = False
+    with open(os.path.join(DIR, script)) as f:
+        for line in f:
+            if TEST_BLOCK.match(line):
+                in_test = True
+            elif in_test and re.match(r"^fi\b", line):
+                in_test = False
+            m = DC_COUNT.match(line)
+            if m:
+                (test if in_test else full).extend(int(n) for n in m.group(1).split())
+    counts = (test or full) if test_run else full
+    if not counts:
+        raise ValueError(f"No nodes= or dc_counts= assignment in {script}")
+    return max(counts)
+
+
+def footprint(script, machines, test_run, share):
+    """(CPUs, memory in GB) used by the containers of *script*."""
+    num_dcs = dc_count(script, test_run)
+    nodes_per_dc = int(config.get("nodesperdc", 1) or 1)
+    total_nodes = num_dcs * nodes_per_dc
+    spec = test_machine(machines, total_nodes, share[1]) if test_run else machines.get(config.get("machine", ""))
+    if spec is None:
+        # No limit: the experiment may use the whole host
+        return float("inf"), float("inf")
+    locations = [loc for loc in str(config.get("ycsb.client_locations", "")).split(",") if loc]
+    remote = config.get("ycsb.client_placement") == "remote" and locations
+    clients = len(locations) if remote else num_dcs
+    loaders = int(config.get("load.partitions", 0) or num_dcs)
+    ycsb = max(clients, loaders)
+    namespaces = clients if remote else 0
+    return (total_nodes * spec[0] + ycsb * float(config.get("ycsb.cpus", 1)),
+            total_nodes * spec[1] + ycsb * CLIENT_MEM_GB + namespaces * NAMESPACE_MEM_GB)
+
+
+def isolation_settings(script):
+    """Environment overrides giving *script* its own container prefix and network."""
+    name = script[:-len(".sh")].replace("_", "-")
+    return {"EXP_CFG_container_prefix": f"{name}-",
+            "EXP_CFG_network_name": f"{config['network_name']}-{name}"}
+
+
+def schedule(scripts, args, test_run, slots):
+    os.makedirs(SCHEDULER_DIR, exist_ok=True)
+    machines = read_machines()
+    capacity = host_capacity()
+    share = (capacity[0] / slots, capacity[1] / slots)
+    footprints = {s: footprint(s, machines, test_run, share) for s in scripts}
+
+    pending = list(scripts)
+    running = {}
+    failed = []
+    while pending or running:
+        used_cpus = sum(footprints[s][0] for s in running.values())
+        used_mem = sum(footprints[s][1] for s in running.values())
+        for script in list(pending):
+            cpus, mem = footprints[script]
+            fits = used_cpus + cpus <= capacity[0] and used_mem + mem <= capacity[1]
+            if not fits and running:
+                continue
+            env = dict(os.environ, **isolation_settings(script))
+            if test_run:
+                env["EXP_HOST_CPUS"] = str(int(share[0]))
+                env["EXP_HOST_MEM_GB"] = f"{share[1]:.6f}"
+            out = open(os.path.join(SCHEDULER_DIR, f"{script[:-len('.sh')]}.log"), "w")
+            proc = subprocess.Popen(["bash", os.path.join(DIR, script)] + args, env=env, cwd=DIR,
+                                    stdout=out, stderr=subprocess.STDOUT)
+            out.close()
+            running[proc.pid] = script
+            pending.remove(script)
+            used_cpus += cpus
+            used_mem += mem
+            log(f"Started {script} (pid {proc.pid}, {cpus:g} CPUs, {mem:g}GB); "
+                f"{used_cpus:g}/{capacity[0]:g} CPUs, {used_mem:.1f}/{capacity[1]:.1f}GB in use")
+
+        pid, status = os.wait()
+        script = running.pop(pid, None)
+        if script is None:
+            continue
+        code = os.waitstatus_to_exitcode(status)
+        if code == 0:
+            log(f"{script} completed successfully.")
+        else:
+            log(f"ERROR: {script} failed (code {code}), see {SCHEDULER_DIR}/{script[:-len('.sh')]}.log")
+            failed.append(script)
+    return failed
+
+
+def main():
+    test_run = "--test" in sys.argv[1:]
+    slots = 2
+    args = ["--test"] if test_run else []
+    scripts = []
+    for arg in sys.argv[1:]:
+        if arg.startswith("--slots="):
+            slots = max(1, int(arg.split("=", 1)[1]))
+        elif arg.startswith("--protocols="):
+            args.append(arg)
+        elif arg in EXPERIMENTS:
+            scripts.append(arg)
+        elif arg != "--test":
+            print(f"Usage: {sys.argv[0]} [--test] [--slots=N] [--protocols=LIST] [experiment.sh...]")
+            sys.exit(1)
+
+    start = time.time()
+    failed = schedule(scripts or list(EXPERIMENTS), args, test_run, slots)
+    debug(f"All experiments done in {time.time() - start:.0f}s.")
+    if failed:
+        log(f"ERROR: {' '.join(failed)} failed.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    config = load_config()
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""Cache of loaded YCSB datasets, to skip the load phase of the later runs.
+
+After a load, `save` flushes the usertable of every Cassandra node and stores
+a tarball of its data directory under snapshots/<key>/<container>.tar.  The key
+hashes the image digest, the protocol, the replication factor, the number of
+DCs and of nodes per DC, the record count and the workload (i.e., the schema),
+so a snapshot is only reused by an identical deployment.
+
+`restore` expects the schema to exist (ycsb_create_schema in
+run_benchmarks.sh), and every node imports the sstables of its own snapshot
+only, which requires the new cluster to own the same tokens.  `save` thus
+records the tokens of the nodes, in the snapshot and, for the first snapshot
+of a deployment (image, DCs, nodes and racks per DC), under
+snapshots/rings/<key>.json: start_cassandra_data_centers.py starts the nodes
+of such a deployment on these tokens (initial_token, see ring_tokens).  A
+cluster whose tokens differ from the snapshot ones is loaded with YCSB.
+
+Concurrent experiments share snapshots/: `save` and `restore` hold an
+exclusive lock on snapshots/<key>.lock, and the ring file of a deployment is
+written under its own lock.
+
+Only the Cassandra-based systems keep their data on disk: the other ones
+(e.g., the in-memory CockroachDB store) report no snapshot, and are loaded
+with YCSB as before.  Neither do the Accord tables (transactional_mode =
+'full'), whose state is not in their sstables alone.
+
+Usage: python3 snapshot.py save|restore <protocol> <replication_factor> <num_dcs> <nodes_per_dc> <records> <workload_type>
+
+Exits with 1 when there is nothing to restore, or on a failure.
+"""
+
+import csv
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+import docker
+from exp_config import load_config
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots")
+NODETOOL = "env JVM_OPTS='' nodetool"
+RESTORE_DIR = "/tmp/snapshot"
+RING_DIR = os.path.join(SNAPSHOT_DIR, "rings")
+TOKEN = re.compile(r"^Token\s*:\s*(-?\d+)", re.MULTILINE)
+
+config = {}
+
+
+def debug(msg):
+    if config.get("debug", 1):
+        timestamp = datetime.now().strftime("%s:%f")
+        print(f"[{timestamp}] \033[32m{msg}\033[0m")
+
+
+@contextmanager
+def locked(path):
+    """Hold an exclusive lock on *path*, shared with the other experiments."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def cassandra_image(protocol):
+    """Image of the Cassandra-based *protocol*, or None when its data is not (only) in its sstables."""
+    if protocol == "accord":
+        # transactional_mode = 'full' (ycsb_create_schema)
+        return None
+    if protocol.startswith("accord"):
+        return config["accord_cassandra_image"]
+    if protocol.startswith("cassandra-"):
+        return config["normal_cassandra_image"]
+    return None
+
+
+def snapshot_key(client, image, protocol, replication_factor, num_dcs, nodes_per_dc, records, workload_type):
+    digest = client.images.get(image).id
+    fields = [digest, protocol, replication_factor, num_dcs, nodes_per_dc, records, workload_type]
+    return hashlib.sha256("|".join(str(f) for f in fields).encode()).hexdigest()[:16]
+
+
+def ring_file(client, image, num_dcs, nodes_per_dc):
+    digest = client.images.get(image).id
+    racks_per_dc = int(config.get("racksperdc", 0) or nodes_per_dc)
+    fields = [digest, num_dcs, nodes_per_dc, racks_per_dc]
+    return os.path.join(RING_DIR, hashlib.sha256("|".join(str(f) for f in fields).encode()).hexdigest()[:16] + ".json")
+
+
+def ring_tokens(client, image, num_dcs, nodes_per_dc):
+    """{node: its tokens} of the first snapshotted deployment of *image* with this topology, or {}."""
+    try:
+        with open(ring_file(client, image, num_dcs, nodes_per_dc)) as f:
+            return json.load(f)
+    except (OSError, ValueError, docker.errors.ImageNotFound):
+        return {}
+
+
+def node_tokens(container):
+    return TOKEN.findall(exec_checked(container, f"{NODETOOL} info -T"))
+
+
+def node_names(num_dcs, nodes_per_dc):
+    latencies_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "latencies.csv")
+    with open(latencies_file, newline="") as f:
+        locations = [row["loc"].strip().strip('"') for row in csv.DictReader(f)]
+    prefix = config.get("container_prefix", "")
+    return [f"{prefix}{loc}{k}" for loc in locations[:num_dcs] for k in range(1, nodes_per_dc + 1)]
+
+
+def exec_checked(container, cmd, user=""):
+    res = container.exec_run(["sh", "-c", cmd], user=user)
+    if res.exit_code != 0:
+        output = res.output.decode(errors="ignore").strip() if res.output else ""
+        raise RuntimeError(f"'{cmd}' failed on {container.name} (exit {res.exit_code}): {output}")
+    return res.output.decode(errors="ignore")
+
+
+def table_dir(container):
+    """Data directory of ycsb.usertable in *container*."""
+    out = exec_checked(container, "find / \\( -path /proc -o -path /sys \\) -prune -o "
+                                  "-type d -path '*/data/ycsb/usertable-*' -print -prune 2>/dev/null | head -1")
+    path = out.strip()
+    if not path:
+        raise RuntimeError(f"No data directory for ycsb.usertable on {container.name}")
+    return path
+
+
+def save_node(container, directory):
+    exec_checked(container, f"{NODETOOL} flush ycsb usertable")
+    stream, _ = container.get_archive(table_dir(container))
+    with open(os.path.join(directory, f"{container.name}.tar"), "wb") as f:
+        for chunk in stream:
+            f.write(chunk)
+    debug(f"Saved the usertable of '{container.name}'.")
+
+
+def restore_node(container, directory):
+    exec_checked(container, f"rm -rf {RESTORE_DIR} && mkdir -p {RESTORE_DIR}", user="root")
+    with open(os.path.join(directory, f"{container.name}.tar"), "rb") as f:
+        container.put_archive(RESTORE_DIR, f.read())
+    table = exec_checked(container, f"ls -d {RESTORE_DIR}/usertable-*").split()[0]
+    exec_checked(container, f"chown -R cassandra:cassandra {RESTORE_DIR} 2>/dev/null || true", user="root")
+    exec_checked(container, f"{NODETOOL} import ycsb usertable {table}")
+    exec_checked(container, f"rm -rf {RESTORE_DIR}", user="root")
+    debug(f"Restored the usertable of '{container.name}'.")
+
+
+def main():
+    if len(sys.argv) != 8 or sys.argv[1] not in ("save", "restore"):
+        print(f"Usage: {sys.argv[0]} save|restore <protocol> <replication_factor> <num_dcs> <nodes_per_dc> <records> <workload_type>")
+        sys.exit(1)
+
+    action, protocol, replication_factor = sys.argv[1], sys.argv[2], int(sys.argv[3])
+    num_dcs, nodes_per_dc, records, workload_type = int(sys.argv[4]), int(sys.argv[5]), int(sys.argv[6]), sys.argv[7]
+
+    image = cassandra_image(protocol)
+    if image is None:
+        debug(f"No dataset snapshot for protocol '{protocol}'.")
+        sys.exit(1)
+
+    client = docker.from_env()
+    key = snapshot_key(client, image, protocol, replication_factor, num_dcs, nodes_per_dc, records, workload_type)
+    directory = os.path.join(SNAPSHOT_DIR, key)
+    meta_file = os.path.join(directory, "snapshot.json")
+    containers = [client.containers.get(name) for name in node_names(num_dcs, nodes_per_dc)]
+
+    with locked(directory + ".lock"):
+        try:
+            if action == "save":
+                shutil.rmtree(directory, ignore_errors=True)
+                os.makedirs(directory)
+                with ThreadPoolExecutor() as executor:
+                    list(executor.map(lambda c: save_node(c, directory), containers))
+                tokens = {c.name: node_tokens(c) for c in containers}
+                # Written last: a snapshot without it is incomplete
+                with open(meta_file, "w") as f:
+                    json.dump({"image": image, "protocol": protocol, "replication_factor": replication_factor,
+                               "num_dcs": num_dcs, "nodes_per_dc": nodes_per_dc, "records": records,
+                               "workload_type": workload_type, "nodes": [c.name for c in containers],
+                               "tokens": tokens}, f, indent=2)
+                ring = ring_file(client, image, num_dcs, nodes_per_dc)
+                with locked(ring[:-len(".json")] + ".lock"):
+                    if not os.path.exists(ring):
+                        # Replaced at once, as ring_tokens reads it unlocked
+                        with open(ring + ".tmp", "w") as f:
+                            json.dump(tokens, f, indent=2)
+                        os.replace(ring + ".tmp", ring)
+                debug(f"Saved dataset snapshot {key}.")
+            else:
+                if not os.path.exists(meta_file):
+                    debug(f"No dataset snapshot {key} yet.")
+                    sys.exit(1)
+                with open(meta_file) as f:
+                    tokens = json.load(f).get("tokens", {})
+                moved = [c.name for c in containers if sorted(node_tokens(c)) != sorted(tokens.get(c.name, []))]
+                if moved:
+                    debug(f"The tokens of {' '.join(moved)} differ from the ones of dataset snapshot {key}.")
+                    sys.exit(1)
+                with ThreadPoolExecutor() as executor:
+                    list(executor.map(lambda c: restore_node(c, directory), containers))
+                debug(f"Restored dataset snapshot {key}.")
+        except (RuntimeError, docker.errors.APIError) as e:
+            print(f"Error: {e}")
+            if action == "save":
+                shutil.rmtree(directory, ignore_errors=True)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    config = load_config()
+    main()
@@ -3,6 +3,7 @@ import sys
 import time
 import math
 import re
+from wait_ready import wait_ready, READY, TIMEOUT
 
 NORMAL_CASSANDRA_IMAGE = "0track/cassandra:latest"
 ACCORD_CASSANDRA_IMAGE = "0track/cassandra-accord:latest"
@@ -41,15 +42,14 @@ def estimate_latency(distance_km):
     return math.floor(latency_ms)
 
 def wait_for_log(container, log_pattern, timeout=300):
-    log_stream = container.logs(stream=True)
-    start_time = time.time()
-    for log in log_stream:
-        if re.search(log_pattern, log.decode('utf-8')):
-            print(f"Log pattern '{log_pattern}' found in container '{container.name}'.")
-            return True
-        if time.time() - start_time > timeout:
-            print(f"Timeout waiting for log pattern '{log_pattern}' in container '{container.name}'.")
-            return False
+    status = wait_ready(container, log_pattern, timeout)
+    if status == READY:
+        print(f"Log pattern '{log_pattern}' found in container '{container.name}'.")
+        return True
+    if status == TIMEOUT:
+        print(f"Timeout waiting for log pattern '{log_pattern}' in container '{container.name}'.")
+    else:
+        print(f"Container '{container.name}' exited before log pattern '{log_pattern}' appeared.")
     return False
 
 def create_cassandra_cluster(num_nodes, cassandra_image, node_locations):
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Detection of the steady state of a YCSB client from its status stream (-s).
+
+YCSB prints a status line every status.interval seconds, e.g.:
+    ... 12 sec: 6034 operations; 503.2 current ops/sec; [UPDATE: Count=503, Max=..., Min=..., Avg=19821.4, 90=..., 99=...]
+A client is steady once, over the last warmup.window status lines, both its
+throughput and its average latency (the highest over its operations) stay
+within warmup.tolerance (relative) of their mean: the JIT, the caches and the
+protocol (e.g., the fast path of Accord) have then settled.
+
+run_benchmark (run_benchmarks.sh) relies on it for the runs given `-warmup
+auto`: orchestrate.py runs the clients with a status line every
+warmup.interval seconds until all of them are steady (or for warmup.max
+seconds), then keeps them running and measures them from that point on.
+
+Usage: python3 steady_state.py <log_file>...
+
+Prints when each (finished) client log became steady, as a CSV.
+"""
+
+import sys
+from exp_config import load_config
+import timeseries
+
+config = {}
+
+
+def parse_status(line):
+    """(elapsed seconds, ops/s, average latency in us) of a status *line*, or None."""
+    status = timeseries.parse_status(line)
+    if status is None:
+        return None
+    _, elapsed, ops_per_s, operations = status
+    latencies = [values["Avg"] for op, values in operations.items() if "Avg" in values and not op.endswith("-failed")]
+    return elapsed, ops_per_s, max(latencies, default=0.0)
+
+
+class SteadyState:
+    """Steady-state detector of a client, fed with its log lines."""
+
+    def __init__(self, window=None, tolerance=None):
+        self.window = int(window if window is not None else config.get("warmup.window", 5))
+        self.tolerance = float(tolerance if tolerance is not None else config.get("warmup.tolerance", 0.1))
+        self.samples = []
+        self.steady_at = None
+
+    @property
+    def steady(self):
+        return self.steady_at is not None
+
+    def stable(self, values):
+        mean = sum(values) / len(values)
+        return mean > 0 and max(values) - min(values) <= self.tolerance * mean
+
+    def add(self, line):
+        """Account for a log *line*; returns whether the client is steady."""
+        sample = parse_status(line)
+        if sample is None or self.steady:
+            return self.steady
+        self.samples.append(sample)
+        recent = self.samples[-self.window:]
+        if len(recent) == self.window and all(self.stable(v) for v in list(zip(*recent))[1:]):
+            self.steady_at = sample[0]
+        return self.steady
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <log_file>...")
+        sys.exit(1)
+    print("log_file,steady_after_s,status_lines")
+    for path in sys.argv[1:]:
+        detector = SteadyState()
+        with open(path, errors="replace") as f:
+            for line in f:
+                detector.add(line)
+        steady_after = detector.steady_at if detector.steady else "NA"
+        print(f"{path},{steady_after},{len(detector.samples)}")
+
+
+if __name__ == "__main__":
+    config = load_config()
+    main()
@@ -13,14 +13,17 @@ source ${DIR}/run_benchmarks.sh
 source ${DIR}/cassandra/cassandra_breakdown.sh
 
 usage() {
-    echo "Usage: $0 [--dry-run] [--test] [--protocols=LIST] [--nodesperdc=N]"
+    echo "Usage: $0 [--dry-run] [--fresh] [--test] [--protocols=LIST] [--nodesperdc=N] [--set=KEY=VALUE...]"
     echo "  --dry-run        Skip the experiment run; only draw plots using existing data."
+    echo "  --fresh          Discard the completed runs instead of resuming the sweep."
     echo "  --test           Use a 60s run time and right-size containers to fit this machine."
     echo "  --protocols=LIST Override the list of protocols to run (comma-separated)."
     echo "  --nodesperdc=N   Override number of nodes per DC (default from exp.config)."
+    echo "  --set=KEY=VALUE  Override a setting of exp.config for this run (repeatable)."
 }
 
 dry_run=0
+fresh=0
 test_run=0
 protocols_override=""
 nodesperdc_override=""
@@ -29,6 +32,9 @@ for arg in "$@"; do
         --dry-run)
             dry_run=1
             ;;
+        --fresh)
+            fresh=1
+            ;;
         --test)
             test_run=1
             ;;
@@ -41,6 +47,9 @@ for arg in "$@"; do
         --nodes-per-dc=*)
             nodesperdc_override="${arg#*=}"
             ;;
+        --set=*)
+            config_set_arg "$arg"
+            ;;
         *)
             echo "Unknown parameter: $arg"
             usage
@@ -65,32 +74,21 @@ client_counts="1 50"
 ops_per_thread=0
 s_values=$(seq 3 8)
 
-original_machine=$(config machine)
-original_maxexecutiontime=$(config maxexecutiontime)
-original_nodesperdc=$(config "nodesperdc")
-
-restore_test_settings() {
-    sed -i "s/^machine=.*/machine=${original_machine}/" "${CONFIG_FILE}"
-    sed -i "s/^maxexecutiontime=.*/maxexecutiontime=${original_maxexecutiontime}/" "${CONFIG_FILE}"
-    sed -i "s/^nodesperdc=.*/nodesperdc=${original_nodesperdc}/" "${CONFIG_FILE}"
-}
-trap restore_test_settings EXIT
-
 if [ -n "$nodesperdc_override" ]; then
-    sed -i "s/^nodesperdc=.*/nodesperdc=${nodesperdc_override}/" "${CONFIG_FILE}"
+    config_set nodesperdc "${nodesperdc_override}"
 fi
 
 if [ "$test_run" -eq 1 ]; then
     nodes=3
     records=1000
     compute_test_machine "${nodes}"
-    sed -i "s/^maxexecutiontime=.*/maxexecutiontime=10/" "${CONFIG_FILE}"
+    config_set maxexecutiontime 10
 fi
 maxexecutiontime=$(config maxexecutiontime)
 
 if [ "$dry_run" -eq 0 ]; then
     pull_images
-    echo "protocol,S,clients,dc,fast_commit,slow_commit,commit,ordering,execution" > ${RESULTSDIR}/swap/breakdown.csv
+    init_ledger ${LOGDIR}/swap ${fresh}
 
     dcs_list=""
     for i in $(seq 1 ${nodes}); do
@@ -100,13 +98,18 @@ if [ "$dry_run" -eq 0 ]; then
 
     for p in ${protocols}
     do
-        rm -f ${LOGDIR}/swap/*${p}*
+        prune_logs ${LOGDIR}/swap "${p}_*"
 	
 	for clients in ${client_counts}
 	do
             do_create_and_load=1
             for s in ${s_values}
             do
+                point="${p} nodes=${nodes} workload=${workload} threads=${clients} records=${records} s=${s}"
+                if point_output "${point}" >/dev/null; then
+                    log "Skipping completed run: ${point}"
+                    continue
+                fi
                 ts=$(date +%Y%m%d%H%M%S%N)
                 output_file="${LOGDIR}/swap/${p}_${nodes}_${workload}_${ts}.dat"
 
@@ -128,19 +131,27 @@ if [ "$dry_run" -eq 0 ]; then
                     done
                     python3 ${DIR}/cockroachdb/cockroachdb_breakdown.py \
                         ${p} ${tmp_logdir} ${workload} ${nodes} ${dcs_list} | \
-                        awk -F',' -v s="${s}" -v c="${clients}" -v proto="${p}" '{print proto "," s "," c "," $0}' >> ${RESULTSDIR}/swap/breakdown.csv
+                        awk -F',' -v s="${s}" -v c="${clients}" -v proto="${p}" '{print proto "," s "," c "," $0}' > ${output_file%.dat}_breakdown.csv
                     rm -rf "${tmp_logdir}"
                 elif [ "$p" == "accord" ]; then
                     compute_breakdown ${nodes} accord | \
-                        awk -F',' -v s="${s}" -v c="${clients}" '{print "accord," s "," c "," $0}' >> ${RESULTSDIR}/swap/breakdown.csv
+                        awk -F',' -v s="${s}" -v c="${clients}" '{print "accord," s "," c "," $0}' > ${output_file%.dat}_breakdown.csv
                 fi
 
+                record_point "${point}" "${output_file}"
                 do_create_and_load=0
             done
 
             stop_benchmark ${p} ${nodes}
         done
     done
+
+    # Breakdowns of all the runs, including the ones of a previous invocation
+    echo "protocol,S,clients,dc,fast_commit,slow_commit,commit,ordering,execution" > ${RESULTSDIR}/swap/breakdown.csv
+    for p in ${protocols}
+    do
+        cat ${LOGDIR}/swap/${p}_*_breakdown.csv 2>/dev/null >> ${RESULTSDIR}/swap/breakdown.csv || true
+    done
 fi
 
 debug "Parsing results..."
@@ -15,14 +15,12 @@ swiftpaxos_start_cluster() {
     local node_count=$1
     local protocol=$(echo "$2" | awk -F- '{print $2}')
     image=$(config swiftpaxos_image)
-    local resource_limits
-    resource_limits=$(get_resource_limits)
     # Start master
-    start_container ${image} "swiftpaxos-master" "waiting for ${node_count} replicas" ${LOGDIR}/swiftpaxos_master.log --rm -d --network $(config "network_name") ${resource_limits} -e NSERVERS=${node_count} -e TYPE=master || {
+    start_container ${image} "${PREFIX}swiftpaxos-master" "waiting for ${node_count} replicas" ${LOGDIR}/${PREFIX}swiftpaxos_master.log --rm -d --network $(config "network_name") $(get_resource_limits ${PREFIX}swiftpaxos-master) $(container_labels master) -e NSERVERS=${node_count} -e TYPE=master || {
         error "Failed to start master"
         return 1
     }
-    maddr=$(get_container_ip swiftpaxos-master)
+    maddr=$(get_container_ip ${PREFIX}swiftpaxos-master)
     # Start remaining nodes
     for i in $(seq 1 $node_count); do
 	if [[ "$i" == "$node_count" ]]; then
@@ -31,8 +29,8 @@ swiftpaxos_start_cluster() {
 	    message="Server starting"
 	fi
         location=$(get_location $i ${SWIFTPAXOS_DIR}/../latencies.csv)
-        container_name="${location}1"
-	start_container ${image} ${container_name} "${message}" ${LOGDIR}/${protocol}_node${i}.log --rm -d --network $(config "network_name") --cap-add=NET_ADMIN --cap-add=NET_RAW ${resource_limits} -e PROTOCOL=${protocol} -e NSERVERS=${node_count} -e TYPE=server -e THRIFTY=false -e MADDR=${maddr} || {
+        container_name="${PREFIX}${location}1"
+	start_container ${image} ${container_name} "${message}" ${LOGDIR}/${PREFIX}${protocol}_node${i}.log --rm -d --network $(config "network_name") --cap-add=NET_ADMIN --cap-add=NET_RAW $(get_resource_limits ${container_name}) $(container_labels node ${i}) -e PROTOCOL=${protocol} -e NSERVERS=${node_count} -e TYPE=server -e THRIFTY=false -e MADDR=${maddr} || {
             error "Failed to start server $i"
             return 2
 	}
@@ -40,48 +38,17 @@ swiftpaxos_start_cluster() {
 }
 
 swiftpaxos_cleanup_cluster() {
-    log "Cleaning up Swiftpaxos cluster..."    
-    stop_container "swiftpaxos-master" || true
-    local node_count=${1:-$(swiftpaxos_get_node_count)}
-    [ -z "$node_count" ] || [ "$node_count" -eq 0 ] && node_count=5
-    for i in $(seq 1 $node_count); do
-        location=$(get_location $i ${SWIFTPAXOS_DIR}/../latencies.csv)
-        container_name="${location}1"
-        if docker inspect "$container_name" >/dev/null 2>&1; then
-            stop_container "${container_name}" || true
-        fi
-        if docker inspect "database-node${i}" >/dev/null 2>&1; then
-            stop_container "database-node${i}" || true
-        fi
-        if docker inspect "ycsb-${i}" >/dev/null 2>&1; then
-            stop_container "ycsb-${i}" || true
-        fi
-    done	
-    if docker inspect "ycsb" >/dev/null 2>&1; then
-        stop_container "ycsb" || true
-    fi
+    log "Cleaning up Swiftpaxos cluster..."
+    teardown_cluster
 }
 
 swiftpaxos_get_hosts() {
-    container_name="swiftpaxos-master"
+    container_name="${PREFIX}swiftpaxos-master"
     echo $(get_container_ip "$container_name")
 }
 
 swiftpaxos_get_node_count() {
-    i=1
-    while true; do
-        location=$(get_location $i ${SWIFTPAXOS_DIR}/../latencies.csv)
-        if [ -z "$location" ]; then
-            break
-        fi
-        container_name="${location}1"
-	ip=$(get_container_ip "$container_name")
-        if [ -z "$ip" ]; then
-            break
-        fi
-        i=$((i + 1))
-    done
-    echo $((i - 1))
+    get_dc_count
 }
 
 swiftpaxos_get_port() {
@@ -99,7 +66,7 @@ swiftpaxos_get_leaders() {
     if [ "${sub_protocol}" = "paxos" ]; then
         for i in $(seq 1 "${node_count}"); do
             location=$(get_location $i ${SWIFTPAXOS_DIR}/../latencies.csv)
-            container_name="${location}1"
+            container_name="${PREFIX}${location}1"
             if docker logs --tail 1000 "${container_name}" 2>&1 | grep -q "I am the leader"; then
                 echo "${container_name}"
                 return
@@ -108,5 +75,5 @@ swiftpaxos_get_leaders() {
     fi
     # Default: node 3
     location=$(get_location 3 ${SWIFTPAXOS_DIR}/../latencies.csv)
-    echo "${location}1"
+    echo "${PREFIX}${location}1"
 }
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Structured tc state of the containers, with batched save, swap and rollback.
+
+emulate_latency.py records the rule set it applies to each container as a JSON
+artifact under logs/tc/<container>.json.  The rules are described by their
+meaning (a uniform delay and/or one delay per peer IP), and the tc commands are
+regenerated from that description, so nothing ever parses `tc ... show` output.
+Every change is shipped to the container as a single `tc -batch` run, either
+through the Docker exec API (backend "exec", the image must ship tc) or from the
+host by entering the container's network namespace via its PID (backend
+"netns", which needs nsenter and tc on the host but nothing in the image).
+The backend is recorded in the state, so swap and rollback reuse it, and so is
+the id of the container, so that the state of a former container of the same
+name is never applied (the state is also deleted when the container is torn
+down, see teardown.py, and before the latency emulation of a new deployment).
+
+Usage: python3 tc_state.py save <container_name>
+       python3 tc_state.py swap <container_name> <delay_ms>
+       python3 tc_state.py rollback <container_name>
+
+`save` checkpoints the applied state (on the host, no exec), `swap` replaces
+all the rules with a uniform delay and `rollback` re-applies the checkpoint.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import docker
+
+# Rate of the HTB classes, above the one of any emulated link
+UNSHAPED = "10gbit"
+TC_STATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "tc")
+
+
+def tc_state_path(container_name, checkpoint=False):
+    """Return the path of the applied (or checkpointed) state of *container_name*."""
+    suffix = ".saved.json" if checkpoint else ".json"
+    return os.path.join(TC_STATE_DIR, f"{container_name}{suffix}")
+
+
+def save_tc_state(state, checkpoint=False):
+    os.makedirs(TC_STATE_DIR, exist_ok=True)
+    with open(tc_state_path(state["container"], checkpoint), "w") as f:
+        json.dump(state, f, indent=2)
+
+
+def load_tc_state(container_name, checkpoint=False):
+    with open(tc_state_path(container_name, checkpoint)) as f:
+        return json.load(f)
+
+
+def clear_tc_state(container_name):
+    """Delete the applied and checkpointed states of *container_name*, if any."""
+    for checkpoint in (False, True):
+        try:
+            os.remove(tc_state_path(container_name, checkpoint))
+        except FileNotFoundError:
+            pass
+
+
+def tc_commands(state):
+    """Translate a structured *state* into `tc -batch` lines.
+
+    A state holds a device, an optional uniform root delay ("delay_ms") and a
+    list of links {"peer", "dst", "delay_ms", "rate"}.  Every link gets a class
+    of its own under an HTB root, with a netem leaf holding its delay and rate,
+    and a u32 filter on its destination IP; so a rate bounds each link, not
+    the sum of the links of a tier.  The HTB classes do not shape (the netem
+    leaves do), and the other traffic goes to the default class 1:1.
+    """
+    dev = state.get("dev", "eth0")
+    if state.get("delay_ms") is not None:
+        return [f"qdisc add dev {dev} root netem delay {state['delay_ms']}ms"]
+    links = state.get("links", [])
+    if not links:
+        return []
+    cmds = [f"qdisc add dev {dev} root handle 1: htb default 1",
+            f"class add dev {dev} parent 1: classid 1:1 htb rate {UNSHAPED}"]
+    for idx, link in enumerate(links):
+        minor = idx + 2
+        netem = f"netem delay {link['delay_ms']}ms" + (f" rate {link['rate']}" if link.get("rate") else "")
+        cmds.append(f"class add dev {dev} parent 1: classid 1:{minor:x} htb rate {UNSHAPED}")
+        cmds.append(f"qdisc add dev {dev} parent 1:{minor:x} handle {minor:x}: {netem}")
+        cmds.append(f"filter add dev {dev} protocol ip parent 1: prio 1 u32 match ip dst {link['dst']} flowid 1:{minor:x}")
+    return cmds
+
+
+def run_in_netns(container, script, backend="exec"):
+    """Run the shell *script* in the network namespace of *container*.
+
+    Returns (exit_code, output).  With the "netns" backend the script runs on
+    the host under `nsenter --net`, so it uses the host's binaries and avoids
+    the Docker exec round-trip.
+    """
+    if backend == "netns":
+        pid = container.attrs["State"]["Pid"]
+        res = subprocess.run(["nsenter", "-t", str(pid), "-n", "sh", "-c", script],
+                             stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        return res.returncode, res.stdout
+    res = container.exec_run(["sh", "-c", script])
+    return res.exit_code, res.output
+
+
+def apply_tc(container, state, backend=None):
+    """Replace the rules of *container* by *state* in one batch and record it as applied."""
+    backend = backend or state.get("backend", "exec")
+    dev = state.get("dev", "eth0")
+    script = f"tc qdisc del dev {dev} root 2>/dev/null; true"
+    cmds = tc_commands(state)
+    if cmds:
+        batch = "\n".join(cmds)
+        script = f"tc qdisc del dev {dev} root 2>/dev/null; tc -batch - <<'EOF'\n{batch}\nEOF"
+    exit_code, output = run_in_netns(container, script, backend)
+    if exit_code != 0:
+        output = output.decode().strip() if output else ""
+        raise RuntimeError(f"tc batch failed on {container.name} (exit {exit_code}):\n{output}")
+    save_tc_state(dict(state, backend=backend, id=container.id))
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ("save", "swap", "rollback"):
+        print(f"Usage: {sys.argv[0]} save|swap|rollback <container_name> [delay_ms]")
+        sys.exit(1)
+
+    action, container_name = sys.argv[1], sys.argv[2]
+    container = docker.from_env().containers.get(container_name)
+
+    try:
+        applied = load_tc_state(container_name)
+    except FileNotFoundError:
+        applied = {"container": container_name, "dev": "eth0", "links": [], "id": container.id}
+    if applied.get("id") != container.id:
+        print(f"Error: the tc state of {container_name} belongs to another container; not using it.")
+        sys.exit(1)
+
+    if action == "save":
+        save_tc_state(applied, checkpoint=True)
+        return
+
+    if action == "swap":
+        if len(sys.argv) != 4:
+            print(f"Usage: {sys.argv[0]} swap <container_name> <delay_ms>")
+            sys.exit(1)
+        apply_tc(container, {"container": container_name, "dev": applied.get("dev", "eth0"),
+                             "delay_ms": int(sys.argv[3]), "links": []},
+                 backend=applied.get("backend", "exec"))
+    else:
+        try:
+            saved = load_tc_state(container_name, checkpoint=True)
+        except FileNotFoundError:
+            print(f"Warning: no saved tc state for {container_name}; skipping tc policy restoration.")
+            return
+        if saved.get("id") != container.id:
+            print(f"Error: the saved tc state of {container_name} belongs to another container; not restoring it.")
+            sys.exit(1)
+        apply_tc(container, saved)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Stop and remove the containers of an experiment, concurrently.
+
+Every container started by the scripts carries the labels of container_labels
+(utils.sh), or of labels() below in Python:
+    exp.owner  the experiment (its container prefix, "default" when empty);
+    exp.role   node, master, client, loader or namespace;
+    exp.dc     the (1-based) DC of a node.
+The containers of the experiment with the given roles are found with a single
+query on these labels, whatever the number of DCs and nodes, then all stopped
+(SIGKILL after the grace period) and removed at once, with the GC logs of the
+nodes (see gc_analysis.py).  The wait for their
+removal is bounded by the timeout.
+
+Usage: python3 teardown.py [--timeout=S] [role...]
+
+Without a role, every container of the experiment is removed.  Exits with 1
+when some containers are still present at the timeout.
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import docker
+from exp_config import load_config
+from gc_analysis import remove_node_logs
+from placement import release
+from tc_state import clear_tc_state
+
+STOP_GRACE_S = 10
+
+config = {}
+
+
+def debug(msg):
+    if config.get("debug", 1):
+        timestamp = datetime.now().strftime("%s:%f")
+        print(f"[{timestamp}] \033[32m{msg}\033[0m")
+
+
+def owner(prefix):
+    """Owner label of the containers named with *prefix*."""
+    return prefix or "default"
+
+
+def labels(prefix, role, dc=None):
+    """Labels of a container with *role* (in DC *dc*) of the experiment of *prefix*."""
+    result = {"exp.owner": owner(prefix), "exp.role": role}
+    if dc is not None:
+        result["exp.dc"] = str(dc)
+    return result
+
+
+def find(client, prefix, roles):
+    containers = client.containers.list(all=True, filters={"label": f"exp.owner={owner(prefix)}"})
+    return [c for c in containers if not roles or c.labels.get("exp.role") in roles]
+
+
+def stop_and_remove(container):
+    try:
+        container.stop(timeout=STOP_GRACE_S)
+    except docker.errors.APIError:
+        pass
+    try:
+        container.remove(force=True)
+    except docker.errors.APIError:
+        # Already gone, or being removed (--rm)
+        pass
+
+
+def teardown(prefix, roles, timeout):
+    client = docker.from_env()
+    containers = find(client, prefix, roles)
+    if not containers:
+        return []
+    names = [c.name for c in containers]
+    debug(f"Removing {len(names)} container(s): {' '.join(sorted(names))}")
+    with ThreadPoolExecutor(max_workers=len(containers)) as executor:
+        list(executor.map(stop_and_remove, containers))
+
+    deadline = time.time() + timeout
+    left = find(client, prefix, roles)
+    while left and time.time() < deadline:
+        time.sleep(0.2)
+        left = find(client, prefix, roles)
+    release(names)
+    remove_node_logs(names)
+    for name in names:
+        clear_tc_state(name)
+    return [c.name for c in left]
+
+
+def main():
+    timeout = float(os.environ.get("STOP_CONTAINER_TIMEOUT", 30))
+    roles = []
+    for arg in sys.argv[1:]:
+        if arg.startswith("--timeout="):
+            timeout = float(arg.split("=", 1)[1])
+        elif arg.startswith("--"):
+            print(f"Usage: {sys.argv[0]} [--timeout=S] [role...]")
+            sys.exit(1)
+        else:
+            roles.append(arg)
+
+    left = teardown(str(config.get("container_prefix", "")), roles, timeout)
+    if left:
+        print(f"Error: {' '.join(sorted(left))} still present after {timeout:g}s.")
+        sys.exit(1)
+    debug("Teardown completed.")
+
+
+if __name__ == "__main__":
+    config = load_config()
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Resource usage of the containers of an experiment during a run.
+
+`record` samples, every telemetry.interval seconds, the Docker stats of every
+container of the experiment (the nodes and the YCSB clients, by their labels,
+see teardown.py), until it is terminated.  Each sample is a row of
+<run>_telemetry.csv:
+    wall_time, container, role;
+    cpu_cores      the CPU used over the last second, in cores;
+    cpu_limit      the CPUs the container may use (its --cpus quota, or its
+                   dedicated CPUs, or all the CPUs of the host);
+    cpu_util       cpu_cores relative to cpu_limit (%);
+    throttled      the CFS periods of the last second in which the container
+                   was throttled (%);
+    mem_mb         the memory used, page cache excluded;
+    net_rx_mb_s, net_tx_mb_s, blk_read_mb_s, blk_write_mb_s  the network and
+                   block I/O rates since the previous sample.
+The containers started during the run are sampled from their start.
+
+`summary` prints the utilization of a run, as read by parse_ycsb_to_csv.sh
+(from <run>_resource_usage.dat): the CPU utilization and throttling of the
+busiest replica and YCSB client (mean over the samples) and the peak memory
+of the replicas.  A replica at its CPU limit, or throttled, saturates on its
+CPU quota rather than on the protocol.
+
+Usage: python3 telemetry.py record <telemetry_file>
+       python3 telemetry.py summary <telemetry_file>
+"""
+
+import csv
+import signal
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+import docker
+from exp_config import load_config
+from teardown import owner
+
+COLUMNS = ["wall_time", "container", "role", "cpu_cores", "cpu_limit", "cpu_util", "throttled", "mem_mb",
+           "net_rx_mb_s", "net_tx_mb_s", "blk_read_mb_s", "blk_write_mb_s"]
+# Roles of the summary, and their name in it
+ROLES = {"node": "replica", "client": "client"}
+MB = 1 << 20
+
+config = {}
+
+
+def debug(msg):
+    if config.get("debug", 1):
+        timestamp = datetime.now().strftime("%s:%f")
+        print(f"[{timestamp}] \033[32m{msg}\033[0m", file=sys.stderr)
+
+
+def cpu_limit(container, online_cpus):
+    host_config = container.attrs.get("HostConfig", {})
+    if host_config.get("NanoCpus"):
+        return host_config["NanoCpus"] / 1e9
+    cpuset = host_config.get("CpusetCpus")
+    if cpuset:
+        count = 0
+        for part in cpuset.split(","):
+            first, _, last = part.partition("-")
+            count += int(last or first) - int(first) + 1
+        return count
+    return online_cpus
+
+
+def counters(stats):
+    """Cumulative (net rx, net tx, block read, block write) bytes of *stats*."""
+    networks = stats.get("networks") or {}
+    rx = sum(n.get("rx_bytes", 0) for n in networks.values())
+    tx = sum(n.get("tx_bytes", 0) for n in networks.values())
+    read = write = 0
+    for entry in (stats.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []:
+        if entry.get("op", "").lower() == "read":
+            read += entry.get("value", 0)
+        elif entry.get("op", "").lower() == "write":
+            write += entry.get("value", 0)
+    return rx, tx, read, write
+
+
+def delta(stats, group, key):
+    return stats["cpu_stats"].get(group, {}).get(key, 0) - stats["precpu_stats"].get(group, {}).get(key, 0)
+
+
+class Recorder:
+    """Writer of the samples of the containers of *prefix* to *path*."""
+
+    def __init__(self, prefix, path, interval):
+        self.client = docker.from_env()
+        self.prefix = prefix
+        self.interval = interval
+        self.file = open(path, "w")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(COLUMNS)
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.followed = set()
+
+    def follow(self, container):
+        """Sample *container* from its stats stream (a sample a second) until it exits."""
+        previous = None
+        try:
+            for stats in container.stats(stream=True, decode=True):
+                if self.stopped.is_set():
+                    return
+                now = time.time()
+                if previous is not None and now - previous[0] < self.interval:
+                    continue
+                if "system_cpu_usage" not in stats.get("precpu_stats", {}):
+                    # First sample of the stream, without a previous one
+                    previous = (now, counters(stats))
+                    continue
+                online = stats["cpu_stats"].get("online_cpus") or 1
+                system = stats["cpu_stats"]["system_cpu_usage"] - stats["precpu_stats"]["system_cpu_usage"]
+                cores = delta(stats, "cpu_usage", "total_usage") / system * online if system > 0 else 0.0
+                limit = cpu_limit(container, online)
+                periods = delta(stats, "throttling_data", "periods")
+                throttled = delta(stats, "throttling_data", "throttled_periods") / periods * 100 if periods > 0 else 0.0
+                memory = stats.get("memory_stats") or {}
+                cache = (memory.get("stats") or {}).get("inactive_file", (memory.get("stats") or {}).get("cache", 0))
+                current = counters(stats)
+                before, elapsed = (previous[1], now - previous[0]) if previous else (current, 0)
+                rates = [(c - p) / elapsed / MB if elapsed > 0 else 0.0 for c, p in zip(current, before)]
+                previous = (now, current)
+                with self.lock:
+                    self.writer.writerow([f"{now:.3f}", container.name, container.labels.get("exp.role", ""),
+                                          f"{cores:.3f}", f"{limit:g}", f"{cores / limit * 100:.2f}",
+                                          f"{throttled:.2f}", f"{(memory.get('usage', 0) - cache) / MB:.1f}"]
+                                         + [f"{r:.3f}" for r in rates])
+                    self.file.flush()
+        except (docker.errors.APIError, KeyError, ValueError):
+            # The container exited
+            pass
+
+    def run(self):
+        """Sample the containers, including the ones started later, until stop()."""
+        while not self.stopped.is_set():
+            try:
+                containers = self.client.containers.list(filters={"label": f"exp.owner={owner(self.prefix)}"})
+            except docker.errors.APIError:
+                containers = []
+            for container in containers:
+                if container.id not in self.followed and container.labels.get("exp.role") in ROLES:
+                    self.followed.add(container.id)
+                    threading.Thread(target=self.follow, args=(container,), daemon=True).start()
+            self.stopped.wait(self.interval)
+        with self.lock:
+            self.file.close()
+
+    def stop(self, *_):
+        self.stopped.set()
+
+
+def summary(path):
+    """{column: value} of the utilization of the run sampled into *path*."""
+    cpu = defaultdict(list)
+    throttled = defaultdict(list)
+    memory = defaultdict(float)
+    roles = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                cpu[row["container"]].append(float(row["cpu_util"]))
+                throttled[row["container"]].append(float(row["throttled"]))
+                memory[row["container"]] = max(memory[row["container"]], float(row["mem_mb"]))
+            except (KeyError, ValueError):
+                continue
+            roles[row["container"]] = ROLES.get(row["role"])
+    result = {}
+    for role in ROLES.values():
+        names = [name for name, r in roles.items() if r == role]
+        result[f"{role}_cpu"] = max((sum(cpu[n]) / len(cpu[n]) for n in names), default=None)
+        result[f"{role}_throttled"] = max((sum(throttled[n]) / len(throttled[n]) for n in names), default=None)
+    result["replica_mem_mb"] = max((memory[n] for n, r in roles.items() if r == "replica"), default=None)
+    return result
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) == 2 and args[0] == "record":
+        recorder = Recorder(str(config.get("container_prefix", "")), args[1], float(config.get("telemetry.interval", 1)))
+        signal.signal(signal.SIGTERM, recorder.stop)
+        signal.signal(signal.SIGINT, recorder.stop)
+        recorder.run()
+        debug(f"Sampled {len(recorder.followed)} container(s) into {args[1]}.")
+    elif len(args) == 2 and args[0] == "summary":
+        for name, value in summary(args[1]).items():
+            print(f"{name}: {'NA' if value is None else f'{value:.2f}'}")
+    else:
+        print(f"Usage: {sys.argv[0]} record <telemetry_file> | summary <telemetry_file>")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    config = load_config()
+    main()
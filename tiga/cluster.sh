@@ -2,6 +2,12 @@
 
 TIGA_DIR=$(realpath "$(dirname "${BASH_SOURCE[0]}")")
 
+# Tiga configuration of this experiment's deployment, mounted in the
+# servers and the YCSB clients
+tiga_config_file() {
+    echo "${TIGA_DIR}/${PREFIX}config-ycsb.yml"
+}
+
 tiga_start_cluster() {
     if [ $# -lt 2 ]; then
         echo "usage: node_count protocol [nodes_per_dc]"
@@ -16,7 +22,6 @@ tiga_start_cluster() {
     fi
 
     local image=$(config tiga_image)
-    local resource_limits=$(get_resource_limits)
     tiga_cleanup_cluster >/dev/null 2>&1 || true
 
     # 1. Generate config-ycsb.yml dynamically using python
@@ -26,6 +31,7 @@ num_dcs = int(sys.argv[1])
 nodes_per_dc = int(sys.argv[2])
 tiga_dir = sys.argv[3]
 latencies_csv = sys.argv[4]
+prefix = sys.argv[5] if len(sys.argv) > 5 else ''
 
 locations = []
 lat_lons = []
@@ -78,7 +84,7 @@ for j in range(nodes_per_dc):
         port = 10000 + j
         shard_servers.append(f'{server_name}:{port}')
         city = locations[i]
-        container_name = f'{city}{j+1}'
+        container_name = f'{prefix}{city}{j+1}'
         host_map[server_name] = container_name
         process_map[server_name] = server_name
         initial_bounds.append(100)
@@ -99,11 +105,11 @@ config['server_bound_cap'] = bound_caps
 config['designate_replica_id'] = designate_replica
 config['preventive'] = True
 
-with open(f'{tiga_dir}/config-ycsb.yml', 'w') as f:
+with open(os.path.join(tiga_dir, prefix + 'config-ycsb.yml'), 'w') as f:
     yaml.dump(config, f, default_flow_style=False)
-" "$num_dcs" "$nodes_per_dc" "${TIGA_DIR}" "${DIR}/latencies.csv"
+" "$num_dcs" "$nodes_per_dc" "${TIGA_DIR}" "${DIR}/latencies.csv" "${PREFIX}"
 
-    log "Generated dynamic config file in ${TIGA_DIR}/config-ycsb.yml for ${num_dcs} DCs x ${nodes_per_dc} nodes/DC"
+    log "Generated dynamic config file in $(tiga_config_file) for ${num_dcs} DCs x ${nodes_per_dc} nodes/DC"
 
     # 2. Start replica containers
     local global_node_id=1
@@ -111,11 +117,11 @@ with open(f'{tiga_dir}/config-ycsb.yml', 'w') as f:
         local city=$(get_location $i ${DIR}/latencies.csv)
         for k in $(seq 1 $nodes_per_dc); do
             local server_name=$(printf "janus-lan-server-%04d" $(( (i-1) * 100 + (k-1) )))
-            local container_name="${city}${k}"
+            local container_name="${PREFIX}${city}${k}"
 
-            start_container ${image} ${container_name} "started on" ${LOGDIR}/${protocol}_node${global_node_id}.log \
-                --rm -d --network $(config "network_name") --cap-add=NET_ADMIN --cap-add=NET_RAW ${resource_limits} \
-                -v ${TIGA_DIR}/config-ycsb.yml:/app/config/config-ycsb.yml \
+            start_container ${image} ${container_name} "started on" ${LOGDIR}/${PREFIX}${protocol}_node${global_node_id}.log \
+                --rm -d --network $(config "network_name") --cap-add=NET_ADMIN --cap-add=NET_RAW $(get_resource_limits ${container_name}) $(container_labels node ${i}) \
+                -v $(tiga_config_file):/app/config/config-ycsb.yml \
                 -e PROTOCOL=${protocol} \
                 -e SERVER_NAME=${server_name} \
                 -e CONFIG_PATH=/app/config/config-ycsb.yml || {
@@ -129,16 +135,7 @@ with open(f'{tiga_dir}/config-ycsb.yml', 'w') as f:
 
 tiga_cleanup_cluster() {
     log "Cleaning up Tiga cluster..."
-    local num_dcs=$(config node_count 2>/dev/null || echo 5)
-    local nodes_per_dc=$(config nodesperdc)
-    for i in $(seq 1 15); do
-        local city=$(get_location $i ${DIR}/latencies.csv 2>/dev/null)
-        [ -z "$city" ] && continue
-        for k in $(seq 1 8); do
-            local container_name="${city}${k}"
-            docker stop ${container_name} >/dev/null 2>&1 || true
-        done
-    done
+    teardown_cluster
 }
 
 tiga_get_hosts() {
@@ -148,7 +145,7 @@ tiga_get_hosts() {
     for i in $(seq 1 $num_dcs); do
         local city=$(get_location $i ${DIR}/latencies.csv)
         for k in $(seq 1 $nodes_per_dc); do
-            local container_name="${city}${k}"
+            local container_name="${PREFIX}${city}${k}"
             local ip=$(get_container_ip "$container_name")
             if [ -n "$ip" ]; then
                 ips="$ips,$ip"
@@ -160,16 +157,7 @@ tiga_get_hosts() {
 }
 
 tiga_get_node_count() {
-    local num_dcs=0
-    for i in $(seq 1 15); do
-        local city=$(get_location $i ${DIR}/latencies.csv 2>/dev/null)
-        [ -z "$city" ] && continue
-        local ip=$(get_container_ip "${city}1")
-        if [ -n "$ip" ]; then
-            num_dcs=$((num_dcs + 1))
-        fi
-    done
-    echo $num_dcs
+    get_dc_count
 }
 
 tiga_get_port() {
@@ -215,5 +203,5 @@ for i in range(num_dcs):
 
 print(locations[best_leader_idx])
 " "$num_dcs" "${DIR}/latencies.csv")
-    echo "${best_city}1"
+    echo "${PREFIX}${best_city}1"
 }
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Time series of a YCSB client, from its status stream (-s).
+
+Every YCSB client prints a status line every ycsb.status_interval seconds:
+    2026-01-01 10:00:12:345 12 sec: 6034 operations; 503.2 current ops/sec; [UPDATE: Count=503, Max=..., Min=..., Avg=19821.4, 90=..., 99=...]
+While a client runs, its status lines are written to <client>.ts.csv, next to
+its <client>.dat log, one row per operation type:
+    wall_time  the (epoch) time of the status line;
+    elapsed_s  the time since the start of the client;
+    ops_per_s  the throughput of the client over the last interval;
+    op, count, avg_us, p99_us  the operations of the interval and their latency;
+    stall      1 when the throughput fell below timeseries.stall_fraction of
+               the median throughput of the client so far.
+orchestrate.py writes it for the clients it runs, and `follow` for a client
+started on its own (e.g., by fault_tolerance.sh).
+
+Usage: python3 timeseries.py follow <container> <ts_file>
+       python3 timeseries.py convert <log_file> <ts_file>
+
+`convert` writes the time series of a finished client from its log.
+"""
+
+import re
+import statistics
+import sys
+import time
+from datetime import datetime
+import docker
+from exp_config import load_config
+
+STATUS = re.compile(r"(?:(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}:\d{3}) )?.*?\b(\d+) sec: \d+ operations; ([\d.]+) current ops/sec")
+OPERATION = re.compile(r"\[([A-Za-z-]+): ([^\]]*)\]")
+COLUMNS = ["wall_time", "elapsed_s", "ops_per_s", "op", "count", "avg_us", "p99_us", "stall"]
+# Throughput samples before a stall can be told
+MIN_SAMPLES = 3
+
+config = {}
+
+
+def parse_status(line):
+    """(wall time or None, elapsed seconds, ops/s, {op: {field: value}}) of a status *line*, or None."""
+    m = STATUS.search(line)
+    if not m:
+        return None
+    wall_time = None
+    if m.group(1):
+        wall_time = datetime.strptime(m.group(1), "%Y-%m-%d %H:%M:%S:%f").timestamp()
+    operations = {}
+    for op, fields in OPERATION.findall(line[m.end():]):
+        values = {}
+        for field in fields.split(","):
+            key, _, value = field.strip().partition("=")
+            try:
+                values[key] = float(value)
+            except ValueError:
+                pass
+        if values.get("Count", 0) > 0 and op.upper() != "CLEANUP":
+            operations[op.lower()] = values
+    return wall_time, int(m.group(2)), float(m.group(3)), operations
+
+
+class TimeSeries:
+    """Writer of the time series of a client, fed with its log lines."""
+
+    def __init__(self, path, stall_fraction=None):
+        self.stall_fraction = float(stall_fraction if stall_fraction is not None
+                                    else config.get("timeseries.stall_fraction", 0.1))
+        self.throughputs = []
+        self.file = open(path, "w")
+        self.file.write(",".join(COLUMNS) + "\n")
+
+    def stalled(self, ops_per_s):
+        history = [t for t in self.throughputs if t > 0]
+        return len(history) >= MIN_SAMPLES and ops_per_s < self.stall_fraction * statistics.median(history)
+
+    def add(self, line):
+        status = parse_status(line)
+        if status is None:
+            return
+        wall_time, elapsed, ops_per_s, operations = status
+        stall = int(self.stalled(ops_per_s))
+        self.throughputs.append(ops_per_s)
+        prefix = f"{wall_time if wall_time is not None else time.time():.3f},{elapsed},{ops_per_s:.2f}"
+        for op, values in sorted(operations.items()) or [("", {})]:
+            count = int(values.get("Count", 0))
+            avg = f"{values['Avg']:g}" if "Avg" in values else ""
+            p99 = f"{values['99']:g}" if "99" in values else ""
+            self.file.write(f"{prefix},{op},{count},{avg},{p99},{stall}\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def follow(container_name, ts_file):
+    container = docker.from_env().containers.get(container_name)
+    series = TimeSeries(ts_file)
+    pending = ""
+    try:
+        for chunk in container.logs(stream=True, follow=True):
+            # A line may arrive in several chunks
+            lines = (pending + chunk.decode("utf-8", errors="ignore")).split("\n")
+            pending = lines.pop()
+            for line in lines:
+                series.add(line)
+        series.add(pending)
+    finally:
+        series.close()
+
+
+def convert(log_file, ts_file):
+    series = TimeSeries(ts_file)
+    with open(log_file, errors="replace") as f:
+        for line in f:
+            series.add(line)
+    series.close()
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "follow":
+        try:
+            follow(sys.argv[2], sys.argv[3])
+        except docker.errors.NotFound:
+            # Already exited (and removed)
+            pass
+    elif len(sys.argv) == 4 and sys.argv[1] == "convert":
+        convert(sys.argv[2], sys.argv[3])
+    else:
+        print(f"Usage: {sys.argv[0]} follow <container> <ts_file> | convert <log_file> <ts_file>")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    config = load_config()
+    main()
@@ -3,20 +3,59 @@
 DIR=$(dirname "${BASH_SOURCE[0]}")
 LOGDIR="${DIR}/logs"
 RESULTSDIR="${DIR}/results/"
-CONFIG_FILE="${DIR}/exp.config"
+CONFIG_FILE="${EXP_CONFIG:-${DIR}/exp.config}"
+DEFAULTS_FILE="${DIR}/defaults.config"
 
+# Value of a setting: the EXP_CFG_<key> environment variable (dots written as
+# "__", see config_set), else exp.config, else defaults.config; a setting given
+# empty is empty.  exp_config.py resolves the settings the same way for the
+# Python scripts.
 config() {
     if [ $# -ne 1 ]; then
         echo "usage: config key"
         exit -1
     fi
     local key=$1
-    local val
-    val=$(cat ${CONFIG_FILE} | grep -E "^${key}=" | cut -d= -f2)
-    if [ -z "$val" ] && [ "$key" == "nodesperdc" ]; then
-        val=1
+    local env="EXP_CFG_${key//./__}"
+    if [ -n "${!env+set}" ]; then
+        echo "${!env}"
+        return
     fi
-    echo "$val"
+    local file
+    for file in "${CONFIG_FILE}" "${DEFAULTS_FILE}"; do
+        if [ -f "${file}" ] && grep -qE "^${key}=" "${file}"; then
+            grep -E "^${key}=" "${file}" | tail -1 | cut -d= -f2-
+            return
+        fi
+    done
+}
+
+# Override a setting for this script and its children, without touching
+# exp.config (an empty value makes it empty; config_unset restores it).
+config_set() {
+    if [ $# -ne 2 ]; then
+        echo "usage: config_set key value"
+        exit -1
+    fi
+    export "EXP_CFG_${1//./__}=$2"
+    DEBUG=$(config debug)
+    PREFIX=$(config container_prefix)
+}
+
+config_unset() {
+    unset "EXP_CFG_${1//./__}"
+    DEBUG=$(config debug)
+    PREFIX=$(config container_prefix)
+}
+
+# Apply a --set=<key>=<value> argument of an experiment script.
+config_set_arg() {
+    local setting="${1#--set=}"
+    if [[ "$setting" != *=* ]]; then
+        error "Invalid setting '${setting}', expected --set=<key>=<value>"
+        exit 1
+    fi
+    config_set "${setting%%=*}" "${setting#*=}"
 }
 
 debug() {
@@ -46,6 +85,9 @@ clean_logdir() {
 }
 
 DEBUG=$(config debug)
+# Prepended to the name of every container, so that concurrent experiments
+# (see scheduler.py) do not collide
+PREFIX=$(config container_prefix)
 
 start_container() {
     if [ $# -lt 4 ]; then
@@ -93,41 +135,34 @@ start_container() {
 
     docker logs -f $cname > ${log_file} 2>&1 &
 
-    local start_time
-    start_time=$(date +%s)
     local timeout
     timeout=${START_CONTAINER_TIMEOUT:-90}   # seconds, override by exporting START_CONTAINER_TIMEOUT
 
-    while true; do
-        # Check for the readiness message in logs
-        if docker logs "$cname" 2>&1 | grep -F -- "$wait_msg" >/dev/null; then
+    local rc=0
+    python3 ${DIR}/wait_ready.py "$cname" "$wait_msg" "$timeout" || rc=$?
+    case $rc in
+        0)
             log "Container '${cname}' is ready (found: '${wait_msg}')"
             return 0
-        fi
-
-        # Check whether container is still running
-        local running
-        running=$(docker inspect -f '{{.State.Running}}' "$cname" 2>/dev/null) || {
+            ;;
+        4)
             error "Failed to inspect container '${cname}'"
-            return 4
-        }
-        if [ "$running" != "true" ]; then
+            ;;
+        5)
             local exit_code
             exit_code=$(docker inspect -f '{{.State.ExitCode}}' "$cname" 2>/dev/null || echo "unknown")
             error "Container '${cname}' exited with code ${exit_code} before readiness message appeared. Logs:"
-            docker logs "$cname" 2>&1 | sed 's/^/  /'
-            return 5
-        fi
-
-        # Timeout check
-        if (( $(date +%s) - start_time >= timeout )); then
+            sed 's/^/  /' ${log_file}
+            ;;
+        6)
             error "Timeout (${timeout}s) waiting for '${wait_msg}' in container '${cname}' logs. Logs:"
-            docker logs "$cname" 2>&1 | sed 's/^/  /'
-            return 6
-        fi
-
-        sleep 0.5
-    done
+            sed 's/^/  /' ${log_file}
+            ;;
+        *)
+            error "Failed to wait for '${wait_msg}' in container '${cname}' (code ${rc})"
+            ;;
+    esac
+    return $rc
 }
 
 wait_container() {
@@ -226,6 +261,33 @@ get_container_ip() {
     echo "$ip_address"
 }
 
+# Docker labels of a container of this experiment, by which teardown.py finds
+# it: its owner (the container prefix), its role and, for a node, its DC.
+container_labels() {
+    local role=$1
+    local dc=$2
+    local labels="--label exp.owner=${PREFIX:-default} --label exp.role=${role}"
+    if [ -n "${dc}" ]; then
+        labels+=" --label exp.dc=${dc}"
+    fi
+    echo "${labels}"
+}
+
+# Stop and remove the nodes and the YCSB clients of this experiment, all at
+# once (see teardown.py).
+teardown_cluster() {
+    python3 ${DIR}/teardown.py node master client loader || {
+        error "Some containers could not be removed."
+        return 1
+    }
+}
+
+# Number of DCs in which a node of this experiment is running.
+get_dc_count() {
+    docker ps --filter "label=exp.owner=${PREFIX:-default}" --filter "label=exp.role=node" \
+        --format '{{.Label "exp.dc"}}' | sort -u | sed '/^$/d' | wc -l
+}
+
 # Function to stop a container after a delay
 stop_container_after_delay() {
     container_name=$1
@@ -237,7 +299,11 @@ stop_container_after_delay() {
     ) &
 }
 
+# Docker CPU and memory limits of a node, from the machine type: a --cpus
+# quota, or, with cpu_pinning and the name of the container, as many dedicated
+# CPUs (see placement.py).
 get_resource_limits() {
+    local container_name=$1
     local machine
     machine=$(config machine)
 
@@ -266,6 +332,14 @@ get_resource_limits() {
     memory_gb=$(echo "$row" | cut -d',' -f3)
     memory_mb=$(awk "BEGIN { printf \"%d\", ${memory_gb} * 1024 }")
 
+    if [ "$(config cpu_pinning)" == "true" ] && [ -n "${container_name}" ]; then
+        local cpuset
+        cpuset=$(python3 ${DIR}/placement.py assign "${container_name}" "${vcpus}")
+        if [ -n "${cpuset}" ]; then
+            echo "--cpuset-cpus ${cpuset% *} --cpuset-mems ${cpuset#* } --memory ${memory_mb}m"
+            return 0
+        fi
+    fi
     echo "--cpus ${vcpus} --memory ${memory_mb}m"
 }
 
@@ -281,15 +355,15 @@ compute_test_machine() {
     fi
     local total_nodes=$((num_dcs * nodes_per_dc))
 
-    # Get actual machine CPUs
+    # Get actual machine CPUs (or the share of the host granted by scheduler.py)
     local actual_cpus
-    actual_cpus=$(nproc)
+    actual_cpus=${EXP_HOST_CPUS:-$(nproc)}
 
     # Get actual machine memory in GB (1 GB = 1048576 kB)
     local actual_mem_kb
     actual_mem_kb=$(awk '/^MemTotal:/{print $2}' /proc/meminfo)
     local actual_mem_gb
-    actual_mem_gb=$(awk "BEGIN { printf \"%.6f\", ${actual_mem_kb} / 1048576 }")
+    actual_mem_gb=${EXP_HOST_MEM_GB:-$(awk "BEGIN { printf \"%.6f\", ${actual_mem_kb} / 1048576 }")}
 
     local gcp_csv="${DIR}/gcp.csv"
     if [ ! -f "$gcp_csv" ]; then
@@ -317,24 +391,28 @@ compute_test_machine() {
     fi
 
     log "Test mode: machine spec '${machine}' for ${actual_cpus} CPUs, ${actual_mem_gb}GB memory, ${total_nodes} total nodes (${num_dcs} DCs x ${nodes_per_dc} nodes/DC)"
-    sed -i "s/^machine=.*/machine=${machine}/" "${CONFIG_FILE}"
+    config_set machine "${machine}"
     return 0
 }
 
+# Pull the stale or missing images of the configuration, concurrently (see
+# pull_images.py); aborts only when an image is not available at all.
 pull_images() {
-    log "Pulling all Docker images from ${CONFIG_FILE}..."
-    while IFS='=' read -r key value; do
-        [[ -z "$key" || "$key" =~ ^[[:space:]]*# ]] && continue
-        [[ "$key" =~ _image$ ]] || continue
-        value=$(echo "$value" | xargs)
-        log "Pulling image: ${value}"
-        docker pull "${value}"
-        if [ $? -ne 0 ]; then
-            log "ERROR: Failed to pull image '${value}'. Aborting."
-            exit 1
-        fi
-    done < "${CONFIG_FILE}"
-    log "All Docker images pulled successfully."
+    log "Checking the configured Docker images..."
+    python3 ${DIR}/pull_images.py || {
+        error "Some Docker images are not available. Aborting."
+        exit 1
+    }
+}
+
+# Rack (1-based) of the k-th node of a DC, following the racksperdc setting
+# (by default every node of a DC has its own rack).
+get_rack() {
+    local k=$1
+    local racks_per_dc
+    racks_per_dc=$(config racksperdc)
+    racks_per_dc=${racks_per_dc:-$(config nodesperdc)}
+    echo $(( (k - 1) % racks_per_dc + 1 ))
 }
 
 get_location() {
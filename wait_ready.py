@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Wait until a container is ready, i.e., its logs show a readiness message.
+
+The log stream of the container is followed once and matched incrementally
+(a line may arrive in several chunks), while the Docker events of the container
+are watched for its exit, so a crashed container is reported at once and a
+silent one can no longer block the caller: the timeout is enforced by the
+waiter, not checked when a log line happens to arrive.
+
+Usage: python3 wait_ready.py <container_name> <message> [timeout_s] [--regex]
+
+The message is a fixed string unless --regex is given.  The exit code is 0 when
+the container is ready, 4 when it does not exist, 5 when it exited before
+being ready and 6 on timeout (the codes of start_container in utils.sh).
+"""
+
+import re
+import sys
+import threading
+import docker
+
+READY, NOT_FOUND, EXITED, TIMEOUT = 0, 4, 5, 6
+
+
+class _Waiter:
+
+    def __init__(self, container, pattern):
+        self.container = container
+        self.pattern = pattern
+        self.done = threading.Event()
+        self.status = None
+        self.streams = []
+
+    def finish(self, status):
+        if self.status is None:
+            self.status = status
+        self.done.set()
+
+    def follow_logs(self):
+        try:
+            stream = self.container.logs(stream=True, follow=True)
+            self.streams.append(stream)
+            pending = ""
+            for chunk in stream:
+                if self.done.is_set():
+                    return
+                lines = (pending + chunk.decode("utf-8", errors="ignore")).split("\n")
+                pending = lines.pop()
+                if any(self.pattern.search(line) for line in lines) or self.pattern.search(pending):
+                    self.finish(READY)
+                    return
+            # The stream ends when the container stops
+            self.finish(EXITED)
+        except Exception:
+            self.finish(EXITED)
+
+    def watch_exit(self, client, log_thread):
+        try:
+            events = client.events(decode=True, filters={"container": self.container.id, "event": "die"})
+            self.streams.append(events)
+            # The container may have died before the subscription
+            self.container.reload()
+            if self.container.status in ("created", "running", "restarting"):
+                next(iter(events), None)
+            # Let the log follower drain: the readiness message may be the
+            # last line before a clean exit
+            log_thread.join(1)
+            self.finish(EXITED)
+        except Exception:
+            pass
+
+    def close(self):
+        for stream in self.streams:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+
+def wait_ready(container, pattern, timeout=300, client=None):
+    """Wait for the regex *pattern* in the logs of *container* for at most *timeout* seconds.
+
+    Returns READY, EXITED or TIMEOUT.
+    """
+    client = client or docker.from_env()
+    waiter = _Waiter(container, re.compile(pattern))
+    log_thread = threading.Thread(target=waiter.follow_logs, daemon=True)
+    log_thread.start()
+    threading.Thread(target=waiter.watch_exit, args=(client, log_thread), daemon=True).start()
+    if not waiter.done.wait(timeout):
+        waiter.finish(TIMEOUT)
+    waiter.close()
+    return waiter.status
+
+
+def main():
+    args = [a for a in sys.argv[1:] if a != "--regex"]
+    if len(args) < 2:
+        print(f"Usage: {sys.argv[0]} <container_name> <message> [timeout_s] [--regex]")
+        sys.exit(2)
+
+    container_name, message = args[0], args[1]
+    timeout = float(args[2]) if len(args) > 2 else 300
+    pattern = message if "--regex" in sys.argv else re.escape(message)
+
+    client = docker.from_env()
+    try:
+        container = client.containers.get(container_name)
+    except docker.errors.NotFound:
+        sys.exit(NOT_FOUND)
+    sys.exit(wait_ready(container, pattern, timeout, client))
+
+
+if __name__ == "__main__":
+    main()
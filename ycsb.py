@@ -5,10 +5,11 @@ Plotting script for the YCSB latency experiment.
 Generates a grouped bar chart:
   - X-axis: YCSB workloads (A, B, C, D), one group per workload
   - Y-axis: median latency (ms) — the median of per-row p50 values across all
-    executed operations and all clients for each workload/protocol group
+    executed operations and all clients of a run, averaged over the runs
+    (repetitions, see repeat.py) of each workload/protocol group
   - One bar per protocol within each group, placed side-by-side
-  - Each bar includes a standard deviation indicator (small solid horizontal
-    line centred at the tip of the bar)
+  - Each bar includes the 95% confidence interval over the runs (small solid
+    horizontal line centred at the tip of the bar; none for a single run)
   - Y-axis fixed from 0 to 400 ms
   - Protocols ordered slowest → fastest (highest → lowest median latency)
   - Protocol name shown at the top of each bar in the first workload group
@@ -20,6 +21,7 @@ Generates a grouped bar chart:
 import sys
 import pandas as pd
 
+from repeat import confidence_interval
 from colors import load_protocol_colors, load_protocol_aliases, get_protocol_color, make_protocol_legend, sort_protocols_for_legend, sort_protocols_for_plotting
 
 
@@ -96,23 +98,23 @@ def main():
         print("No valid p50 latency data found in results CSV.")
         sys.exit(1)
 
-    # Median and standard deviation of p50 values per (protocol, workload).
-    # p50 is the median latency in ms (no unit conversion needed).
-    grp = df_lat.groupby(['protocol', 'workload_upper'])['p50_f']
-    lat_medians = grp.median()
-    lat_stds = grp.std().fillna(0)
+    # Median of p50 values per run, then mean and 95% confidence interval over
+    # the runs of each (protocol, workload): the spread across the DCs is
+    # geography, not noise.  p50 is the median latency in ms (no unit
+    # conversion needed).
+    if 'run' not in df_lat.columns:
+        df_lat['run'] = 0
+    run_medians = df_lat.groupby(['protocol', 'workload_upper', 'run'])['p50_f'].median()
 
     data = {}
     for workload in workloads:
         data[workload] = {}
         for proto in protocol_order:
             try:
-                median = float(lat_medians.loc[proto, workload])
-                std = float(lat_stds.loc[proto, workload])
+                runs = run_medians.loc[proto, workload].tolist()
             except KeyError:
-                median = 0.0
-                std = 0.0
-            data[workload][proto] = (median, std)
+                runs = []
+            data[workload][proto] = confidence_interval(runs) if runs else (0.0, 0.0)
 
     # Sort protocols by protocols.csv order for consistent legend and captions.
     legend_order = sort_protocols_for_plotting(protocol_order)
@@ -155,8 +157,8 @@ def main():
             f.write(f"        error mark=-, error bar style={{solid, black, line width=0.8pt}},\n")
             f.write(f"      ] coordinates {{\n")
             for wl_idx, workload in enumerate(workloads):
-                median, std = data[workload].get(proto, (0.0, 0.0))
-                f.write(f"        ({workload}, {median:.2f}) +- (0, {std:.2f})\n")
+                median, ci = data[workload].get(proto, (0.0, 0.0))
+                f.write(f"        ({workload}, {median:.2f}) +- (0, {ci:.2f})\n")
             f.write("      };\n\n")
 
         f.write("    \\end{axis}\n")
@@ -164,7 +166,7 @@ def main():
 
         # Caption: describe the figure without explicit colour swatches
         workloads_str = ", ".join(workloads)
-        f.write(f"  \\caption{{Median latency in YCSB (averaged over all sites and operations). Error bars show the standard deviation.}}\n")
+        f.write(f"  \\caption{{Median latency in YCSB (averaged over all sites and operations). Error bars show the 95\\% confidence interval over the runs.}}\n")
         f.write("  \\label{fig:ycsb-latency}\n")
         f.write("\\end{figure}\n")
 
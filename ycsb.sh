@@ -11,14 +11,17 @@ source ${DIR}/utils.sh
 source ${DIR}/run_benchmarks.sh
 
 usage() {
-    echo "Usage: $0 [--dry-run] [--test] [--protocols=LIST] [--workloads=LIST]"
+    echo "Usage: $0 [--dry-run] [--fresh] [--test] [--protocols=LIST] [--workloads=LIST] [--set=KEY=VALUE...]"
     echo "  --dry-run         Skip the experiment run; only draw plots using existing data."
+    echo "  --fresh           Discard the completed runs instead of resuming the sweep."
     echo "  --test            Use a 60s run time and right-size containers to fit this machine."
     echo "  --protocols=LIST  Override the list of protocols to run (comma-separated)."
     echo "  --workloads=LIST  Override the list of workloads to run (comma-separated, e.g. 'a,b')."
+    echo "  --set=KEY=VALUE   Override a setting of exp.config for this run (repeatable)."
 }
 
 dry_run=0
+fresh=0
 test_run=0
 protocols_override=""
 for arg in "$@"; do
@@ -26,6 +29,9 @@ for arg in "$@"; do
         --dry-run)
             dry_run=1
             ;;
+        --fresh)
+            fresh=1
+            ;;
         --test)
             test_run=1
             ;;
@@ -35,6 +41,9 @@ for arg in "$@"; do
         --workloads=*)
             workloads_override=$(echo "${arg#*=}" | tr ',' ' ')
             ;;
+        --set=*)
+            config_set_arg "$arg"
+            ;;
         *)
             echo "Unknown parameter: $arg"
             usage
@@ -64,21 +73,11 @@ threads=$(config threads)
 ops_per_thread=0
 
 if [ "$test_run" -eq 1 ]; then
-    original_machine=$(config machine)
-    original_maxexecutiontime=$(config maxexecutiontime)
-    original_records=$(config records)
-    original_threads=$(config threads)
-    restore_test_settings() {
-        sed -i "s/^machine=.*/machine=${original_machine}/" "${CONFIG_FILE}"
-        sed -i "s/^maxexecutiontime=.*/maxexecutiontime=${original_maxexecutiontime}/" "${CONFIG_FILE}"
-        sed -i "s/^records=.*/records=${original_records}/" "${CONFIG_FILE}"
-        sed -i "s/^threads=.*/threads=${original_threads}/" "${CONFIG_FILE}"
-    }
-    trap restore_test_settings EXIT
     compute_test_machine "${nodes}"
-    sed -i "s/^maxexecutiontime=.*/maxexecutiontime=10/" "${CONFIG_FILE}"
-    sed -i "s/^records=.*/records=1000/" "${CONFIG_FILE}"
-    sed -i "s/^threads=.*/threads=1/" "${CONFIG_FILE}"
+    config_set maxexecutiontime 10
+    config_set records 1000
+    config_set threads 1
+    config_set repeat.max 1
 fi
 maxexecutiontime=$(config maxexecutiontime)
 records=$(config records)
@@ -86,26 +85,39 @@ threads=$(config threads)
 
 if [ "$dry_run" -eq 0 ]; then
     pull_images
-    do_clean_up=0
+    init_ledger ${LOGDIR}/ycsb ${fresh}
     for p in ${protocols}
     do
-	# clean prior logs
-	rm -f ${LOGDIR}/ycsb/*${p}*
-	
-	do_create_and_load=1
-	total=$(( $(echo ${workloads} | wc -w) * $(echo ${threads} | wc -w) ))
-	count=0
-	for w in ${workloads}
+	# clean the logs of incomplete runs
+	prune_logs ${LOGDIR}/ycsb "${p}_*"
+    done
+
+    # Each point is run again in later rounds until its results are stable
+    # (see repeat.py), the protocols in a different order in each round
+    for round in $(seq 1 $(config repeat.max))
+    do
+	for p in $(round_order ${round} ${protocols})
 	do
-	    for c in ${threads}
+	    do_create_and_load=1
+	    for w in ${workloads}
 	    do
-		do_clean_up=$(( count == total-1 ? 1 : 0 ))
-		ts=$(date +%Y%m%d%H%M%S%N)
-		output_file="${LOGDIR}/ycsb/${p}_${nodes}_${w}_${ts}.dat"
-		run_benchmark ${p} ${c} ${nodes} ${replication_factor} ${workload_type} ${w} ${records} $((threads * ops_per_thread)) ${output_file} ${do_create_and_load} ${do_clean_up} -p maxexecutiontime=${maxexecutiontime}
-		do_create_and_load=0
-		count=$((count+1))
+		for c in ${threads}
+		do
+		    point="${p} nodes=${nodes} workload=${w} threads=${c} records=${records}"
+		    if point_done "${point}" ${round}; then
+			log "Skipping ${point} in round ${round}"
+			continue
+		    fi
+		    ts=$(date +%Y%m%d%H%M%S%N)
+		    output_file="${LOGDIR}/ycsb/${p}_${nodes}_${w}_${ts}.dat"
+		    run_benchmark ${p} ${c} ${nodes} ${replication_factor} ${workload_type} ${w} ${records} $((threads * ops_per_thread)) ${output_file} ${do_create_and_load} 0 -p maxexecutiontime=${maxexecutiontime}
+		    record_point "${point} run=${round}" "${output_file}"
+		    do_create_and_load=0
+		done
 	    done
+	    if [ "${do_create_and_load}" -eq 0 ]; then
+		stop_benchmark ${p} ${nodes}
+	    fi
 	done
     done
 fi